@@ -1,8 +1,13 @@
 import sys
 import os
+import time
 import traceback
+
+# Startup reference point for the time-to-first-window measurement
+STARTUP_TIME = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication, QMessageBox, QDialog
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QThread, pyqtSignal
 
 # Ensure bin directory is in PATH
 bin_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
@@ -17,16 +22,19 @@ if not os.path.dirname(os.path.abspath(__file__)) in sys.path:
 APP_VERSION = "1.1.0"
 GITHUB_REPO = "HyIsNoob/EditingTool"  # Replace with actual GitHub repo
 
-# Run environment checks first
-try:
-    from runtime_checks import check_environment
-    env_status = check_environment()
-except ImportError:
-    # Handle case where runtime_checks might not be available
-    env_status = {"ffmpeg": {"available": False}}
+# Time from process start until the main menu has been painted
+TIME_TO_FIRST_WINDOW_TARGET_MS = 1000
 
-# Initialize compatibility layer 
-from utils import compat
+# Heavy modules imported in the background once the main menu is visible,
+# so opening a tool later does not have to wait for them
+PRELOAD_MODULES = [
+    "requests",
+    "yt_dlp",
+    "ui.youtube_downloader_window",
+    "ui.tiktok_downloader_window",
+    "ui.facebook_downloader_window",
+    "ui.project_manager_window",
+]
 
 # Import updater components
 try:
@@ -36,9 +44,52 @@ except ImportError:
     # Fallback if updater module isn't available
     Updater = None
 
-# Import MainMenu after compatibility is set up
+# MainMenu no longer imports the downloader windows, yt-dlp or requests at load time
 from ui.main_menu import MainMenu
 
+class StartupWarmupThread(QThread):
+    """Environment checks, compatibility setup and module preloading, run after the first window"""
+    environment_checked = pyqtSignal(dict)
+
+    def run(self):
+        # Environment checks spawn ffmpeg, keep them off the startup path
+        try:
+            from runtime_checks import check_environment
+            env_status = check_environment()
+        except ImportError:
+            # Handle case where runtime_checks might not be available
+            env_status = {"ffmpeg": {"available": False}}
+        
+        # Initialize compatibility layer
+        from utils import compat
+        compat.ensure_initialized()
+        self.environment_checked.emit(env_status)
+        
+        for module_name in PRELOAD_MODULES:
+            try:
+                __import__(module_name)
+            except Exception as e:
+                print(f"Error preloading {module_name}: {str(e)}")
+
+def show_environment_warnings(env_status):
+    """Show warning if FFmpeg is not available"""
+    if not env_status["ffmpeg"]["available"]:
+        QMessageBox.warning(
+            None, 
+            "FFmpeg Not Found", 
+            "FFmpeg is not available. Some features may not work correctly.\n\n"
+            "If you experience issues with video or audio processing,\n"
+            "please reinstall the application or contact support."
+        )
+
+def report_time_to_first_window():
+    """Log the time from process start to the first painted main menu"""
+    elapsed_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+    print(f"Time to first window: {elapsed_ms:.0f} ms (target {TIME_TO_FIRST_WINDOW_TARGET_MS} ms)")
+    if elapsed_ms > TIME_TO_FIRST_WINDOW_TARGET_MS:
+        print("Warning: startup is slower than the time-to-first-window target")
+    return elapsed_ms
+
 def check_for_updates(main_window):
     """Check for application updates"""
     if Updater is None:
@@ -69,30 +120,93 @@ def check_for_updates(main_window):
         # Just log errors, don't interrupt application startup
         print(f"Error checking for updates: {str(e)}")
 
+def start_ytdlp_warmup():
+    """Enforce the yt-dlp cache size budget and prime the YouTube player cache"""
+    try:
+        from utils.config_manager import ConfigManager
+        from utils.ytdlp_cache import start_cache_warmup
+        config = ConfigManager.get_instance()
+        start_cache_warmup(config.ytdlp_cache_max_size_mb,
+                           prime_youtube=config.ytdlp_cache_warm_on_startup)
+    except Exception as e:
+        print(f"Error starting yt-dlp warm-up: {str(e)}")
+
+def start_subscription_scheduler():
+    """Start the periodic sync of subscribed channels/playlists if enabled"""
+    try:
+        from utils.config_manager import ConfigManager
+        if not ConfigManager.get_instance().subscriptions_auto_sync:
+            return
+        from utils.subscriptions import SubscriptionManager
+        SubscriptionManager.get_instance().start_scheduler()
+    except Exception as e:
+        print(f"Error starting subscription scheduler: {str(e)}")
+
+def start_stall_watchdog(force=False):
+    """Start the event-loop stall watchdog and its overlay if enabled (or forced by --stall-watchdog)"""
+    try:
+        from utils.config_manager import ConfigManager
+        config = ConfigManager.get_instance()
+        if not (force or config.stall_watchdog_enabled):
+            return None
+        from utils.stall_watchdog import StallWatchdog
+        from ui.stall_overlay import StallOverlay
+        watchdog = StallWatchdog.get_instance()
+        watchdog.start(config.stall_watchdog_threshold_ms)
+        overlay = StallOverlay(watchdog)
+        overlay.show()
+        return watchdog, overlay
+    except Exception as e:
+        print(f"Error starting stall watchdog: {str(e)}")
+        return None
+
 def main():
     app = QApplication([])
-    
-    # Show warning if FFmpeg is not available
-    if not env_status["ffmpeg"]["available"]:
-        QMessageBox.warning(
-            None, 
-            "FFmpeg Not Found", 
-            "FFmpeg is not available. Some features may not work correctly.\n\n"
-            "If you experience issues with video or audio processing,\n"
-            "please reinstall the application or contact support."
-        )
+    # --startup-benchmark: quit as soon as the first window is painted (exit code 1 if over target)
+    benchmark = "--startup-benchmark" in sys.argv
     
     main_menu = MainMenu()
     main_menu.show()
     
-    # Check for updates after window is shown
-    check_for_updates(main_menu)
+    stall_watchdog = None
+    
+    warmup_thread = StartupWarmupThread()
+    warmup_thread.environment_checked.connect(show_environment_warnings)
+    
+    def on_first_window():
+        elapsed_ms = report_time_to_first_window()
+        if benchmark:
+            app.exit(0 if elapsed_ms <= TIME_TO_FIRST_WINDOW_TARGET_MS else 1)
+            return
+        
+        # Everything below runs once the main menu is on screen
+        nonlocal stall_watchdog
+        stall_watchdog = start_stall_watchdog("--stall-watchdog" in sys.argv)
+        
+        warmup_thread.start(QThread.LowPriority)
+        
+        # Warm up yt-dlp (extractors, persistent cache) in the background once the window is up
+        QTimer.singleShot(1000, start_ytdlp_warmup)
+        
+        # Check for updates after window is shown
+        check_for_updates(main_menu)
+        
+        # Scheduled subscription syncs (only does work if enabled in settings)
+        QTimer.singleShot(5000, start_subscription_scheduler)
+    
+    # A zero timer fires after the show/paint events queued above have been processed
+    QTimer.singleShot(0, on_first_window)
     
-    app.exec_()
+    exit_code = app.exec_()
+    if stall_watchdog:
+        stall_watchdog[0].stop()
+    if warmup_thread.isRunning():
+        warmup_thread.wait(2000)
+    return exit_code
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         # Show error dialog for uncaught exceptions
         error_msg = f"An unexpected error occurred:\n\n{str(e)}\n\n{traceback.format_exc()}"
@@ -0,0 +1,41 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QSpinBox
+from PyQt5.QtCore import pyqtSignal
+
+
+class AutoQualityLimits(QWidget):
+    """Deadline and size budget of the "Tự động" quality entry, saved in the config"""
+    limits_changed = pyqtSignal()
+
+    def __init__(self, config_manager, parent=None):
+        super().__init__(parent)
+        self.config_manager = config_manager
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Tự động: xong trong"))
+
+        self.deadline_spin = QSpinBox()
+        self.deadline_spin.setRange(1, 24 * 60)
+        self.deadline_spin.setSuffix(" phút")
+        self.deadline_spin.setValue(config_manager.auto_quality_deadline_minutes)
+        self.deadline_spin.valueChanged.connect(self.on_value_changed)
+        layout.addWidget(self.deadline_spin)
+
+        self.size_budget_spin = QSpinBox()
+        self.size_budget_spin.setRange(0, 100000)
+        self.size_budget_spin.setSingleStep(100)
+        self.size_budget_spin.setSuffix(" MB")
+        self.size_budget_spin.setSpecialValueText("Không giới hạn dung lượng")
+        self.size_budget_spin.setValue(config_manager.auto_quality_max_size_mb)
+        self.size_budget_spin.valueChanged.connect(self.on_value_changed)
+        layout.addWidget(self.size_budget_spin)
+
+    def limits(self):
+        """(thời hạn tính bằng giây, dung lượng tối đa tính bằng byte hoặc None)"""
+        max_size_mb = self.size_budget_spin.value()
+        return self.deadline_spin.value() * 60, (max_size_mb * 1024 * 1024 if max_size_mb else None)
+
+    def on_value_changed(self):
+        self.config_manager.auto_quality_deadline_minutes = self.deadline_spin.value()
+        self.config_manager.auto_quality_max_size_mb = self.size_budget_spin.value()
+        self.limits_changed.emit()
@@ -1,238 +1,402 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QListWidget, QListWidgetItem, QMessageBox,
-                             QFrame, QProgressBar, QFileDialog)
-from PyQt5.QtGui import QFont, QPixmap, QIcon
-from PyQt5.QtCore import Qt, QSize, QTimer
+                             QPushButton, QListView, QMessageBox, QApplication, QStyle,
+                             QStyledItemDelegate, QStyleOptionProgressBar)
+from PyQt5.QtGui import QFont, QFontMetrics, QColor, QPainter, QPen
+from PyQt5.QtCore import (Qt, QSize, QRect, QEvent, QAbstractListModel, QModelIndex,
+                          QSortFilterProxyModel, pyqtSignal)
 import os
-import sys
 import subprocess
 from utils.download_manager import DownloadManager
+from utils.thumbnail_service import ThumbnailService
 
-class DownloadItemWidget(QWidget):
-    """Custom widget for download list items with buttons"""
-    
-    def __init__(self, download_id, title, status, thumbnail_path, progress, output_file, list_widget=None, parent_window=None):
-        super().__init__()
-        self.download_id = download_id
-        self.output_file = output_file
-        self.list_widget = list_widget  # Store reference to the list widget
-        self.parent_window = parent_window  # Store reference to the parent window
-        
-        # Setup layout
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Thumbnail (left side)
-        self.thumbnail_label = QLabel()
-        self.thumbnail_label.setFixedSize(120, 68)  # 16:9 aspect ratio
-        self.thumbnail_label.setStyleSheet("border: 1px solid #ddd; background-color: #f0f0f0;")
-        self.thumbnail_label.setAlignment(Qt.AlignCenter)
-        
-        if thumbnail_path and os.path.exists(thumbnail_path):
-            pixmap = QPixmap(thumbnail_path)
-            self.thumbnail_label.setPixmap(pixmap.scaled(120, 68, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            # Default icons based on source
-            if title.startswith("YouTube") or "youtube.com" in title.lower():
-                self.thumbnail_label.setText("YouTube")
-                self.thumbnail_label.setStyleSheet("background-color: #FF0000; color: white; font-weight: bold;")
-            elif title.startswith("TikTok") or "tiktok.com" in title.lower():
-                self.thumbnail_label.setText("TikTok")
-                self.thumbnail_label.setStyleSheet("background-color: #000000; color: white; font-weight: bold;")
-            elif title.startswith("Facebook") or "facebook.com" in title.lower():
-                self.thumbnail_label.setText("Facebook")
-                self.thumbnail_label.setStyleSheet("background-color: #1877F2; color: white; font-weight: bold;")
-            else:
-                self.thumbnail_label.setText("Video")
-                
-        layout.addWidget(self.thumbnail_label)
-        
-        # Info (middle)
-        info_widget = QWidget()
-        info_layout = QVBoxLayout(info_widget)
-        info_layout.setContentsMargins(5, 0, 5, 0)
-        info_layout.setSpacing(5)
-        
-        # Title with ellipsis for long names
-        title_text = title if len(title) <= 40 else title[:37] + "..."
-        title_label = QLabel(title_text)
-        title_label.setStyleSheet("font-weight: bold; color: #333;")
-        info_layout.addWidget(title_label)
-        
-        # Progress bar or status
-        if status == 'downloading' or status == 'processing':
-            progress_bar = QProgressBar()
-            progress_bar.setValue(progress if progress else 0)
-            progress_bar.setStyleSheet("""
-                QProgressBar {
-                    border: 1px solid #ddd;
-                    border-radius: 3px;
-                    text-align: center;
-                    height: 16px;
-                }
-                QProgressBar::chunk {
-                    background-color: #2196F3;
-                    border-radius: 2px;
-                }
-            """)
-            info_layout.addWidget(progress_bar)
-        else:
-            status_text = "✅ Hoàn tất" if status == 'completed' else "❌ Lỗi" if status == 'error' else "⏸️ Đã dừng"
-            status_label = QLabel(status_text)
-            status_label.setStyleSheet("color: #666;")
-            info_layout.addWidget(status_label)
-        
-        layout.addWidget(info_widget, 1)  # 1 means this widget will take available space
-        
-        # Action buttons (right side)
-        buttons_widget = QWidget()
-        buttons_layout = QHBoxLayout(buttons_widget)
-        buttons_layout.setContentsMargins(0, 0, 0, 0)
-        buttons_layout.setSpacing(5)
-        
-        # Only enable buttons if download completed and file exists
-        can_open = status == 'completed' and output_file and os.path.exists(output_file)
-        
-        # Play button
-        play_button = QPushButton("▶️ Phát")
-        play_button.setToolTip("Mở file đã tải")
-        play_button.setFixedHeight(30)
-        play_button.setCursor(Qt.PointingHandCursor)
-        play_button.setEnabled(can_open)
-        play_button.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border-radius: 4px;
-                padding: 3px 8px;
-            }
-            QPushButton:hover { background-color: #45a049; }
-            QPushButton:disabled { background-color: #cccccc; color: #666666; }
-        """)
-        play_button.clicked.connect(self.open_file)
-        buttons_layout.addWidget(play_button)
-        
-        # Folder button
-        folder_button = QPushButton("📂 Thư mục")
-        folder_button.setToolTip("Mở thư mục chứa file")
-        folder_button.setFixedHeight(30)
-        folder_button.setCursor(Qt.PointingHandCursor)
-        folder_button.setEnabled(can_open)
-        folder_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border-radius: 4px;
-                padding: 3px 8px;
-            }
-            QPushButton:hover { background-color: #0b7dda; }
-            QPushButton:disabled { background-color: #cccccc; color: #666666; }
-        """)
-        folder_button.clicked.connect(self.open_folder)
-        buttons_layout.addWidget(folder_button)
-        
-        # Add Delete button
-        delete_button = QPushButton("🗑️ Xóa")
-        delete_button.setToolTip("Xóa khỏi danh sách")
-        delete_button.setFixedHeight(30)
-        delete_button.setCursor(Qt.PointingHandCursor)
-        delete_button.setStyleSheet("""
-            QPushButton {
-                background-color: #F44336;
-                color: white;
-                border-radius: 4px;
-                padding: 3px 8px;
-            }
-            QPushButton:hover { background-color: #d32f2f; }
-        """)
-        delete_button.clicked.connect(self.remove_download)
-        buttons_layout.addWidget(delete_button)
-        
-        layout.addWidget(buttons_widget)
-        
-        # Set overall style
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #ffffff;
-                border-radius: 6px;
-            }
-        """)
-        self.setMinimumHeight(80)
-        self.setMaximumHeight(80)
-        
-    def open_file(self):
-        if self.output_file and os.path.exists(self.output_file):
-            if self.parent_window:
-                self.parent_window.open_file(self.output_file)
+THUMBNAIL_SIZE = (120, 68)  # 16:9
+ROW_HEIGHT = 90  # thẻ 80px + lề 5px
+
+
+class DownloadListModel(QAbstractListModel):
+    """
+    Rows of DownloadManager.downloads, kept in sync from the manager's
+    signals: an update only emits dataChanged for its own row.
+    """
+    IdRole = Qt.UserRole + 1
+    InfoRole = Qt.UserRole + 2
+    StatusRole = Qt.UserRole + 3
+    TimestampRole = Qt.UserRole + 4
+    ThumbnailRole = Qt.UserRole + 5
+    CanOpenRole = Qt.UserRole + 6
+    CanResumeRole = Qt.UserRole + 7
+
+    def __init__(self, download_manager, parent=None):
+        super().__init__(parent)
+        self.download_manager = download_manager
+        self._ids = []
+        self._rows = {}  # download_id -> row
+        self._can_open = {}  # download_id -> file đã tải còn tồn tại (tránh stat mỗi lần vẽ)
+        self._thumbnails_pending = set()
+        self._thumbnails_failed = set()
+        self.reload()
+
+        download_manager.download_added.connect(self._on_download_added)
+        download_manager.download_updated.connect(self._on_download_updated)
+        download_manager.download_removed.connect(self._on_download_removed)
+        download_manager.downloads_updated.connect(self._on_downloads_updated)
+        download_manager.downloads_removed.connect(self._on_downloads_removed)
+
+    def reload(self):
+        """Rebuild every row from the manager (manual refresh)"""
+        self.beginResetModel()
+        self._ids = [download_id for download_id, info in self.download_manager.downloads.items()
+                     if download_id and info]
+        self._rows = {download_id: row for row, download_id in enumerate(self._ids)}
+        self._can_open.clear()
+        self._thumbnails_failed.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def row_of(self, download_id):
+        return self._rows.get(download_id, -1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+        download_id = self._ids[index.row()]
+        info = self.download_manager.downloads.get(download_id)
+        if info is None:
+            return None
+        if role == Qt.DisplayRole:
+            return getattr(info, 'title', 'Unknown')
+        if role == self.IdRole:
+            return download_id
+        if role == self.InfoRole:
+            return info
+        if role == self.StatusRole:
+            return getattr(info, 'status', 'unknown')
+        if role == self.TimestampRole:
+            return getattr(info, 'timestamp', 0)
+        if role == self.ThumbnailRole:
+            return self._thumbnail(info)
+        if role == self.CanOpenRole:
+            if download_id not in self._can_open:
+                output_file = getattr(info, 'output_file', None)
+                self._can_open[download_id] = bool(info.status == 'completed' and output_file
+                                                   and os.path.exists(output_file))
+            return self._can_open[download_id]
+        if role == self.CanResumeRole:
+            return info.status == 'paused' and self.download_manager.can_resume(download_id)
+        return None
+
+    def _thumbnail(self, info):
+        path = getattr(info, 'thumbnail_path', None)
+        if not path or path in self._thumbnails_failed:
+            return None
+        service = ThumbnailService.get_instance()
+        pixmap = service.cached(path, THUMBNAIL_SIZE)
+        if pixmap is None and path not in self._thumbnails_pending:
+            # Tải ở luồng nền, vẽ lại đúng dòng đó khi có ảnh
+            self._thumbnails_pending.add(path)
+            service.request(path, THUMBNAIL_SIZE,
+                            lambda result, download_id=info.id: self._on_thumbnail(download_id, path, result),
+                            owner=self)
+        return pixmap
+
+    def _on_thumbnail(self, download_id, path, pixmap):
+        self._thumbnails_pending.discard(path)
+        if pixmap is None:
+            self._thumbnails_failed.add(path)
+            return
+        self._emit_row_changed(download_id, [self.ThumbnailRole])
+
+    def _emit_row_changed(self, download_id, roles=None):
+        row = self._rows.get(download_id)
+        if row is not None:
+            index = self.index(row)
+            if roles:
+                self.dataChanged.emit(index, index, roles)
             else:
-                try:
-                    if os.name == 'nt':  # Windows
-                        os.startfile(self.output_file)
-                    elif os.name == 'posix':  # macOS, Linux
-                        subprocess.run(['xdg-open', self.output_file])
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Không thể mở file: {str(e)}")
+                self.dataChanged.emit(index, index)
+
+    def _on_download_added(self, download_id):
+        if download_id in self._rows or download_id not in self.download_manager.downloads:
+            return
+        row = len(self._ids)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._ids.append(download_id)
+        self._rows[download_id] = row
+        self.endInsertRows()
+
+    def _on_download_updated(self, download_id):
+        if download_id not in self._rows:
+            self._on_download_added(download_id)
+            return
+        self._can_open.pop(download_id, None)
+        self._emit_row_changed(download_id)
+
+    def _on_download_removed(self, download_id):
+        row = self._rows.pop(download_id, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._ids[row]
+        for shifted in range(row, len(self._ids)):
+            self._rows[self._ids[shifted]] = shifted
+        self._can_open.pop(download_id, None)
+        self.endRemoveRows()
+
+    def _on_downloads_updated(self, download_ids):
+        """Batched update: one insert per new row, one dataChanged per run of adjacent changed rows"""
+        rows = set()
+        for download_id in download_ids:
+            if download_id not in self._rows:
+                self._on_download_added(download_id)
+                continue
+            self._can_open.pop(download_id, None)
+            rows.add(self._rows[download_id])
+        # Không phát một khoảng min..max: các dòng không đổi ở giữa cũng bị vẽ lại
+        start = previous = None
+        for row in sorted(rows):
+            if previous is not None and row != previous + 1:
+                self.dataChanged.emit(self.index(start), self.index(previous))
+                start = None
+            if start is None:
+                start = row
+            previous = row
+        if start is not None:
+            self.dataChanged.emit(self.index(start), self.index(previous))
+
+    def _on_downloads_removed(self, download_ids):
+        """Batched removal: a single model reset instead of one removal per row"""
+        removed = set(download_ids) & self._rows.keys()
+        if not removed:
+            return
+        if len(removed) == 1:
+            self._on_download_removed(next(iter(removed)))
+            return
+        self.beginResetModel()
+        self._ids = [download_id for download_id in self._ids if download_id not in removed]
+        self._rows = {download_id: row for row, download_id in enumerate(self._ids)}
+        for download_id in removed:
+            self._can_open.pop(download_id, None)
+        self.endResetModel()
+
+
+class DownloadFilterProxyModel(QSortFilterProxyModel):
+    """Status filter of the window, newest first"""
+    FILTER_STATUSES = {
+        'completed': ('completed',),
+        'in_progress': ('downloading', 'processing', 'paused', 'running'),
+        'error': ('error',),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.current_filter = "all"
+        self.setSortRole(DownloadListModel.TimestampRole)
+        self.setDynamicSortFilter(True)
+
+    def set_filter(self, filter_type):
+        self.current_filter = filter_type
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.current_filter == "all":
+            return True
+        status = self.sourceModel().index(source_row, 0, source_parent).data(DownloadListModel.StatusRole)
+        return status in self.FILTER_STATUSES.get(self.current_filter, ())
+
+    def download_ids(self):
+        """IDs of the rows that pass the current filter"""
+        return [self.index(row, 0).data(DownloadListModel.IdRole) for row in range(self.rowCount())]
+
+
+class DownloadItemDelegate(QStyledItemDelegate):
+    """Paints a download row (thumbnail, title, status, action buttons) without per-row widgets"""
+    action_requested = pyqtSignal(str, str)  # action, download_id
+
+    BUTTON_HEIGHT = 30
+    BUTTON_SPACING = 5
+    BUTTONS = {
+        # action: (nhãn, màu, màu khi hover)
+        'play': ("▶️ Phát", "#4CAF50", "#45a049"),
+        'folder': ("📂 Thư mục", "#2196F3", "#0b7dda"),
+        'resume': ("⏯️ Tiếp tục", "#FF9800", "#F57C00"),
+        'remove': ("🗑️ Xóa", "#F44336", "#d32f2f"),
+    }
+    PLACEHOLDERS = {
+        'youtube': ("YouTube", "#FF0000", "white"),
+        'tiktok': ("TikTok", "#000000", "white"),
+        'facebook': ("Facebook", "#1877F2", "white"),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._hover = None  # (download_id, action)
+        self._button_widths = {}
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ROW_HEIGHT)
+
+    # === Layout ===
+
+    def _buttons(self, card, index, font):
+        """[(action, rect, enabled)] from left to right"""
+        actions = [('play', index.data(DownloadListModel.CanOpenRole)),
+                   ('folder', index.data(DownloadListModel.CanOpenRole))]
+        if index.data(DownloadListModel.CanResumeRole):
+            actions.append(('resume', True))
+        actions.append(('remove', True))
+
+        metrics = QFontMetrics(font)
+        result = []
+        right = card.right() - 5
+        top = card.top() + (card.height() - self.BUTTON_HEIGHT) // 2
+        for action, enabled in reversed(actions):
+            width = self._button_widths.get(action)
+            if width is None:
+                width = metrics.horizontalAdvance(self.BUTTONS[action][0]) + 16
+                self._button_widths[action] = width
+            result.append((action, QRect(right - width + 1, top, width, self.BUTTON_HEIGHT), bool(enabled)))
+            right -= width + self.BUTTON_SPACING
+        result.reverse()
+        return result
+
+    @staticmethod
+    def _card_rect(option):
+        return option.rect.adjusted(5, 5, -5, -5)
+
+    def _placeholder(self, info):
+        source = (getattr(info, 'source', '') or '').lower()
+        if source in self.PLACEHOLDERS:
+            return self.PLACEHOLDERS[source]
+        title = (getattr(info, 'title', '') or '').lower()
+        for key, placeholder in self.PLACEHOLDERS.items():
+            if f"{key}.com" in title:
+                return placeholder
+        return ("Video", "#f0f0f0", "#333")
+
+    @staticmethod
+    def _status_text(info):
+        status = getattr(info, 'status', 'unknown')
+        text = "✅ Hoàn tất" if status == 'completed' else "❌ Lỗi" if status == 'error' else "⏸️ Đã dừng"
+        engine = getattr(info, 'engine', '')
+        if engine:
+            text += f" · {engine}"
+        return text
+
+    # === Painting ===
+
+    def paint(self, painter, option, index):
+        info = index.data(DownloadListModel.InfoRole)
+        if info is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        card = self._card_rect(option)
+        painter.setPen(QPen(QColor("#e0e0e0")))
+        painter.setBrush(QColor("#ffffff"))
+        painter.drawRoundedRect(card, 6, 6)
+
+        # Thumbnail
+        thumb_width, thumb_height = THUMBNAIL_SIZE
+        thumb_rect = QRect(card.left() + 5, card.top() + (card.height() - thumb_height) // 2,
+                           thumb_width, thumb_height)
+        pixmap = index.data(DownloadListModel.ThumbnailRole)
+        if pixmap is not None:
+            painter.drawPixmap(thumb_rect.left() + (thumb_width - pixmap.width()) // 2,
+                               thumb_rect.top() + (thumb_height - pixmap.height()) // 2, pixmap)
         else:
-            QMessageBox.warning(self, "Không tìm thấy file", "Không thể tìm thấy file đã tải.")
-    
-    def open_folder(self):
-        if self.output_file and os.path.exists(self.output_file):
-            folder_path = os.path.dirname(self.output_file)
-            if self.parent_window:
-                self.parent_window.open_folder(folder_path)
-            else:
-                try:
-                    if os.name == 'nt':  # Windows
-                        os.startfile(folder_path)
-                    elif os.name == 'posix':  # macOS, Linux
-                        subprocess.run(['xdg-open', folder_path])
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Không thể mở thư mục: {str(e)}")
+            label, background, foreground = self._placeholder(info)
+            painter.fillRect(thumb_rect, QColor(background))
+            font = QFont(option.font)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(QColor(foreground))
+            painter.drawText(thumb_rect, Qt.AlignCenter, label)
+
+        button_font = QFont(option.font)
+        buttons = self._buttons(card, index, button_font)
+        left = thumb_rect.right() + 10
+        right = (buttons[0][1].left() if buttons else card.right()) - 10
+
+        # Tiêu đề
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(QColor("#333"))
+        title_rect = QRect(left, card.top() + 14, right - left, QFontMetrics(title_font).height())
+        title = QFontMetrics(title_font).elidedText(getattr(info, 'title', 'Unknown'), Qt.ElideRight,
+                                                    title_rect.width())
+        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, title)
+
+        # Tiến trình hoặc trạng thái
+        status_rect = QRect(left, title_rect.bottom() + 8, right - left, 18)
+        if info.status in ('downloading', 'processing'):
+            progress = QStyleOptionProgressBar()
+            progress.rect = status_rect
+            progress.minimum = 0
+            progress.maximum = 100
+            progress.progress = int(info.progress or 0)
+            progress.text = f"{progress.progress}%"
+            progress.textVisible = True
+            progress.textAlignment = Qt.AlignCenter
+            style = option.widget.style() if option.widget else QApplication.style()
+            style.drawControl(QStyle.CE_ProgressBar, progress, painter, option.widget)
         else:
-            QMessageBox.warning(self, "Không tìm thấy thư mục", "Không thể tìm thấy thư mục chứa file.")
-    
-    def remove_download(self):
-        """Robust download removal that works with any widget structure"""
-        try:
-            # First remove from the download manager
-            download_manager = DownloadManager.get_instance()
-            download_manager.remove_download(self.download_id)
-            
-            # Method 1: Try to find and remove this widget directly from the list
-            if self.list_widget is not None:
-                # Use isinstance to explicitly check if it's a QListWidget
-                if isinstance(self.list_widget, QListWidget):
-                    for i in range(self.list_widget.count()):
-                        item = self.list_widget.item(i)
-                        if self.list_widget.itemWidget(item) == self:
-                            self.list_widget.takeItem(i)
-                            print(f"Successfully removed item at index {i} from list")
-                            return True
-                else:
-                    print(f"Warning: list_widget is not a QListWidget: {type(self.list_widget)}")
-            
-            # Method 2: If we couldn't remove the item directly, fall back to refreshing the whole list
-            print("Falling back to refreshing the parent window's list")
-            if self.parent_window and hasattr(self.parent_window, 'refresh_download_list'):
-                self.parent_window.refresh_download_list()
-                return True
+            painter.setFont(option.font)
+            painter.setPen(QColor("#666"))
+            painter.drawText(status_rect, Qt.AlignLeft | Qt.AlignVCenter, self._status_text(info))
+
+        # Nút
+        painter.setFont(button_font)
+        for action, rect, enabled in buttons:
+            text, color, hover_color = self.BUTTONS[action]
+            if not enabled:
+                background, foreground = "#cccccc", "#666666"
             else:
-                print("Warning: Cannot refresh parent window list")
-                
-            return True
-            
-        except Exception as e:
-            print(f"Error removing download item: {str(e)}")
-            
-            # Last resort: force a refresh of the parent window's list
-            try:
-                if self.parent_window and hasattr(self.parent_window, 'refresh_download_list'):
-                    print("Using timer to refresh the list after error")
-                    QTimer.singleShot(100, self.parent_window.refresh_download_list)
-            except Exception as e2:
-                print(f"Final fallback also failed: {str(e2)}")
-                
+                background = hover_color if self._hover == (info.id, action) else color
+                foreground = "white"
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(background))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(QColor(foreground))
+            painter.drawText(rect, Qt.AlignCenter, text)
+
+        painter.restore()
+
+    # === Mouse ===
+
+    def _button_at(self, option, index, pos):
+        for action, rect, enabled in self._buttons(self._card_rect(option), index, QFont(option.font)):
+            if enabled and rect.contains(pos):
+                return action
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        event_type = event.type()
+        if event_type not in (QEvent.MouseMove, QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
             return False
+        action = self._button_at(option, index, event.pos())
+        download_id = index.data(DownloadListModel.IdRole)
+
+        if event_type == QEvent.MouseMove:
+            hover = (download_id, action) if action else None
+            if hover != self._hover:
+                self._hover = hover
+                if option.widget is not None:
+                    option.widget.setCursor(Qt.PointingHandCursor if action else Qt.ArrowCursor)
+                    option.widget.viewport().update(option.rect)
+            return False
+
+        if action is None or event.button() != Qt.LeftButton:
+            return False
+        if event_type == QEvent.MouseButtonRelease:
+            self.action_requested.emit(action, download_id)
+        return True
+
+    def clear_hover(self):
+        self._hover = None
 
 
 class DownloadManagerWindow(QMainWindow):
@@ -245,11 +409,6 @@ class DownloadManagerWindow(QMainWindow):
         self.download_manager = DownloadManager.get_instance()
         self.parent_menu = parent
         self.initUI()
-        
-        # Update timer
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_download_list)
-        self.update_timer.start(1000)  # Update every second
     
     def initUI(self):
         central_widget = QWidget()
@@ -353,25 +512,30 @@ class DownloadManagerWindow(QMainWindow):
         
         layout.addLayout(filter_layout)
         
-        # Download list
-        self.download_list = QListWidget()
+        # Download list: model theo DownloadManager, proxy lọc/sắp xếp, delegate vẽ từng dòng
+        self.download_model = DownloadListModel(self.download_manager, self)
+        self.proxy_model = DownloadFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.download_model)
+        self.proxy_model.sort(0, Qt.DescendingOrder)  # Newest first
+        self.item_delegate = DownloadItemDelegate(self)
+        self.item_delegate.action_requested.connect(self.handle_item_action)
+        
+        self.download_list = QListView()
+        self.download_list.setModel(self.proxy_model)
+        self.download_list.setItemDelegate(self.item_delegate)
+        self.download_list.setUniformItemSizes(True)  # Chỉ các dòng đang hiển thị được đo và vẽ
+        self.download_list.setMouseTracking(True)
         self.download_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #f9f9f9;
                 border: 1px solid #e0e0e0;
                 border-radius: 6px;
                 padding: 5px;
             }
-            QListWidget::item {
-                background-color: white;
-                margin: 5px;
-                border-radius: 6px;
-                border: 1px solid #e0e0e0;
-            }
         """)
         self.download_list.setMinimumHeight(500)  # Lots of space for downloads
-        self.download_list.setSelectionMode(QListWidget.NoSelection)
-        self.download_list.setVerticalScrollMode(QListWidget.ScrollPerPixel)
+        self.download_list.setSelectionMode(QListView.NoSelection)
+        self.download_list.setVerticalScrollMode(QListView.ScrollPerPixel)
         
         layout.addWidget(self.download_list)
         
@@ -398,7 +562,10 @@ class DownloadManagerWindow(QMainWindow):
         layout.addWidget(back_button)
         
         self.current_filter = "all"
-        self.update_download_list()
+        for signal in (self.proxy_model.rowsInserted, self.proxy_model.rowsRemoved,
+                       self.proxy_model.modelReset, self.proxy_model.layoutChanged):
+            signal.connect(self.update_empty_state)
+        self.update_empty_state()
     
     def set_filter(self, filter_type):
         # Update button states
@@ -410,86 +577,42 @@ class DownloadManagerWindow(QMainWindow):
         # Save the filter
         self.current_filter = filter_type
         
-        # Refresh the list
-        self.update_download_list()
+        # Lọc lại qua proxy, không dựng lại các dòng
+        self.proxy_model.set_filter(filter_type)
+        self.update_empty_state()
     
     def update_download_list(self):
         """Update the download list with current downloads"""
         self.refresh_download_list()
     
     def refresh_download_list(self):
-        """Refresh the download list with improved error handling"""
-        try:
-            # Clear the list
-            self.download_list.clear()
-            
-            # Get all downloads
-            downloads = self.download_manager.get_all_downloads()
-            if not downloads:
-                self.no_downloads_label.show()
-                return
-            
-            # Filter downloads based on current filter with safer checks
-            filtered_downloads = []
-            
-            if self.current_filter == "all":
-                filtered_downloads = downloads
-            else:
-                for d in downloads:
-                    if not hasattr(d, 'status'):
-                        continue
-                        
-                    if self.current_filter == "completed" and d.status == 'completed':
-                        filtered_downloads.append(d)
-                    elif self.current_filter == "in_progress" and d.status in ['downloading', 'processing', 'paused', 'running']:
-                        filtered_downloads.append(d)
-                    elif self.current_filter == "error" and d.status == 'error':
-                        filtered_downloads.append(d)
-            
-            # Sort downloads by timestamp (newest first) with safer approach
-            try:
-                filtered_downloads.sort(
-                    key=lambda d: getattr(d, 'timestamp', 0) if hasattr(d, 'timestamp') else 0,
-                    reverse=True
-                )
-            except Exception as e:
-                print(f"Error sorting downloads: {str(e)}")
-            
-            # Show "no downloads" message if needed
-            if not filtered_downloads:
-                self.no_downloads_label.show()
-                return
+        """Reload every row from the download manager (manual refresh)"""
+        self.download_model.reload()
+        self.update_empty_state()
+    
+    def update_empty_state(self, *args):
+        self.no_downloads_label.setVisible(self.proxy_model.rowCount() == 0)
+    
+    def handle_item_action(self, action, download_id):
+        """Buttons painted by DownloadItemDelegate"""
+        download = self.download_manager.get_download(download_id)
+        if download is None:
+            return
+        output_file = getattr(download, 'output_file', None)
+        if action in ('play', 'folder'):
+            if not (output_file and os.path.exists(output_file)):
+                QMessageBox.warning(self, "Không tìm thấy file", "Không thể tìm thấy file đã tải.")
+            elif action == 'play':
+                self.open_file(output_file)
             else:
-                self.no_downloads_label.hide()
-            
-            # Add each download as a custom widget with improved error handling
-            for download in filtered_downloads:
-                try:
-                    if not hasattr(download, 'id') or not download.id:
-                        continue
-                        
-                    item = QListWidgetItem(self.download_list)
-                    
-                    # Create custom widget for the item with safer attribute access and proper references
-                    widget = DownloadItemWidget(
-                        download.id,
-                        getattr(download, 'title', 'Unknown'),
-                        getattr(download, 'status', 'unknown'),
-                        getattr(download, 'thumbnail_path', None),
-                        getattr(download, 'progress', 0),
-                        getattr(download, 'output_file', None),
-                        self.download_list,  # Pass reference to the list widget
-                        self  # Pass reference to parent window
-                    )
-                    
-                    item.setSizeHint(widget.sizeHint())
-                    self.download_list.addItem(item)
-                    self.download_list.setItemWidget(item, widget)
-                except Exception as e:
-                    print(f"Error adding download item to list: {str(e)}")
-        except Exception as e:
-            print(f"Error refreshing download list: {str(e)}")
-            self.no_downloads_label.show()
+                self.open_folder(os.path.dirname(output_file))
+        elif action == 'resume':
+            if not self.download_manager.resume_download(download_id):
+                QMessageBox.warning(self, "Lỗi", "Không thể tiếp tục download này")
+        elif action == 'remove':
+            # Dòng được xóa qua tín hiệu download_removed của DownloadManager
+            self.item_delegate.clear_hover()
+            self.download_manager.remove_download(download_id)
     
     def clear_all_downloads(self):
         """Clear all downloads from the list"""
@@ -502,24 +625,9 @@ class DownloadManagerWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # Get current filtered downloads
-            downloads = self.download_manager.get_all_downloads()
-            
-            if self.current_filter != "all":
-                if self.current_filter == "completed":
-                    downloads = [d for d in downloads if hasattr(d, 'status') and d.status == 'completed']
-                elif self.current_filter == "in_progress":
-                    downloads = [d for d in downloads if hasattr(d, 'status') and d.status in ['downloading', 'processing', 'paused']]
-                elif self.current_filter == "error":
-                    downloads = [d for d in downloads if hasattr(d, 'status') and d.status == 'error']
-            
-            # Remove each download
-            for download in downloads:
-                if hasattr(download, 'id'):
-                    self.download_manager.remove_download(download.id)
-            
-            # Refresh the list
-            self.refresh_download_list()
+            # Các mục đang hiển thị theo bộ lọc hiện tại, lưu file một lần
+            self.item_delegate.clear_hover()
+            self.download_manager.remove_downloads(self.proxy_model.download_ids())
     
     def open_file(self, file_path):
         """Open the file with default application"""
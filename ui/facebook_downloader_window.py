@@ -1,25 +1,34 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QProgressBar, QStatusBar, QComboBox,
-                             QMessageBox, QGroupBox, QFrame)
+                             QMessageBox, QGroupBox, QFrame, QCheckBox)
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 import os
 import time
 import urllib.parse
-import requests
-import sys
 import subprocess
-import re
-import json
 from io import BytesIO
 from utils.helpers import clean_filename, format_size, format_time
 from utils import compat  # Import the compatibility module
 import yt_dlp
 from utils.download_manager import DownloadManager  # Thêm import DownloadManager
 from utils.config_manager import ConfigManager  # Add this import
+from utils.ytdlp_cache import with_cache_dir
+from utils.ytdlp_pool import YoutubeDLPool
+from utils.fragment_tuner import FragmentTuner
+from utils.download_backends import choose_plan, download_direct
+from utils.task_pool import PooledTask, LatestOnly
+from utils.cancellation import CancellationToken, DownloadCancelled
+from utils.http_cache import cached_get
+from utils.http_session import prewarm, FACEBOOK_HOSTS
+from utils.metadata_prefetcher import MetadataPrefetcher
+from utils.page_scanner import FACEBOOK_PAGE_SCANNER, scan_facebook_id
+from utils.link_resolver import ShortLinkResolver, is_short_link
+from utils.thumbnail_service import ThumbnailService
+from utils.thumbnail_store import store_remote_thumbnail
 
 
-class FacebookInfoThread(QThread):
+class FacebookInfoThread(PooledTask):
     info_ready = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
@@ -27,7 +36,6 @@ class FacebookInfoThread(QThread):
     def __init__(self, url):
         super().__init__()
         self.url = url
-        self.should_stop = False
 
     def run(self):
         try:
@@ -35,6 +43,11 @@ class FacebookInfoThread(QThread):
             
             self.progress.emit("Đang tải thông tin video từ Facebook...")
             
+            # Mở rộng link chia sẻ (fb.watch, facebook.com/share/...) một lần, có bộ nhớ đệm
+            if is_short_link(self.url):
+                self.progress.emit("Mở rộng URL rút gọn...")
+                self.url = ShortLinkResolver.get_instance().resolve(self.url)
+            
             # Enhanced options for Facebook extraction
             ydl_opts = {
                 'quiet': True,
@@ -47,7 +60,7 @@ class FacebookInfoThread(QThread):
             
             # Try standard extraction first
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with YoutubeDLPool.get_instance().checkout('facebook:info', ydl_opts) as ydl:
                     if self.should_stop:
                         return
                     
@@ -147,7 +160,7 @@ class FacebookInfoThread(QThread):
             for url in url_formats:
                 try:
                     self.progress.emit(f"Thử truy cập: {url}")
-                    response = requests.get(url, headers=headers, timeout=15)
+                    response = cached_get(url, headers=headers, timeout=15)
                     if response.status_code == 200:
                         self.progress.emit(f"Truy cập thành công: {url}")
                         break
@@ -163,125 +176,33 @@ class FacebookInfoThread(QThread):
             # Look for video data in the page content
             page_content = response.text
             
-            # Try multiple pattern matching approaches
-            video_url = None
+            # Precompiled scanners, each field stops at its first match
+            scanner = FACEBOOK_PAGE_SCANNER
+            index = scanner.index(page_content)
             
             # Method 1: Look for HD and SD sources
             self.progress.emit("Tìm kiếm HD/SD sources...")
-            hd_src_match = re.search(r'"hd_src":"(https:\\\/\\\/[^"]*)"', page_content)
-            sd_src_match = re.search(r'"sd_src":"(https:\\\/\\\/[^"]*)"', page_content)
-            
-            if hd_src_match:
-                video_url = hd_src_match.group(1).replace('\\/', '/')
+            video_url = scanner.scan_field(page_content, 'hd_url', index)
+            if video_url:
                 self.progress.emit("Tìm thấy HD source")
-            elif sd_src_match:
-                video_url = sd_src_match.group(1).replace('\\/', '/')
-                self.progress.emit("Tìm thấy SD source")
-            
-            # Method 2: Look for video data in JSON structures
-            if not video_url:
-                self.progress.emit("Tìm kiếm trong cấu trúc JSON...")
-                json_patterns = [
-                    r'videoData"?:\s*{(?:[^{}]|{[^{}]*})*?}',
-                    r'"videoData"?:\s*\[[^\]]*\]',
-                    r'"media"?:\s*{(?:[^{}]|{[^{}]*})*?}',
-                    r'"media"?:\s*\[[^\]]*\]',
-                    r'"attachments"?:\s*\[[^\]]*\]',
-                ]
-                
-                for pattern in json_patterns:
-                    json_matches = re.finditer(pattern, page_content)
-                    for match in json_matches:
-                        json_str = match.group(0)
-                        try:
-                            # Look for URLs within this JSON structure
-                            urls = re.findall(r'(https?://[^"\']+\.mp4[^"\']*)', json_str)
-                            if urls:
-                                video_url = urls[0].replace('\\/', '/')
-                                self.progress.emit(f"Tìm thấy URL video trong JSON: {video_url[:50]}...")
-                                break
-                        except:
-                            continue
-                    
-                    if video_url:
-                        break
-            
-            # Method 3: Search for video source tags in HTML
-            if not video_url:
-                self.progress.emit("Tìm kiếm thẻ video trong HTML...")
-                video_tags = re.findall(r'<video[^>]*>(.*?)</video>', page_content, re.DOTALL)
-                for tag in video_tags:
-                    source_match = re.search(r'src=["\'](https?://[^\'"]+)[\'"]', tag)
-                    if source_match:
-                        video_url = source_match.group(1)
-                        self.progress.emit(f"Tìm thấy URL video trong thẻ video: {video_url[:50]}...")
-                        break
+            else:
+                video_url = scanner.scan_field(page_content, 'sd_url', index)
+                if video_url:
+                    self.progress.emit("Tìm thấy SD source")
             
-            # Method 4: Generic URL pattern matching
+            # Method 2-4: JSON structures, video/source tags, generic URLs
             if not video_url:
-                self.progress.emit("Tìm kiếm URL MP4 bất kỳ...")
-                url_patterns = [
-                    r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)',
-                    r'(https?://video[\.\-][^"\'>\s]+)',
-                    r'(https?://[^"\'>\s]*fbcdn[^"\'>\s]*)',
-                    r'(https?://[^"\'>\s]*fbpx[^"\'>\s]*)'
-                ]
-                
-                for pattern in url_patterns:
-                    url_matches = re.findall(pattern, page_content)
-                    if url_matches:
-                        video_url = url_matches[0].replace('\\/', '/')
-                        self.progress.emit(f"Tìm thấy URL MP4: {video_url[:50]}...")
-                        break
+                self.progress.emit("Tìm kiếm trong JSON, thẻ video và URL MP4 bất kỳ...")
+                video_url = scanner.scan_field(page_content, 'video_url', index)
+                if video_url:
+                    self.progress.emit(f"Tìm thấy URL video: {video_url[:50]}...")
             
             # Try to find title and author
             self.progress.emit("Tìm kiếm thông tin tiêu đề và tác giả...")
-            title = "Facebook Video"
-            uploader = "Unknown"
-            thumbnail = None
-            
-            # Title
-            title_patterns = [
-                r'<meta property="og:title" content="([^"]+)"',
-                r'<title>(.*?)</title>',
-                r'"name":"([^"]+)"'
-            ]
-            
-            for pattern in title_patterns:
-                title_match = re.search(pattern, page_content)
-                if title_match:
-                    title = title_match.group(1).replace(" | Facebook", "")
-                    title = title.replace("Facebook Watch", "").strip()
-                    if title:
-                        break
-            
-            # Uploader
-            uploader_patterns = [
-                r'<meta property="og:site_name" content="([^"]+)"',
-                r'"ownerName":"([^"]+)"',
-                r'"publisher_name":"([^"]+)"',
-                r'"publisher":\{"name":"([^"]+)"'
-            ]
-            
-            for pattern in uploader_patterns:
-                uploader_match = re.search(pattern, page_content)
-                if uploader_match:
-                    uploader = uploader_match.group(1)
-                    break
-            
-            # Thumbnail
-            thumbnail_patterns = [
-                r'<meta property="og:image" content="([^"]+)"',
-                r'"thumbnailUrl":"(https:\\\/\\\/[^"]*)"',
-                r'"thumbnailImage":{"uri":"([^"]+)"',
-                r'"image":{"uri":"([^"]+)"'
-            ]
-            
-            for pattern in thumbnail_patterns:
-                thumbnail_match = re.search(pattern, page_content)
-                if thumbnail_match:
-                    thumbnail = thumbnail_match.group(1).replace('\\/', '/')
-                    break
+            fields = scanner.scan(page_content, ('title', 'uploader', 'thumbnail'), index)
+            title = fields['title'] or "Facebook Video"
+            uploader = fields['uploader'] or "Unknown"
+            thumbnail = fields['thumbnail']
             
             if not video_url:
                 self.error.emit("Không thể tìm URL video trong trang")
@@ -324,43 +245,8 @@ class FacebookInfoThread(QThread):
     
     def extract_facebook_id(self, url):
         """Extract Facebook video ID from URL"""
-        # Pattern 1: videos/12345678
-        pattern1 = r'\/videos\/(\d+)'
-        match = re.search(pattern1, url)
-        if match:
-            return match.group(1)
-            
-        # Pattern 2: v=12345678 or ?v=12345678
-        pattern2 = r'[?&]v=(\d+)'
-        match = re.search(pattern2, url)
-        if match:
-            return match.group(1)
-            
-        # Pattern 3: watch/?v=12345678
-        pattern3 = r'watch\/?\?v=(\d+)'
-        match = re.search(pattern3, url)
-        if match:
-            return match.group(1)
-            
-        # Pattern 4: Just a number in the URL (for URLs like the one in the error)
-        pattern4 = r'\/(\d{15,})'
-        match = re.search(pattern4, url)
-        if match:
-            return match.group(1)
-            
-        # Pattern 5: idorvanity parameter (like in the error URL)
-        pattern5 = r'[?&]idorvanity=(\d+)'
-        match = re.search(pattern5, url)
-        if match:
-            return match.group(1)
-            
-        # Pattern 6: Reel URLs
-        pattern6 = r'\/reel\/(\d+)'
-        match = re.search(pattern6, url)
-        if match:
-            return match.group(1)
-            
-        return None
+        # videos/123, ?v=123, watch/?v=123, bare long number, idorvanity=123, reel/123
+        return scan_facebook_id(url)
     
     def stop(self):
         self.should_stop = True
@@ -371,24 +257,40 @@ class FacebookDownloadThread(QThread):
     finished = pyqtSignal(str)  # file đầu ra
     error = pyqtSignal(str)  # thông báo lỗi
     
-    def __init__(self, url, format_id, output_path, direct_url=None):
+    def __init__(self, url, format_id, output_path, direct_url=None, download_id=None, target_file=None):
         super().__init__()
         self.url = url
         self.format_id = format_id
         self.output_path = output_path
         self.direct_url = direct_url  # URL trực tiếp (nếu có)
-        self.should_stop = False
+        self.cancel_token = CancellationToken()
         self.download_manager = DownloadManager.get_instance()
-        self.download_id = None
+        self.download_id = download_id  # Có sẵn khi tiếp tục một download đã tạm dừng
+        self.target_file = target_file  # File đích của lần tải trực tiếp trước (để tải tiếp)
+        self.fragment_session = None
+        self.download_plan = None
+    
+    @property
+    def should_stop(self):
+        return self.cancel_token.cancelled
         
     def run(self):
+        # FFmpeg/tiến trình con do yt-dlp mở trong thread này sẽ bị dừng khi hủy
+        self.cancel_token.bind()
         try:
             # Tạo ID tải xuống và thêm vào download manager
-            self.download_id = self.download_manager.add_download(
-                source='facebook',
-                title=self.url,  # Ban đầu chỉ có URL, cập nhật title sau
-                thumbnail_path=None
-            )
+            if self.download_id is None:
+                self.download_id = self.download_manager.add_download(
+                    source='facebook',
+                    title=self.url,  # Ban đầu chỉ có URL, cập nhật title sau
+                    thumbnail_path=None
+                )
+            else:
+                self.download_manager.update_download(self.download_id, status='running')
+            self.save_resume_info()
+            
+            # Engine tải chọn theo host và giao thức
+            self.download_plan = choose_plan(self.direct_url or self.url)
             
             # Nếu có direct_url, ưu tiên sử dụng
             if self.direct_url and self.format_id == 'best':
@@ -441,16 +343,26 @@ class FacebookDownloadThread(QThread):
                             print(f"Error parsing filename: {str(e)}")
                 
                 def warning(self, msg):
-                    pass
+                    # Phát hiện bị giới hạn (HTTP 429) hoặc lỗi fragment
+                    self.fragment_session.on_message(msg)
                 
                 def error(self, msg):
                     print(f"Error: {msg}")
+                    self.fragment_session.on_message(msg)
+            
+            # Số fragment tải song song (HLS/DASH) được tự điều chỉnh theo từng host
+            self.fragment_session = FragmentTuner.get_instance().start_session(self.url)
+            ydl_opts['concurrent_fragment_downloads'] = self.fragment_session.concurrency
             
             logger = MyLogger()
+            logger.fragment_session = self.fragment_session
             ydl_opts['logger'] = logger
+            self.download_plan.apply(ydl_opts)
+            self.cancel_token.apply_ydl_options(ydl_opts)
             
             # Tải xuống video
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with yt_dlp.YoutubeDL(with_cache_dir(ydl_opts)) as ydl:
+                self.fragment_session.attach(ydl)
                 if self.direct_url:
                     # Nếu có direct_url, thử lấy thông tin video từ URL gốc
                     # và tải xuống từ direct_url
@@ -472,23 +384,16 @@ class FacebookDownloadThread(QThread):
                     # Save thumbnail
                     if 'thumbnail' in info_dict:
                         try:
-                            thumbnail_url = info_dict['thumbnail']
-                            # Get the application's directory
-                            app_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-                            # Create thumbnails directory if it doesn't exist
-                            thumbnails_dir = os.path.join(app_dir, "thumbnails")
-                            os.makedirs(thumbnails_dir, exist_ok=True)
-                            
-                            thumbnail_path = os.path.join(thumbnails_dir, f"fb_{int(time.time())}_{clean_filename(info_dict['title'])}_thumbnail.jpg")
-                            
-                            response = requests.get(thumbnail_url)
-                            if response.status_code == 200:
-                                with open(thumbnail_path, 'wb') as f:
-                                    f.write(response.content)
+                            # Lưu sẵn ở kích thước hiển thị, ảnh trùng nội dung chỉ lưu một lần
+                            thumbnail_path = store_remote_thumbnail(info_dict['thumbnail'], self.download_id)
+                            if thumbnail_path:
                                 download_info.thumbnail_path = thumbnail_path
                         except Exception as e:
                             print(f"Không thể lưu thumbnail: {str(e)}")
             
+            self.fragment_session.finish(not self.should_stop)
+            self.download_manager.update_download(self.download_id, engine=self.download_plan.engine_label)
+            
             if not self.should_stop:
                 # Kiểm tra xem có tải xuống thành công không
                 if logger.downloaded_files:
@@ -529,6 +434,8 @@ class FacebookDownloadThread(QThread):
                         raise Exception("Không tìm thấy file đã tải xuống")
                         
         except Exception as e:
+            if self.fragment_session:
+                self.fragment_session.finish(False)
             if not self.should_stop:
                 error_message = str(e)
                 self.download_manager.update_download(
@@ -538,6 +445,15 @@ class FacebookDownloadThread(QThread):
                 )
                 self.error.emit(error_message)
     
+    def save_resume_info(self):
+        self.download_manager.update_download(self.download_id, resume_info={
+            'url': self.url,
+            'format_id': self.format_id,
+            'output_path': self.output_path,
+            'direct_url': self.direct_url,
+            'target_file': self.target_file,
+        })
+    
     def download_with_direct_url(self):
         """Tải xuống video từ direct URL nếu có"""
         try:
@@ -546,21 +462,26 @@ class FacebookDownloadThread(QThread):
                 
             self.progress.emit(10, "-- KB/s", "Đang chuẩn bị...", "--", "--")
             
-            # Tạo tên file từ URL hoặc timestamp
-            timestamp = int(time.time())
-            url_filename = clean_filename(os.path.basename(self.url))
-            if not url_filename or len(url_filename) < 5:
-                filename = f"facebook_video_{timestamp}.mp4"
+            if self.target_file:
+                # Tiếp tục vào cùng file của lần tải trước
+                output_path = self.target_file
             else:
-                filename = f"{url_filename}_{timestamp}.mp4"
-            
-            output_path = os.path.join(self.output_path, filename)
+                # Tạo tên file từ URL hoặc timestamp
+                timestamp = int(time.time())
+                url_filename = clean_filename(os.path.basename(self.url))
+                if not url_filename or len(url_filename) < 5:
+                    filename = f"facebook_video_{timestamp}.mp4"
+                else:
+                    filename = f"{url_filename}_{timestamp}.mp4"
+                
+                output_path = os.path.join(self.output_path, filename)
+                self.target_file = output_path
+                self.save_resume_info()
             
             # Modify headers to increase chances of getting video with audio
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
                 'Referer': 'https://www.facebook.com/',
-                'Range': 'bytes=0-',  # Request full content
                 'Accept': '*/*',
                 'Accept-Language': 'en-US,en;q=0.9',
                 'Connection': 'keep-alive',
@@ -568,98 +489,82 @@ class FacebookDownloadThread(QThread):
             
             self.progress.emit(15, "-- KB/s", "Khởi tạo kết nối...", "--", "--")
             
-            response = requests.get(self.direct_url, stream=True, headers=headers, verify=False)
+            start_time = time.time()
             
-            if response.status_code != 200:
-                raise Exception(f"Lỗi khi tải xuống: HTTP Status {response.status_code}")
+            def on_progress(downloaded, file_size):
+                # Tính toán phần trăm
+                if file_size > 0:
+                    percent = int((downloaded / file_size) * 100)
+                else:
+                    percent = 50  # Không thể xác định chính xác
                 
-            # Lấy kích thước file nếu có
-            file_size = int(response.headers.get('content-length', 0))
-            
-            if file_size == 0:
-                self.progress.emit(20, "-- KB/s", "Không thể xác định kích thước", "--", "--")
-            
-            # Format kích thước
-            if file_size < 1024 * 1024:
-                total_size_str = f"{file_size/1024:.1f} KB"
-            else:
-                total_size_str = f"{file_size/(1024*1024):.1f} MB"
-            
-            # Tải xuống và theo dõi tiến trình
-            start_time = time.time()
-            downloaded = 0
+                # Format kích thước
+                if file_size == 0:
+                    total_size_str = "--"
+                elif file_size < 1024 * 1024:
+                    total_size_str = f"{file_size/1024:.1f} KB"
+                else:
+                    total_size_str = f"{file_size/(1024*1024):.1f} MB"
+                
+                # Tính toán tốc độ
+                elapsed_time = time.time() - start_time
+                speed = downloaded / elapsed_time if elapsed_time > 0 else 0
+                if elapsed_time <= 0:
+                    speed_str = "-- KB/s"
+                elif speed < 1024:
+                    speed_str = f"{speed:.1f} B/s"
+                elif speed < 1024 * 1024:
+                    speed_str = f"{speed/1024:.1f} KB/s"
+                else:
+                    speed_str = f"{speed/(1024*1024):.1f} MB/s"
+                    
+                # Format kích thước đã tải
+                if downloaded < 1024 * 1024:
+                    downloaded_str = f"{downloaded/1024:.1f} KB"
+                else:
+                    downloaded_str = f"{downloaded/(1024*1024):.1f} MB"
+                
+                # Tính toán thời gian còn lại
+                if speed > 0 and file_size > 0:
+                    eta = (file_size - downloaded) / speed
+                    if eta < 60:
+                        eta_str = f"{int(eta)}s"
+                    elif eta < 3600:
+                        eta_str = f"{int(eta//60)}m {int(eta%60)}s"
+                    else:
+                        eta_str = f"{int(eta//3600)}h {int((eta%3600)//60)}m"
+                else:
+                    eta_str = "--"
+                    
+                # Cập nhật tiến trình
+                self.progress.emit(percent, speed_str, downloaded_str, eta_str, total_size_str)
+                
+                # Cập nhật vào download manager
+                self.download_manager.update_download(
+                    self.download_id,
+                    progress=percent,
+                    speed=speed_str,
+                    downloaded=downloaded_str,
+                    total_size=total_size_str,
+                    remaining_time=eta_str
+                )
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if self.should_stop:
-                        f.close()
-                        os.remove(output_path)
-                        self.download_manager.update_download(
-                            self.download_id,
-                            status='paused'
-                        )
-                        return
-                        
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        # Tính toán phần trăm
-                        if file_size > 0:
-                            percent = int((downloaded / file_size) * 100)
-                        else:
-                            percent = 50  # Không thể xác định chính xác
-                        
-                        # Tính toán tốc độ
-                        elapsed_time = time.time() - start_time
-                        if elapsed_time > 0:
-                            speed = downloaded / elapsed_time
-                            if speed < 1024:
-                                speed_str = f"{speed:.1f} B/s"
-                            elif speed < 1024 * 1024:
-                                speed_str = f"{speed/1024:.1f} KB/s"
-                            else:
-                                speed_str = f"{speed/(1024*1024):.1f} MB/s"
-                        else:
-                            speed_str = "-- KB/s"
-                            
-                        # Format kích thước đã tải
-                        if downloaded < 1024 * 1024:
-                            downloaded_str = f"{downloaded/1024:.1f} KB"
-                        else:
-                            downloaded_str = f"{downloaded/(1024*1024):.1f} MB"
-                        
-                        # Tính toán thời gian còn lại
-                        if speed > 0 and file_size > 0:
-                            eta = (file_size - downloaded) / speed
-                            if eta < 60:
-                                eta_str = f"{int(eta)}s"
-                            elif eta < 3600:
-                                eta_str = f"{int(eta//60)}m {int(eta%60)}s"
-                            else:
-                                eta_str = f"{int(eta//3600)}h {int((eta%3600)//60)}m"
-                        else:
-                            eta_str = "--"
-                            
-                        # Cập nhật tiến trình
-                        self.progress.emit(percent, speed_str, downloaded_str, eta_str, total_size_str)
-                        
-                        # Cập nhật vào download manager
-                        self.download_manager.update_download(
-                            self.download_id,
-                            progress=percent,
-                            speed=speed_str,
-                            downloaded=downloaded_str,
-                            total_size=total_size_str,
-                            remaining_time=eta_str
-                        )
+            # Tải nhiều kết nối song song (Range) nếu server hỗ trợ; tạm dừng giữ lại phần đã tải
+            try:
+                download_direct(self.download_plan, self.direct_url, output_path, headers,
+                                progress_callback=on_progress,
+                                cancel_token=self.cancel_token,
+                                verify=False)
+            except DownloadCancelled:
+                return
             
             # Đã tải xuống thành công
             self.download_manager.update_download(
                 self.download_id,
                 status='completed',
                 progress=100,
-                output_file=output_path
+                output_file=output_path,
+                engine=self.download_plan.engine_label
             )
             
             self.finished.emit(output_path)
@@ -678,8 +583,11 @@ class FacebookDownloadThread(QThread):
                 self.error.emit(error_message)
     
     def progress_hook(self, d):
-        if self.should_stop:
-            raise Exception("Download cancelled")
+        self.cancel_token.raise_if_cancelled()
+        if self.fragment_session:
+            self.fragment_session.on_progress(d)
+        if self.download_plan:
+            self.download_plan.note_progress(d)
             
         if d['status'] == 'downloading':
             # Tính toán tiến trình
@@ -746,8 +654,8 @@ class FacebookDownloadThread(QThread):
             print(f"Error setting timestamp: {str(e)}")
     
     def stop(self, pause=True):
-        """Stop the download thread, optionally setting status to paused"""
-        self.should_stop = True
+        """Stop the download thread, optionally setting status to paused (partial data is kept)"""
+        self.cancel_token.cancel(pause=pause)
         # Only change status if specifically requesting to pause
         if pause:
             self.download_manager.update_download(
@@ -763,11 +671,18 @@ class FacebookDownloaderWindow(QMainWindow):
         self.setMinimumSize(900, 650)
         self.showMaximized()
         
+        # Mở sẵn kết nối tới Facebook/CDN trong lúc giao diện đang dựng
+        prewarm(FACEBOOK_HOSTS)
+        
+        # yt-dlp patches and FFmpeg lookup (no-op if the startup warm-up already ran it)
+        compat.ensure_initialized()
+        
         # Use ConfigManager for output path
         self.config_manager = ConfigManager.get_instance()
         self.output_path = self.config_manager.get_download_dir()
         
         self.info_thread = None
+        self.info_requests = LatestOnly()  # bỏ kết quả của các lần lấy thông tin đã bị thay thế
         self.download_thread = None
         self.returning_to_hub = False  # Add flag to track return to hub action
         self.initUI()
@@ -966,6 +881,14 @@ class FacebookDownloaderWindow(QMainWindow):
         link_layout.addWidget(fetch_button)
         input_layout.addLayout(link_layout)
         
+        # Tự động lấy trước thông tin khi sao chép/dán link (mặc định tắt)
+        self.prefetcher = MetadataPrefetcher.get_instance()
+        self.prefetch_checkbox = QCheckBox("Tự động lấy trước thông tin khi sao chép link")
+        self.prefetch_checkbox.setChecked(self.prefetcher.enabled)
+        self.prefetch_checkbox.toggled.connect(self.prefetcher.set_enabled)
+        self.link_input.textChanged.connect(self.prefetcher.hint)
+        input_layout.addWidget(self.prefetch_checkbox)
+        
         # Helper text
         helper_label = QLabel("Ví dụ: https://www.facebook.com/username/videos/123456789")
         helper_label.setStyleSheet("color: #777777; font-size: 14px; font-style: italic;")
@@ -1370,12 +1293,20 @@ class FacebookDownloaderWindow(QMainWindow):
             QMessageBox.warning(self, "URL không hợp lệ", "Link không phải là Facebook. Vui lòng kiểm tra lại.")
             return
         
-        # Hủy thread trước đó nếu đang chạy
+        # Hủy lần lấy thông tin trước: không chờ, kết quả trễ của nó bị bỏ qua
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait(1000)
+        self.info_requests.next()
+        
+        # Thông tin đã được lấy trước thì hiển thị ngay
+        prefetched_info = self.prefetcher.get(url)
+        if prefetched_info:
+            self.update_video_info(prefetched_info)
+            self.status_bar.showMessage("Đã tải thông tin video")
+            return
         
         # Cập nhật UI để hiển thị đang tải
+        self.thumbnail_source = None
         self.thumbnail_label.setText("Đang tải thông tin...")
         self.title_label.setText("Tiêu đề: Đang tải...")
         self.publisher_label.setText("Tác giả: Đang tải...")
@@ -1385,11 +1316,17 @@ class FacebookDownloaderWindow(QMainWindow):
         self.format_combo.setPlaceholderText("Đang tải danh sách chất lượng...")
         self.download_button.setEnabled(False)
         
+        # Prefetch cho URL này đang chạy: nhận kết quả thay vì tải lại từ đầu
+        if self.prefetcher.wait_for(url, self, self.info_requests.guard(self.update_video_info),
+                                   self.info_requests.guard(self.handle_info_error)):
+            self.status_bar.showMessage("Đang tải thông tin video...")
+            return
+        
         # Tạo và khởi chạy thread lấy thông tin
         self.info_thread = FacebookInfoThread(url)
-        self.info_thread.info_ready.connect(self.update_video_info)
-        self.info_thread.error.connect(self.handle_info_error)
-        self.info_thread.progress.connect(self.update_fetch_progress)
+        self.info_thread.info_ready.connect(self.info_requests.guard(self.update_video_info))
+        self.info_thread.error.connect(self.info_requests.guard(self.handle_info_error))
+        self.info_thread.progress.connect(self.info_requests.guard(self.update_fetch_progress))
         self.info_thread.start()
         
         self.status_bar.showMessage("Đang tải thông tin video...")
@@ -1397,6 +1334,30 @@ class FacebookDownloaderWindow(QMainWindow):
     def update_fetch_progress(self, message):
         self.status_bar.showMessage(message)
 
+    def load_thumbnail(self, url, data=None):
+        """Show the thumbnail of url; fetched and scaled in the background by ThumbnailService"""
+        self.thumbnail_source = url
+        if not url:
+            return
+        size = (self.thumbnail_label.width(), self.thumbnail_label.height())
+        if data:
+            # Thumbnail đã có sẵn nếu thông tin đến từ prefetch
+            pixmap = QPixmap()
+            if pixmap.loadFromData(data):
+                self.thumbnail_label.setPixmap(pixmap.scaled(size[0], size[1], Qt.KeepAspectRatio,
+                                                             Qt.SmoothTransformation))
+                return
+
+        def show_thumbnail(pixmap):
+            if self.thumbnail_source != url:
+                return  # Người dùng đã chuyển sang video khác
+            if pixmap is None:
+                self.status_bar.showMessage("Không thể tải thumbnail")
+            else:
+                self.thumbnail_label.setPixmap(pixmap)
+
+        ThumbnailService.get_instance().request(url, size, show_thumbnail, owner=self)
+
     def update_video_info(self, info):
         # Giới hạn độ dài tiêu đề để tránh lỗi hiển thị
         title = info['title']
@@ -1424,21 +1385,8 @@ class FacebookDownloaderWindow(QMainWindow):
         else:
             self.direct_url = None
         
-        # Tải và hiển thị thumbnail
-        try:
-            if info['thumbnail_url']:
-                response = requests.get(info['thumbnail_url'])
-                if response.status_code == 200:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    self.thumbnail_label.setPixmap(pixmap.scaled(
-                        self.thumbnail_label.width(),
-                        self.thumbnail_label.height(),
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    ))
-        except Exception as e:
-            self.status_bar.showMessage(f"Không thể tải thumbnail: {str(e)}")
+        # Tải và hiển thị thumbnail (không chặn giao diện)
+        self.load_thumbnail(info['thumbnail_url'], info.get('thumbnail_data'))
         
         # Cập nhật combobox định dạng
         self.format_combo.clear()
@@ -1513,6 +1461,9 @@ class FacebookDownloaderWindow(QMainWindow):
         self.cancel_download_button.clicked.connect(self.cancel_download)
         self.centralWidget().layout().insertWidget(5, self.cancel_download_button)
         
+        # Dùng URL đầy đủ đã mở rộng (nếu có) để không phải mở rộng lại link rút gọn
+        url = ShortLinkResolver.get_instance().canonical_url(url)
+        
         # Tạo và khởi chạy thread tải xuống
         self.download_thread = FacebookDownloadThread(url, format_id, self.output_path, self.direct_url)
         self.download_thread.progress.connect(self.update_download_progress)
@@ -1527,7 +1478,6 @@ class FacebookDownloaderWindow(QMainWindow):
 
     def cancel_download(self):
         if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.should_stop = True
             self.download_thread.stop(pause=True)  # Explicitly pause when cancelling
             self.status_bar.showMessage("Đang hủy tải xuống...")
             
@@ -1616,7 +1566,7 @@ class FacebookDownloaderWindow(QMainWindow):
         # Only stop info thread, let download continue in background
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
         
         # Navigate back to main menu
         from ui.main_menu import MainMenu
@@ -1628,7 +1578,9 @@ class FacebookDownloaderWindow(QMainWindow):
         # Always stop info thread
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
+        
+        self.prefetcher.forget(self)
         
         # Only stop download thread if not returning to hub
         if not self.returning_to_hub:
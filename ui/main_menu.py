@@ -2,16 +2,18 @@ import os  # Ensure this is at the top of the file
 import sys
 import subprocess
 import time
+import heapq
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QWidget, QLabel, QGroupBox, QGridLayout, QSpacerItem,
                             QSizePolicy, QFrame, QGraphicsDropShadowEffect, QListWidget, QListWidgetItem, QSplitter, QProgressBar, QMessageBox, QTabWidget)
 from PyQt5.QtCore import Qt, QSize, QTimer
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QColor, QPalette
-from ui.project_manager_window import ProjectManagerWindow
-from ui.youtube_downloader_window import YouTubeDownloaderWindow
-from ui.tiktok_downloader_window import TikTokDownloaderWindow
-from ui.facebook_downloader_window import FacebookDownloaderWindow
 from utils.download_manager import DownloadManager
+from utils.thumbnail_service import ThumbnailService
+
+RECENT_DOWNLOADS = 2  # số mục hiển thị ở menu chính
+RECENT_STATUS_RANK = {'downloading': 0, 'processing': 0, 'completed': 1}
+RECENT_REFRESH_DELAY_MS = 250  # gộp các cập nhật tiến trình liên tiếp
 
 class RoundedFeatureCard(QFrame):
     """Enhanced feature card with rounded corners, shadow, and decorative elements"""
@@ -94,26 +96,9 @@ class DownloadItemWidget(QWidget):
         # Thumbnail (left side)
         self.thumbnail_label = QLabel()
         self.thumbnail_label.setFixedSize(120, 68)
-        self.thumbnail_label.setStyleSheet("border: 1px solid #ddd; background-color: #f0f0f0;")
         self.thumbnail_label.setAlignment(Qt.AlignCenter)
-        
-        if thumbnail_path and os.path.exists(thumbnail_path):
-            pixmap = QPixmap(thumbnail_path)
-            self.thumbnail_label.setPixmap(pixmap.scaled(120, 68, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            # Default icons based on source
-            if title.startswith("YouTube") or "youtube.com" in title.lower():
-                self.thumbnail_label.setText("YouTube")
-                self.thumbnail_label.setStyleSheet("background-color: #FF0000; color: white; font-weight: bold;")
-            elif title.startswith("TikTok") or "tiktok.com" in title.lower():
-                self.thumbnail_label.setText("TikTok")
-                self.thumbnail_label.setStyleSheet("background-color: #000000; color: white; font-weight: bold;")
-            elif title.startswith("Facebook") or "facebook.com" in title.lower():
-                self.thumbnail_label.setText("Facebook")
-                self.thumbnail_label.setStyleSheet("background-color: #1877F2; color: white; font-weight: bold;")
-            else:
-                self.thumbnail_label.setText("Video")
-                
+        self.thumbnail_path = None
+        self._placeholder_title = None
         layout.addWidget(self.thumbnail_label)
         
         # Info (middle)
@@ -123,33 +108,28 @@ class DownloadItemWidget(QWidget):
         info_layout.setSpacing(5)
         
         # Title with ellipsis for long names
-        title_text = title if len(title) <= 40 else title[:37] + "..."
-        title_label = QLabel(title_text)
-        title_label.setStyleSheet("font-weight: bold; color: #333;")
-        info_layout.addWidget(title_label)
-        
-        # Progress bar
-        if status == 'downloading' or status == 'processing':
-            progress_bar = QProgressBar()
-            progress_bar.setValue(progress if progress else 0)
-            progress_bar.setStyleSheet("""
-                QProgressBar {
-                    border: 1px solid #ddd;
-                    border-radius: 3px;
-                    text-align: center;
-                    height: 16px;
-                }
-                QProgressBar::chunk {
-                    background-color: #2196F3;
-                    border-radius: 2px;
-                }
-            """)
-            info_layout.addWidget(progress_bar)
-        else:
-            status_text = "✅ Hoàn tất" if status == 'completed' else "❌ Lỗi" if status == 'error' else "⬇️ Đang tải"
-            status_label = QLabel(status_text)
-            status_label.setStyleSheet("color: #666;")
-            info_layout.addWidget(status_label)
+        self.title_label = QLabel()
+        self.title_label.setStyleSheet("font-weight: bold; color: #333;")
+        info_layout.addWidget(self.title_label)
+        
+        # Progress bar / status (chỉ hiện một trong hai)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                border: 1px solid #ddd;
+                border-radius: 3px;
+                text-align: center;
+                height: 16px;
+            }
+            QProgressBar::chunk {
+                background-color: #2196F3;
+                border-radius: 2px;
+            }
+        """)
+        info_layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #666;")
+        info_layout.addWidget(self.status_label)
         
         layout.addWidget(info_widget, 1)
         
@@ -159,16 +139,12 @@ class DownloadItemWidget(QWidget):
         buttons_layout.setContentsMargins(0, 0, 0, 0)
         buttons_layout.setSpacing(5)
         
-        # Only enable buttons if download completed and file exists
-        can_open = status == 'completed' and output_file and os.path.exists(output_file)
-        
         # Play button
-        play_button = QPushButton("▶️ Phát")
-        play_button.setToolTip("Mở file đã tải")
-        play_button.setFixedHeight(30)
-        play_button.setCursor(Qt.PointingHandCursor)
-        play_button.setEnabled(can_open)
-        play_button.setStyleSheet("""
+        self.play_button = QPushButton("▶️ Phát")
+        self.play_button.setToolTip("Mở file đã tải")
+        self.play_button.setFixedHeight(30)
+        self.play_button.setCursor(Qt.PointingHandCursor)
+        self.play_button.setStyleSheet("""
             QPushButton {
                 background-color: #4CAF50;
                 color: white;
@@ -178,16 +154,15 @@ class DownloadItemWidget(QWidget):
             QPushButton:hover { background-color: #45a049; }
             QPushButton:disabled { background-color: #cccccc; color: #666666; }
         """)
-        play_button.clicked.connect(self.open_file)
-        buttons_layout.addWidget(play_button)
+        self.play_button.clicked.connect(self.open_file)
+        buttons_layout.addWidget(self.play_button)
         
         # Folder button
-        folder_button = QPushButton("📂 Thư mục")
-        folder_button.setToolTip("Mở thư mục chứa file")
-        folder_button.setFixedHeight(30)
-        folder_button.setCursor(Qt.PointingHandCursor)
-        folder_button.setEnabled(can_open)
-        folder_button.setStyleSheet("""
+        self.folder_button = QPushButton("📂 Thư mục")
+        self.folder_button.setToolTip("Mở thư mục chứa file")
+        self.folder_button.setFixedHeight(30)
+        self.folder_button.setCursor(Qt.PointingHandCursor)
+        self.folder_button.setStyleSheet("""
             QPushButton {
                 background-color: #2196F3;
                 color: white;
@@ -197,8 +172,8 @@ class DownloadItemWidget(QWidget):
             QPushButton:hover { background-color: #0b7dda; }
             QPushButton:disabled { background-color: #cccccc; color: #666666; }
         """)
-        folder_button.clicked.connect(self.open_folder)
-        buttons_layout.addWidget(folder_button)
+        self.folder_button.clicked.connect(self.open_folder)
+        buttons_layout.addWidget(self.folder_button)
         
         # Add Delete button
         delete_button = QPushButton("🗑️")
@@ -229,6 +204,68 @@ class DownloadItemWidget(QWidget):
         self.setMinimumHeight(80)
         self.setMaximumHeight(80)
         
+        self.set_state(title, status, thumbnail_path, progress, output_file)
+        
+    def set_download(self, download):
+        """Show another download (or new state of the same one) without rebuilding the widget"""
+        self.download_id = download.id
+        self.set_state(getattr(download, 'title', 'Unknown'),
+                       getattr(download, 'status', 'unknown'),
+                       getattr(download, 'thumbnail_path', None),
+                       getattr(download, 'progress', 0),
+                       getattr(download, 'output_file', None))
+    
+    def set_state(self, title, status, thumbnail_path, progress, output_file):
+        self.output_file = output_file
+        self.title_label.setText(title if len(title) <= 40 else title[:37] + "...")
+        
+        if status == 'downloading' or status == 'processing':
+            self.progress_bar.setValue(progress if progress else 0)
+            self.progress_bar.setVisible(True)
+            self.status_label.setVisible(False)
+        else:
+            self.status_label.setText("✅ Hoàn tất" if status == 'completed' else "❌ Lỗi" if status == 'error' else "⬇️ Đang tải")
+            self.status_label.setVisible(True)
+            self.progress_bar.setVisible(False)
+        
+        # Only enable buttons if download completed and file exists
+        can_open = bool(status == 'completed' and output_file and os.path.exists(output_file))
+        self.play_button.setEnabled(can_open)
+        self.folder_button.setEnabled(can_open)
+        
+        if thumbnail_path != self.thumbnail_path or title != self._placeholder_title:
+            self.thumbnail_path = thumbnail_path
+            self._placeholder_title = title
+            self.show_placeholder(title)
+            if thumbnail_path and os.path.exists(thumbnail_path):
+                # Giải mã và scale ở luồng nền, ảnh đã scale được giữ lại cho lần sau
+                ThumbnailService.get_instance().request(
+                    thumbnail_path, (120, 68),
+                    lambda pixmap, path=thumbnail_path: self.set_thumbnail(pixmap, path), owner=self)
+    
+    def show_placeholder(self, title):
+        # Default icons based on source
+        self.thumbnail_label.setPixmap(QPixmap())
+        if title.startswith("YouTube") or "youtube.com" in title.lower():
+            self.thumbnail_label.setText("YouTube")
+            self.thumbnail_label.setStyleSheet("background-color: #FF0000; color: white; font-weight: bold;")
+        elif title.startswith("TikTok") or "tiktok.com" in title.lower():
+            self.thumbnail_label.setText("TikTok")
+            self.thumbnail_label.setStyleSheet("background-color: #000000; color: white; font-weight: bold;")
+        elif title.startswith("Facebook") or "facebook.com" in title.lower():
+            self.thumbnail_label.setText("Facebook")
+            self.thumbnail_label.setStyleSheet("background-color: #1877F2; color: white; font-weight: bold;")
+        else:
+            self.thumbnail_label.setText("Video")
+            self.thumbnail_label.setStyleSheet("border: 1px solid #ddd; background-color: #f0f0f0;")
+    
+    def set_thumbnail(self, pixmap, path=None):
+        if pixmap is None or (path is not None and path != self.thumbnail_path):
+            return  # Widget đã chuyển sang download khác
+        self.thumbnail_label.setText("")
+        self.thumbnail_label.setStyleSheet("border: 1px solid #ddd; background-color: #f0f0f0;")
+        self.thumbnail_label.setPixmap(pixmap)
+
     def open_file(self):
         """Open the downloaded file with improved error handling"""
         if not self.output_file:
@@ -307,50 +344,12 @@ class DownloadItemWidget(QWidget):
             QMessageBox.warning(self, "Lỗi", f"Không thể mở thư mục: {str(e)}")
     
     def remove_download(self):
-        """Robust download removal that works with any widget structure"""
+        """Remove from the download manager; the recent panel follows its download_removed signal"""
         try:
-            # First remove from the download manager
-            download_manager = DownloadManager.get_instance()
-            download_manager.remove_download(self.download_id)
-            
-            # Method 1: Try to find and remove this widget directly from the list
-            parent_list = self.parent()
-            if isinstance(parent_list, QListWidget):
-                for i in range(parent_list.count()):
-                    item = parent_list.item(i)
-                    if parent_list.itemWidget(item) == self:
-                        parent_list.takeItem(i)
-                        print(f"Successfully removed item at index {i} from list")
-                        return True
-                
-            # Method 2: If we couldn't remove the item directly, try using our stored list_widget
-            if self.list_widget is not None and isinstance(self.list_widget, QListWidget):
-                for i in range(self.list_widget.count()):
-                    item = self.list_widget.item(i)
-                    if self.list_widget.itemWidget(item) == self:
-                        self.list_widget.takeItem(i)
-                        print(f"Successfully removed item at index {i} from stored list")
-                        return True
-            
-            # Method 3: Fall back to refreshing the parent window's list
-            if self.parent_menu and hasattr(self.parent_menu, 'update_download_status'):
-                print("Falling back to refreshing the download status")
-                self.parent_menu.update_download_status()
-                return True
-            
+            DownloadManager.get_instance().remove_download(self.download_id)
             return True
-            
         except Exception as e:
             print(f"Error removing download item: {str(e)}")
-            
-            # Last resort: force a refresh using timer
-            try:
-                if self.parent_menu and hasattr(self.parent_menu, 'update_download_status'):
-                    print("Using timer to refresh the list after error")
-                    QTimer.singleShot(100, self.parent_menu.update_download_status)
-            except Exception as e2:
-                print(f"Final fallback also failed: {str(e2)}")
-                
             return False
 
 class MainMenu(QMainWindow):
@@ -362,11 +361,22 @@ class MainMenu(QMainWindow):
         
         self.showMaximized()
         
+        self.download_manager = DownloadManager.get_instance()
+        
+        # Danh sách gần đây được cập nhật theo tín hiệu của DownloadManager,
+        # gộp các thay đổi liên tiếp và tạm dừng khi cửa sổ bị ẩn
+        self.recent_widgets = []  # [(QListWidgetItem, DownloadItemWidget)]
+        self.recent_dirty = True
         self.download_timer = QTimer(self)
+        self.download_timer.setSingleShot(True)
+        self.download_timer.setInterval(RECENT_REFRESH_DELAY_MS)
         self.download_timer.timeout.connect(self.update_download_status)
-        self.download_timer.start(1000)
-        
-        self.download_manager = DownloadManager.get_instance()
+        self.download_manager.download_added.connect(self.schedule_download_status)
+        self.download_manager.download_updated.connect(self.schedule_download_status)
+        self.download_manager.download_removed.connect(self.schedule_download_status)
+        self.download_manager.downloads_updated.connect(self.schedule_download_status)
+        self.download_manager.downloads_removed.connect(self.schedule_download_status)
+        self.update_download_status()
         self.download_thumbnails = {}
 
     def initUI(self):
@@ -773,88 +783,57 @@ class MainMenu(QMainWindow):
         color.setHslF(h, s, v, 1.0)
         return color.name()
 
+    def schedule_download_status(self, *args):
+        self.recent_dirty = True
+        if self.isVisible() and not self.download_timer.isActive():
+            self.download_timer.start()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if getattr(self, 'recent_dirty', False):
+            self.schedule_download_status()
+    
     def update_download_status(self):
-        """Update download status in the UI with improved error handling"""
+        """Show the RECENT_DOWNLOADS most relevant downloads, reusing the existing row widgets"""
+        if not self.isVisible():
+            return  # Cập nhật khi cửa sổ hiện lại (showEvent)
+        self.recent_dirty = False
         try:
-            # Clear current list
-            self.downloads_list.clear()
-            
-            # Get all downloads
-            downloads = self.download_manager.get_all_downloads()
-            
-            # Check if we have any downloads
-            if not downloads:
-                self.no_downloads_label.setVisible(True)
-                self.downloads_list.setVisible(False)
-                return
-            else:
-                self.no_downloads_label.setVisible(False)
-                self.downloads_list.setVisible(True)
+            # Active first, then completed, then others; newest first within each group
+            recent_downloads = heapq.nsmallest(
+                RECENT_DOWNLOADS,
+                (d for d in self.download_manager.downloads.values() if d and getattr(d, 'id', None)),
+                key=lambda d: (RECENT_STATUS_RANK.get(getattr(d, 'status', None), 2),
+                               -getattr(d, 'timestamp', 0))
+            )
             
-            # Sort downloads: active first, then completed, then others
-            # Also limit to 2 recent downloads for the main view (reduced from 5)
-            sorted_downloads = []
+            has_downloads = bool(recent_downloads)
+            self.no_downloads_label.setVisible(not has_downloads)
+            self.downloads_list.setVisible(has_downloads)
             
-            # Use safer filtering with isinstance and hasattr checks
-            active_downloads = []
-            completed_downloads = []
-            other_downloads = []
-            
-            for d in downloads:
-                if not hasattr(d, 'status'):
-                    other_downloads.append(d)
+            # Thêm/bớt dòng khi số mục thay đổi, các dòng còn lại được cập nhật tại chỗ
+            while len(self.recent_widgets) > len(recent_downloads):
+                item, widget = self.recent_widgets.pop()
+                self.downloads_list.takeItem(self.downloads_list.row(item))
+                widget.deleteLater()
+            for row, download in enumerate(recent_downloads):
+                if row < len(self.recent_widgets):
+                    self.recent_widgets[row][1].set_download(download)
                     continue
-                    
-                if d.status in ['downloading', 'processing']:
-                    active_downloads.append(d)
-                elif d.status == 'completed':
-                    completed_downloads.append(d)
-                else:
-                    other_downloads.append(d)
-            
-            # Sort each category by timestamp (newest first) with safer access
-            for download_list in [active_downloads, completed_downloads, other_downloads]:
-                try:
-                    download_list.sort(
-                        key=lambda d: getattr(d, 'timestamp', 0) if hasattr(d, 'timestamp') else 0, 
-                        reverse=True
-                    )
-                except Exception as e:
-                    print(f"Error sorting downloads: {str(e)}")
-            
-            # Combine the lists
-            sorted_downloads = active_downloads + completed_downloads + other_downloads
-            
-            # Show only 2 most recent downloads in the main view
-            recent_downloads = sorted_downloads[:2]
-            
-            # Add each download as a custom widget with improved error handling
-            for download in recent_downloads:
-                try:
-                    if not hasattr(download, 'id'):
-                        continue
-                        
-                    item = QListWidgetItem(self.downloads_list)
-                    
-                    # Create custom widget for the item
-                    widget = DownloadItemWidget(
-                        download.id,
-                        download.title,
-                        download.status,
-                        download.thumbnail_path if hasattr(download, 'thumbnail_path') else None,
-                        download.progress if hasattr(download, 'progress') else 0,
-                        download.output_file if hasattr(download, 'output_file') else None,
-                        self
-                    )
-                    
-                    # Add this line to set the list_widget reference
-                    widget.list_widget = self.downloads_list
-                    
-                    item.setSizeHint(widget.sizeHint())
-                    self.downloads_list.addItem(item)
-                    self.downloads_list.setItemWidget(item, widget)
-                except Exception as e:
-                    print(f"Error adding download item to list: {str(e)}")
+                item = QListWidgetItem(self.downloads_list)
+                widget = DownloadItemWidget(
+                    download.id,
+                    getattr(download, 'title', 'Unknown'),
+                    getattr(download, 'status', 'unknown'),
+                    getattr(download, 'thumbnail_path', None),
+                    getattr(download, 'progress', 0),
+                    getattr(download, 'output_file', None),
+                    self
+                )
+                widget.list_widget = self.downloads_list
+                item.setSizeHint(widget.sizeHint())
+                self.downloads_list.setItemWidget(item, widget)
+                self.recent_widgets.append((item, widget))
         except Exception as e:
             print(f"Error updating download status: {str(e)}")
     
@@ -885,21 +864,25 @@ class MainMenu(QMainWindow):
             QMessageBox.warning(self, "Lỗi", f"Không thể mở thư mục: {str(e)}")
 
     def open_project_manager(self):
+        from ui.project_manager_window import ProjectManagerWindow
         self.project_manager_window = ProjectManagerWindow()
         self.project_manager_window.show()
         self.close()
 
     def open_youtube_downloader(self):
+        from ui.youtube_downloader_window import YouTubeDownloaderWindow
         self.youtube_window = YouTubeDownloaderWindow()
         self.youtube_window.show()
         self.close()
 
     def open_tiktok_downloader(self):
+        from ui.tiktok_downloader_window import TikTokDownloaderWindow
         self.tiktok_window = TikTokDownloaderWindow()
         self.tiktok_window.show()
         self.close()
 
     def open_facebook_downloader(self):
+        from ui.facebook_downloader_window import FacebookDownloaderWindow
         self.facebook_window = FacebookDownloaderWindow()
         self.facebook_window.show()
         self.close()
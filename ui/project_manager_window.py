@@ -18,6 +18,36 @@ class DragDropFileList(QListWidget):
         self.setAcceptDrops(True)
         self.setIconSize(QSize(36, 36))
         self.setSelectionMode(QListWidget.ExtendedSelection)
+        self._items = {}  # file_path -> QListWidgetItem, giữ đồng bộ khi thêm/xóa
+    
+    def add_file_item(self, item):
+        self._items[item.data(Qt.UserRole)] = item
+        self.addItem(item)
+    
+    def clear_files(self):
+        self._items.clear()
+        self.clear()
+    
+    def item_for_path(self, file_path):
+        return self._items.get(file_path)
+    
+    def paths(self):
+        return self._items.keys()
+    
+    def rename_path(self, old_path, new_path):
+        """Cập nhật item của old_path tại chỗ"""
+        item = self._items.pop(old_path, None)
+        if item is not None:
+            item.setText(os.path.basename(new_path))
+            item.setData(Qt.UserRole, new_path)
+            self._items[new_path] = item
+        return item
+    
+    def remove_path(self, file_path):
+        item = self._items.pop(file_path, None)
+        if item is not None:
+            self.takeItem(self.row(item))
+        return item
     
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
@@ -49,6 +79,7 @@ class ProjectManagerWindow(QMainWindow):
         self.project_manager = ProjectManager()
         self.current_project = None
         self.current_folder = None
+        self.file_lists = {}  # folder_name -> DragDropFileList
         self.auto_refresh = True  # Enable auto-refresh by default
         self.auto_organize = True  # Enable auto-organize by default
         self.refresh_timer = None
@@ -798,10 +829,7 @@ class ProjectManagerWindow(QMainWindow):
                 if not file_list:
                     continue
                     
-                displayed_files = set()
-                for i in range(file_list.count()):
-                    item = file_list.item(i)
-                    displayed_files.add(os.path.basename(item.data(Qt.UserRole)))
+                displayed_files = set(os.path.basename(path) for path in file_list.paths())
                 
                 # If there's a difference, refresh this folder
                 if current_files != displayed_files:
@@ -907,6 +935,7 @@ class ProjectManagerWindow(QMainWindow):
             self.project_path_label.setText(f"Đường dẫn: {project_dir}")
             self.details_group.setVisible(True)
             self.folder_tabs.clear()
+            self.file_lists.clear()
             
             # Tự động sắp xếp file khi mở dự án
             self.organize_project_folder(silent=True)
@@ -927,7 +956,8 @@ class ProjectManagerWindow(QMainWindow):
                     filename = os.path.basename(file_path)
                     item = QListWidgetItem(filename)
                     item.setData(Qt.UserRole, file_path)
-                    file_list.addItem(item)
+                    file_list.add_file_item(item)
+                self.file_lists[folder_name] = file_list
                 tab_layout.addWidget(file_list)
                 self.folder_tabs.addTab(tab_widget, QIcon("resources/icons/folder.png"), folder_name.capitalize())
             self.current_folder = list(metadata["folders"].keys())[0] if metadata["folders"] else None
@@ -1075,13 +1105,15 @@ class ProjectManagerWindow(QMainWindow):
 
     def get_file_list_for_folder(self, folder_name):
         """Lấy widget danh sách file cho một thư mục"""
-        for i in range(self.folder_tabs.count()):
-            if self.folder_tabs.tabText(i).lower() == folder_name.capitalize().lower():
-                tab_widget = self.folder_tabs.widget(i)
-                for child in tab_widget.children():
-                    if isinstance(child, DragDropFileList) and child.folder_name == folder_name:
-                        return child
-        return None
+        return self.file_lists.get(folder_name)
+
+    def find_file_item(self, file_path):
+        """(file_list, item) đang hiển thị file_path, hoặc (None, None)"""
+        for file_list in self.file_lists.values():
+            item = file_list.item_for_path(file_path)
+            if item is not None:
+                return file_list, item
+        return None, None
 
     def show_project_context_menu(self, pos):
         """Hiển thị menu ngữ cảnh cho danh sách dự án"""
@@ -1154,7 +1186,7 @@ class ProjectManagerWindow(QMainWindow):
         if not self.current_project:
             return
             
-        file_list_widget.clear()
+        file_list_widget.clear_files()
         files = self.project_manager.get_folder_files(self.current_project, folder_name)
         
         for file_path in files:
@@ -1209,7 +1241,7 @@ class ProjectManagerWindow(QMainWindow):
             else:
                 item.setIcon(QIcon("resources/icons/file.png"))
                     
-            file_list_widget.addItem(item)
+            file_list_widget.add_file_item(item)
 
     def on_tab_changed(self, index):
         """Xử lý khi chuyển tab thư mục"""
@@ -1350,17 +1382,10 @@ class ProjectManagerWindow(QMainWindow):
             try:
                 new_path = self.project_manager.rename_file(file_path, new_name)
                 
-                # Tìm và cập nhật item trong list widget
-                for i in range(self.folder_tabs.count()):
-                    tab_widget = self.folder_tabs.widget(i)
-                    for child in tab_widget.children():
-                        if isinstance(child, QListWidget):
-                            for j in range(child.count()):
-                                item = child.item(j)
-                                if item and item.data(Qt.UserRole) == file_path:
-                                    item.setText(os.path.basename(new_path))
-                                    item.setData(Qt.UserRole, new_path)
-                                    break
+                # Cập nhật item trong list widget
+                file_list, _ = self.find_file_item(file_path)
+                if file_list is not None:
+                    file_list.rename_path(file_path, new_path)
                 
                 self.statusBar().showMessage(f"Đã đổi tên file thành '{new_name}'")
             except Exception as e:
@@ -1383,16 +1408,10 @@ class ProjectManagerWindow(QMainWindow):
             try:
                 self.project_manager.delete_file(file_path)
                 
-                # Tìm và xóa item trong list widget
-                for i in range(self.folder_tabs.count()):
-                    tab_widget = self.folder_tabs.widget(i)
-                    for child in tab_widget.children():
-                        if isinstance(child, QListWidget):
-                            for j in range(child.count()):
-                                item = child.item(j)
-                                if item and item.data(Qt.UserRole) == file_path:
-                                    child.takeItem(j)
-                                    break
+                # Xóa item trong list widget
+                file_list, _ = self.find_file_item(file_path)
+                if file_list is not None:
+                    file_list.remove_path(file_path)
                 
                 self.statusBar().showMessage(f"Đã xóa file '{os.path.basename(file_path)}'")
             except Exception as e:
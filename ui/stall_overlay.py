@@ -0,0 +1,55 @@
+from PyQt5.QtWidgets import QLabel, QApplication
+from PyQt5.QtCore import Qt, QTimer
+
+from utils.stall_watchdog import RECENT_WINDOW_SECONDS
+
+MARGIN = 12
+REFRESH_MS = 5000  # cập nhật số lần treo khi chúng ra khỏi cửa sổ "gần đây"
+
+
+class StallOverlay(QLabel):
+    """Small always-on-top badge with the stall count of the last few minutes"""
+
+    def __init__(self, watchdog):
+        super().__init__(None, Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.watchdog = watchdog
+        self.last_stall_ms = 0
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(33, 33, 33, 200);
+                color: white;
+                font-size: 11px;
+                padding: 4px 8px;
+                border-radius: 4px;
+            }
+        """)
+        watchdog.stall_detected.connect(self.on_stall)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.update_text)
+        self.refresh_timer.start()
+        self.update_text()
+
+    def on_stall(self, duration_ms, site):
+        self.last_stall_ms = duration_ms
+        self.setToolTip(site)
+        self.update_text()
+
+    def update_text(self):
+        count = self.watchdog.recent_count()
+        text = f"Treo UI: {count} lần / {RECENT_WINDOW_SECONDS // 60} phút"
+        if count and self.last_stall_ms:
+            text += f" (gần nhất {self.last_stall_ms / 1000:.1f}s)"
+        self.setText(text)
+        self.adjustSize()
+        self.move_to_corner()
+
+    def move_to_corner(self):
+        screen = QApplication.primaryScreen()
+        if screen is None:
+            return
+        area = screen.availableGeometry()
+        self.move(area.right() - self.width() - MARGIN, area.bottom() - self.height() - MARGIN)
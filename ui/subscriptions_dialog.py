@@ -0,0 +1,180 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QListWidget, QListWidgetItem, QCheckBox, QSpinBox, QMessageBox)
+from PyQt5.QtCore import Qt
+import time
+
+from utils.subscriptions import SubscriptionManager
+
+
+class SubscriptionsDialog(QDialog):
+    """Dialog quản lý các kênh/playlist đã theo dõi"""
+
+    def __init__(self, parent=None):
+        """Initialize subscriptions dialog"""
+        super().__init__(parent)
+        self.manager = SubscriptionManager.get_instance()
+        self.config = self.manager.config
+
+        self.setWindowTitle("Kênh và playlist đã theo dõi")
+        self.setMinimumSize(650, 420)
+
+        self.initUI()
+        self.refresh_list()
+
+        self.manager.subscriptions_changed.connect(self.refresh_list)
+        self.manager.subscription_synced.connect(self.on_subscription_synced)
+        self.manager.sync_error.connect(self.on_sync_error)
+        self.manager.sync_all_finished.connect(self.on_sync_all_finished)
+
+    def initUI(self):
+        """Initialize UI components"""
+        layout = QVBoxLayout(self)
+
+        hint_label = QLabel("Mỗi lần đồng bộ chỉ liệt kê video mới kể từ lần trước và đưa chúng vào hàng đợi tải xuống.")
+        hint_label.setWordWrap(True)
+        hint_label.setStyleSheet("color: #777777; font-style: italic;")
+        layout.addWidget(hint_label)
+
+        self.subscription_list = QListWidget()
+        self.subscription_list.setSelectionMode(QListWidget.ExtendedSelection)
+        layout.addWidget(self.subscription_list)
+
+        # Lịch đồng bộ
+        schedule_layout = QHBoxLayout()
+        self.auto_sync_checkbox = QCheckBox("Tự động đồng bộ mỗi")
+        self.auto_sync_checkbox.setChecked(self.config.subscriptions_auto_sync)
+        self.auto_sync_checkbox.toggled.connect(self.set_auto_sync)
+        schedule_layout.addWidget(self.auto_sync_checkbox)
+
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 24 * 7)
+        self.interval_spin.setSuffix(" giờ")
+        self.interval_spin.setValue(self.config.subscriptions_interval_hours)
+        self.interval_spin.valueChanged.connect(self.set_interval)
+        schedule_layout.addWidget(self.interval_spin)
+
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, 8)
+        self.parallel_spin.setPrefix("Song song: ")
+        self.parallel_spin.setValue(self.config.subscriptions_max_parallel)
+        self.parallel_spin.valueChanged.connect(self.set_max_parallel)
+        schedule_layout.addWidget(self.parallel_spin)
+        schedule_layout.addStretch(1)
+        layout.addLayout(schedule_layout)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.sync_all_button = QPushButton("Đồng bộ tất cả")
+        self.sync_all_button.clicked.connect(self.sync_all)
+        button_layout.addWidget(self.sync_all_button)
+
+        sync_selected_button = QPushButton("Đồng bộ mục đã chọn")
+        sync_selected_button.clicked.connect(self.sync_selected)
+        button_layout.addWidget(sync_selected_button)
+
+        self.stop_button = QPushButton("Dừng")
+        self.stop_button.clicked.connect(self.manager.stop_sync)
+        button_layout.addWidget(self.stop_button)
+
+        remove_button = QPushButton("Bỏ theo dõi")
+        remove_button.clicked.connect(self.remove_selected)
+        button_layout.addWidget(remove_button)
+
+        button_layout.addStretch()
+        close_button = QPushButton("Đóng")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def refresh_list(self):
+        """Hiển thị lại danh sách subscription và trạng thái đồng bộ"""
+        selected = set(self.selected_ids())
+        self.subscription_list.clear()
+        for subscription in self.manager.get_all_subscriptions():
+            if self.manager.is_syncing(subscription.id):
+                status = "đang đồng bộ..."
+            elif subscription.last_error:
+                status = f"lỗi: {subscription.last_error}"
+            elif subscription.last_sync:
+                synced = time.strftime("%d/%m/%Y %H:%M", time.localtime(subscription.last_sync))
+                status = f"đồng bộ lúc {synced}, {subscription.last_new_count} video mới"
+            else:
+                status = "chưa đồng bộ"
+            if subscription.last_upload_date:
+                date = subscription.last_upload_date
+                status += f", video mới nhất {date[6:8]}/{date[4:6]}/{date[:4]}"
+
+            item = QListWidgetItem(f"{subscription.title}\n{subscription.url} — {status}")
+            item.setData(Qt.UserRole, subscription.id)
+            self.subscription_list.addItem(item)
+            if subscription.id in selected:
+                item.setSelected(True)
+        self.stop_button.setEnabled(self.manager.is_syncing())
+
+    def selected_ids(self):
+        return [item.data(Qt.UserRole) for item in self.subscription_list.selectedItems()]
+
+    def sync_all(self):
+        count = self.manager.sync_all()
+        self.status_label.setText(f"Đang đồng bộ {count} kênh/playlist..." if count else "Không có gì để đồng bộ")
+        self.refresh_list()
+
+    def sync_selected(self):
+        ids = self.selected_ids()
+        if not ids:
+            QMessageBox.warning(self, "Lỗi", "Vui lòng chọn ít nhất một kênh/playlist")
+            return
+        count = self.manager.sync(ids)
+        self.status_label.setText(f"Đang đồng bộ {count} kênh/playlist...")
+        self.refresh_list()
+
+    def remove_selected(self):
+        ids = self.selected_ids()
+        if not ids:
+            return
+        reply = QMessageBox.question(self, "Xác nhận", f"Bỏ theo dõi {len(ids)} kênh/playlist?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            for subscription_id in ids:
+                self.manager.remove_subscription(subscription_id)
+
+    def set_auto_sync(self, checked):
+        self.config.subscriptions_auto_sync = checked
+        if checked:
+            self.manager.start_scheduler()
+
+    def set_interval(self, value):
+        self.config.subscriptions_interval_hours = value
+
+    def set_max_parallel(self, value):
+        self.config.subscriptions_max_parallel = value
+        self.manager.sync_queue.set_max_parallel(value)
+
+    def on_subscription_synced(self, subscription_id, new_count):
+        subscription = self.manager.get_subscription(subscription_id)
+        if subscription and new_count:
+            self.status_label.setText(f"{subscription.title}: {new_count} video mới đã được thêm vào hàng đợi")
+
+    def on_sync_error(self, subscription_id, error):
+        subscription = self.manager.get_subscription(subscription_id)
+        name = subscription.title if subscription else subscription_id
+        self.status_label.setText(f"Lỗi đồng bộ {name}: {error}")
+
+    def on_sync_all_finished(self, total_new):
+        self.status_label.setText(f"Đồng bộ xong: {total_new} video mới")
+        self.refresh_list()
+
+    def done(self, result):
+        # Dialog có thể được mở lại, tránh giữ kết nối tới dialog đã đóng
+        for signal, slot in [(self.manager.subscriptions_changed, self.refresh_list),
+                             (self.manager.subscription_synced, self.on_subscription_synced),
+                             (self.manager.sync_error, self.on_sync_error),
+                             (self.manager.sync_all_finished, self.on_sync_all_finished)]:
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+        super().done(result)
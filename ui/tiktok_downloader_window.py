@@ -1,25 +1,37 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QProgressBar, QStatusBar, QComboBox,
-                             QMessageBox, QGroupBox, QFrame)
+                             QMessageBox, QGroupBox, QFrame, QCheckBox)
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 import os
 import time
 import urllib.parse
-import requests
-import sys
 import subprocess
 import random  # Added for device_id generation
 import re
-import json
-from io import BytesIO
-from utils.helpers import clean_filename, format_size, format_time
+from utils.helpers import format_size, format_time
 from utils import compat  # Import the compatibility module
 import yt_dlp
 from utils.download_manager import DownloadManager  # Thêm import DownloadManager
 from utils.config_manager import ConfigManager  # Add this import
+from utils.ytdlp_cache import with_cache_dir
+from utils.ytdlp_pool import YoutubeDLPool
+from utils.fragment_tuner import FragmentTuner
+from utils.download_backends import choose_plan
+from utils.bandwidth import AUTO_FORMAT, BandwidthEstimator, choose_for_deadline, quality_labels
+from ui.auto_quality import AutoQualityLimits
+from utils.task_pool import PooledTask, LatestOnly
+from utils.cancellation import CancellationToken
+from utils.http_cache import cached_get
+from utils.http_session import get_session, prewarm, TIKTOK_HOSTS
+from utils.metadata_prefetcher import MetadataPrefetcher
+from utils.page_scanner import TIKTOK_EMBED_SCANNER, TIKTOK_MOBILE_SCANNER
+from utils.link_resolver import ShortLinkResolver, is_short_link
+from utils.format_table import FormatTable
+from utils.thumbnail_service import ThumbnailService
+from utils.thumbnail_store import store_remote_thumbnail
 
-class TikTokInfoThread(QThread):
+class TikTokInfoThread(PooledTask):
     info_ready = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
@@ -27,7 +39,6 @@ class TikTokInfoThread(QThread):
     def __init__(self, url):
         super().__init__()
         self.url = url
-        self.should_stop = False
 
     def run(self):
         try:
@@ -179,7 +190,8 @@ class TikTokInfoThread(QThread):
             try:
                 self.progress.emit(f"Thử phương pháp {idx+1}/{len(extraction_methods)}: {method['name']}...")
                 
-                with yt_dlp.YoutubeDL(method['options']) as ydl:
+                # Mỗi cấu hình giữ instance riêng trong pool (cookie, phiên HTTP được dùng lại)
+                with YoutubeDLPool.get_instance().checkout(f"tiktok:{method['name']}", method['options']) as ydl:
                     info_dict = ydl.extract_info(self.url, download=False)
                     
                     if info_dict:
@@ -223,7 +235,7 @@ class TikTokInfoThread(QThread):
                 'Origin': 'https://www.tiktok.com'
             }
             
-            response = requests.get(base_url, params=params, headers=headers)
+            response = get_session().get(base_url, params=params, headers=headers)
             
             if response.status_code != 200:
                 self.progress.emit(f"API response code: {response.status_code}")
@@ -301,7 +313,7 @@ class TikTokInfoThread(QThread):
                 'Cache-Control': 'no-cache'
             }
             
-            response = requests.get(embed_url, headers=headers, timeout=15)
+            response = cached_get(embed_url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 self.progress.emit(f"Embed page response code: {response.status_code}")
@@ -309,72 +321,12 @@ class TikTokInfoThread(QThread):
                 
             page_content = response.text
             
-            # Extract title
-            title = "TikTok Video"
-            title_match = re.search(r'property="og:title"\s+content="([^"]+)"', page_content)
-            if title_match:
-                title = title_match.group(1)
-            
-            # Extract author
-            author = "Unknown User"
-            author_match = re.search(r'property="og:author"\s+content="([^"]+)"', page_content)
-            if author_match:
-                author = author_match.group(1)
-            
-            # Extract thumbnail URL
-            thumbnail_url = ""
-            thumbnail_match = re.search(r'property="og:image"\s+content="([^"]+)"', page_content)
-            if thumbnail_match:
-                thumbnail_url = thumbnail_match.group(1)
-            
-            # Extract video URL - this is the most important part
-            video_url = None
-            
-            # Find all script tags with videoObject
-            video_json_match = re.search(r'<script[^>]*type="application/json"[^>]*>([^<]+)</script>', page_content)
-            if video_json_match:
-                try:
-                    json_data = json.loads(video_json_match.group(1))
-                    
-                    # Search for contentUrl in the JSON data
-                    if isinstance(json_data, dict) and 'props' in json_data:
-                        props = json_data['props']
-                        
-                        # Check initialProps.videoData or similar paths
-                        if 'initialProps' in props:
-                            initial = props['initialProps']
-                            if 'videoData' in initial and 'contentUrl' in initial['videoData']:
-                                video_url = initial['videoData']['contentUrl']
-                            elif 'videoData' in initial and 'playAddr' in initial['videoData']:
-                                video_url = initial['videoData']['playAddr']
-                except Exception as json_err:
-                    self.progress.emit(f"Error parsing embedded JSON: {str(json_err)}")
-            
-            # If we still don't have a video URL, look for it in the HTML
-            if not video_url:
-                video_url_match = re.search(r'<video[^>]*src="([^"]+)"', page_content)
-                if video_url_match:
-                    video_url = video_url_match.group(1)
-            
-            # If we still don't have a video URL, try another method
-            if not video_url:
-                video_url_match = re.search(r'\"playAddr\":\"(https:\\\/\\\/[^\"]+)\"', page_content)
-                if video_url_match:
-                    video_url = video_url_match.group(1).replace('\\/', '/')
-            
-            # If we STILL don't have a video URL, look for any URL to a video file
-            if not video_url:
-                video_patterns = [
-                    r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)',
-                    r'(https?://[^"\'>\s]+/play/[^"\'>\s]*)',
-                    r'(https?://[^"\'>\s]+\.tiktokcdn\.com[^"\'>\s]*)'
-                ]
-                
-                for pattern in video_patterns:
-                    matches = re.findall(pattern, page_content)
-                    if matches:
-                        video_url = matches[0]
-                        break
+            # Collect title, author, thumbnail and video URL with the precompiled scanner
+            fields = TIKTOK_EMBED_SCANNER.scan(page_content)
+            title = fields['title'] or "TikTok Video"
+            author = fields['author'] or "Unknown User"
+            thumbnail_url = fields['thumbnail'] or ""
+            video_url = fields['video_url']
             
             # If we found a video URL, create video info
             if video_url:
@@ -423,7 +375,7 @@ class TikTokInfoThread(QThread):
                 'Accept-Language': 'en-US,en;q=0.9'
             }
             
-            response = requests.get(mobile_url, headers=headers, timeout=15, allow_redirects=True)
+            response = cached_get(mobile_url, headers=headers, timeout=15, allow_redirects=True)
             
             if response.status_code != 200:
                 self.progress.emit(f"Mobile page response code: {response.status_code}")
@@ -431,52 +383,12 @@ class TikTokInfoThread(QThread):
                 
             page_content = response.text
             
-            # Try to find video meta info in the page (similar approach to embed page)
-            title = "TikTok Video"
-            author = "Unknown User"
-            thumbnail_url = ""
-            video_url = None
-            
-            # Extract title
-            title_match = re.search(r'<meta\s+property="og:title"\s+content="([^"]+)"', page_content)
-            if title_match:
-                title = title_match.group(1)
-            
-            # Extract author
-            author_match = re.search(r'<meta\s+name="author"\s+content="([^"]+)"', page_content)
-            if author_match:
-                author = author_match.group(1)
-            
-            # Extract thumbnail URL
-            thumbnail_match = re.search(r'<meta\s+property="og:image"\s+content="([^"]+)"', page_content)
-            if thumbnail_match:
-                thumbnail_url = thumbnail_match.group(1)
-            
-            # Look for video URL in various formats
-            # 1. Look for video tag
-            video_url_match = re.search(r'<video[^>]*src="([^"]+)"', page_content)
-            if video_url_match:
-                video_url = video_url_match.group(1)
-            
-            # 2. Look for data structures
-            if not video_url:
-                data_matches = re.findall(r'"playAddr":"([^"]+)"', page_content)
-                for match in data_matches:
-                    video_url = match.replace('\\u002F', '/').replace('\/', '/')
-                    break
-            
-            # 3. Look for downloadAddr
-            if not video_url:
-                download_matches = re.findall(r'"downloadAddr":"([^"]+)"', page_content)
-                for match in download_matches:
-                    video_url = match.replace('\\u002F', '/').replace('\/', '/')
-                    break
-            
-            # 4. Generic MP4 search
-            if not video_url:
-                mp4_matches = re.findall(r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', page_content)
-                if mp4_matches:
-                    video_url = mp4_matches[0]
+            # Same fields as the embed page, with mobile-specific video URL patterns
+            fields = TIKTOK_MOBILE_SCANNER.scan(page_content)
+            title = fields['title'] or "TikTok Video"
+            author = fields['author'] or "Unknown User"
+            thumbnail_url = fields['thumbnail'] or ""
+            video_url = fields['video_url']
             
             # If we found a video URL, create video info
             if video_url:
@@ -532,40 +444,32 @@ class TikTokInfoThread(QThread):
             'is_audio': True
         })
         
-        # Add specific quality formats if available
-        if 'formats' in info_dict:
-            video_formats = {}
-            for f in info_dict.get('formats', []):
-                if f.get('vcodec') != 'none' and f.get('height'):
-                    height = f.get('height')
-                    has_audio = f.get('acodec') != 'none'
-                    
-                    if height not in video_formats or has_audio:
-                        video_formats[height] = f
-            
-            # Add specific resolution formats
-            for height in sorted(video_formats.keys()):
-                f = video_formats[height]
-                format_id = f['format_id']
-                formats.append({
-                    'format_id': format_id,
-                    'ext': 'mp4',
-                    'display_name': f"{height}p",
-                    'is_audio': False
-                })
+        # Add specific quality formats if available (one per height, preferring
+        # formats that need no transcoding, with codec and estimated size)
+        format_table = FormatTable(info_dict)
+        best_choice = format_table.best('mp4')
+        if best_choice:
+            formats[0]['display_name'] = best_choice.display_name('Video chất lượng cao nhất')
+            formats[0]['estimated_size'] = best_choice.estimated_size
+        
+        for choice in format_table.choices('mp4'):
+            formats.append(choice.to_format_dict())
         
         return formats
     
     def normalize_tiktok_url(self, url):
         """Normalize various TikTok URL formats to a standard format"""
         # Handle shortened URLs
-        if "vm.tiktok.com" in url or "vt.tiktok.com" in url:
-            try:
+        if is_short_link(url):
+            resolver = ShortLinkResolver.get_instance()
+            if resolver.lookup(url):
+                self.progress.emit("Dùng URL đã mở rộng từ bộ nhớ đệm")
+            else:
                 self.progress.emit("Mở rộng URL rút gọn...")
-                response = requests.head(url, allow_redirects=True, timeout=10)
-                return response.url
-            except Exception as e:
-                self.progress.emit(f"Lỗi khi mở rộng URL rút gọn: {str(e)}")
+            resolved = resolver.resolve(url)
+            if resolved != url.strip():
+                return resolved
+            self.progress.emit("Không thể mở rộng URL rút gọn, dùng URL gốc")
         
         # Handle different URL patterns
         patterns = [
@@ -628,23 +532,39 @@ class TikTokDownloadThread(QThread):
     finished = pyqtSignal(str)  # file đầu ra
     error = pyqtSignal(str)  # thông báo lỗi
     
-    def __init__(self, url, format_id, output_path):
+    def __init__(self, url, format_id, output_path, download_id=None):
         super().__init__()
         self.url = url
         self.format_id = format_id
         self.output_path = output_path
-        self.should_stop = False
+        self.cancel_token = CancellationToken()
         self.download_manager = DownloadManager.get_instance()
-        self.download_id = None
+        self.download_id = download_id  # Có sẵn khi tiếp tục một download đã tạm dừng
+        self.fragment_session = None
+        self.download_plan = None
+    
+    @property
+    def should_stop(self):
+        return self.cancel_token.cancelled
         
     def run(self):
+        # FFmpeg/tiến trình con do yt-dlp mở trong thread này sẽ bị dừng khi hủy
+        self.cancel_token.bind()
         try:
             # Tạo ID tải xuống và thêm vào download manager
-            self.download_id = self.download_manager.add_download(
-                source='tiktok',
-                title=self.url,  # Ban đầu chỉ có URL, cập nhật title sau
-                thumbnail_path=None
-            )
+            if self.download_id is None:
+                self.download_id = self.download_manager.add_download(
+                    source='tiktok',
+                    title=self.url,  # Ban đầu chỉ có URL, cập nhật title sau
+                    thumbnail_path=None
+                )
+            else:
+                self.download_manager.update_download(self.download_id, status='running')
+            self.download_manager.update_download(self.download_id, resume_info={
+                'url': self.url,
+                'format_id': self.format_id,
+                'output_path': self.output_path,
+            })
             
             # Thiết lập các tùy chọn cho yt-dlp
             ydl_opts = {
@@ -692,16 +612,29 @@ class TikTokDownloadThread(QThread):
                             print(f"Error parsing filename: {str(e)}")
                 
                 def warning(self, msg):
-                    pass
+                    # Phát hiện bị giới hạn (HTTP 429) hoặc lỗi fragment
+                    self.fragment_session.on_message(msg)
                 
                 def error(self, msg):
                     print(f"Error: {msg}")
+                    self.fragment_session.on_message(msg)
+            
+            # Số fragment tải song song (HLS/DASH) được tự điều chỉnh theo từng host
+            self.fragment_session = FragmentTuner.get_instance().start_session(self.url)
+            ydl_opts['concurrent_fragment_downloads'] = self.fragment_session.concurrency
             
             logger = MyLogger()
+            logger.fragment_session = self.fragment_session
             ydl_opts['logger'] = logger
             
+            # Engine tải chọn theo host và giao thức
+            self.download_plan = choose_plan(self.url)
+            self.download_plan.apply(ydl_opts)
+            self.cancel_token.apply_ydl_options(ydl_opts)
+            
             # Tải xuống video
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with yt_dlp.YoutubeDL(with_cache_dir(ydl_opts)) as ydl:
+                self.fragment_session.attach(ydl)
                 info_dict = ydl.extract_info(self.url, download=True)
                 
                 # Cập nhật thông tin vào download manager
@@ -712,24 +645,16 @@ class TikTokDownloadThread(QThread):
                     # Lưu thumbnail vào thư mục ứng dụng
                     if 'thumbnail' in info_dict:
                         try:
-                            thumbnail_url = info_dict['thumbnail']
-                            # Lấy thư mục ứng dụng
-                            app_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-                            # Tạo thư mục thumbnails nếu chưa tồn tại
-                            thumbnails_dir = os.path.join(app_dir, "thumbnails")
-                            os.makedirs(thumbnails_dir, exist_ok=True)
-                            
-                            # Tạo tên file thumbnail duy nhất
-                            thumbnail_path = os.path.join(thumbnails_dir, f"tiktok_{int(time.time())}_{clean_filename(info_dict['title'])}_thumbnail.jpg")
-                            
-                            response = requests.get(thumbnail_url)
-                            if response.status_code == 200:
-                                with open(thumbnail_path, 'wb') as f:
-                                    f.write(response.content)
+                            # Lưu sẵn ở kích thước hiển thị, ảnh trùng nội dung chỉ lưu một lần
+                            thumbnail_path = store_remote_thumbnail(info_dict['thumbnail'], self.download_id)
+                            if thumbnail_path:
                                 download_info.thumbnail_path = thumbnail_path
                         except Exception as e:
                             print(f"Không thể lưu thumbnail: {str(e)}")
             
+            self.fragment_session.finish(not self.should_stop)
+            self.download_manager.update_download(self.download_id, engine=self.download_plan.engine_label)
+            
             if not self.should_stop:
                 # Kiểm tra xem có tải xuống thành công không
                 if logger.downloaded_files:
@@ -770,6 +695,8 @@ class TikTokDownloadThread(QThread):
                         raise Exception("Không tìm thấy file đã tải xuống")
                         
         except Exception as e:
+            if self.fragment_session:
+                self.fragment_session.finish(False)
             if not self.should_stop:
                 error_message = str(e)
                 self.download_manager.update_download(
@@ -780,8 +707,12 @@ class TikTokDownloadThread(QThread):
                 self.error.emit(error_message)
     
     def progress_hook(self, d):
-        if self.should_stop:
-            raise Exception("Download cancelled")
+        self.cancel_token.raise_if_cancelled()
+        if self.fragment_session:
+            self.fragment_session.on_progress(d)
+        if self.download_plan:
+            self.download_plan.note_progress(d)
+        BandwidthEstimator.get_instance().observe(self.url, d)
             
         if d['status'] == 'downloading':
             # Tính toán tiến trình
@@ -848,8 +779,8 @@ class TikTokDownloadThread(QThread):
             print(f"Error setting timestamp: {str(e)}")
     
     def stop(self, pause=True):
-        """Stop the download thread, optionally setting status to paused"""
-        self.should_stop = True
+        """Stop the download thread, optionally setting status to paused (partial data is kept)"""
+        self.cancel_token.cancel(pause=pause)
         # Only change status if specifically requesting to pause
         if pause:
             self.download_manager.update_download(
@@ -864,12 +795,22 @@ class TikTokDownloaderWindow(QMainWindow):
         self.setMinimumSize(900, 650)
         self.showMaximized()
         
+        # Mở sẵn kết nối tới TikTok/CDN trong lúc giao diện đang dựng
+        prewarm(TIKTOK_HOSTS)
+        
+        # yt-dlp patches and FFmpeg lookup (no-op if the startup warm-up already ran it)
+        compat.ensure_initialized()
+        
         # Use ConfigManager for output path
         self.config_manager = ConfigManager.get_instance()
         self.output_path = self.config_manager.get_download_dir()
         
         self.info_thread = None
+        self.info_requests = LatestOnly()  # bỏ kết quả của các lần lấy thông tin đã bị thay thế
         self.download_thread = None
+        self.current_formats = []
+        self.bandwidth = BandwidthEstimator.get_instance()
+        self.bandwidth.throughput_changed.connect(self.refresh_quality_predictions)
         self.returning_to_hub = False  # Add flag to track return to hub action
         self.initUI()
         self.setStyleSheet("""
@@ -1070,6 +1011,14 @@ class TikTokDownloaderWindow(QMainWindow):
         link_layout.addWidget(fetch_button)
         input_layout.addLayout(link_layout)
         
+        # Tự động lấy trước thông tin khi sao chép/dán link (mặc định tắt)
+        self.prefetcher = MetadataPrefetcher.get_instance()
+        self.prefetch_checkbox = QCheckBox("Tự động lấy trước thông tin khi sao chép link")
+        self.prefetch_checkbox.setChecked(self.prefetcher.enabled)
+        self.prefetch_checkbox.toggled.connect(self.prefetcher.set_enabled)
+        self.link_input.textChanged.connect(self.prefetcher.hint)
+        input_layout.addWidget(self.prefetch_checkbox)
+        
         # Thêm gợi ý sử dụng
         hint_label = QLabel("Ví dụ: https://www.tiktok.com/@username/video/1234567890123456789")
         hint_label.setStyleSheet("font-size: 14px; color: #777777; font-style: italic;")
@@ -1261,6 +1210,11 @@ class TikTokDownloaderWindow(QMainWindow):
         """)
         quality_layout.addWidget(self.format_combo)
         
+        # Thời hạn/dung lượng tối đa cho lựa chọn "Tự động"
+        self.auto_quality = AutoQualityLimits(self.config_manager)
+        self.auto_quality.limits_changed.connect(self.refresh_quality_predictions)
+        quality_layout.addWidget(self.auto_quality)
+        
         # Thêm stretch để đẩy các phần tử lên trên
         quality_layout.addStretch(1)
         
@@ -1475,12 +1429,20 @@ class TikTokDownloaderWindow(QMainWindow):
             QMessageBox.warning(self, "URL không hợp lệ", "Link không phải là TikTok. Vui lòng kiểm tra lại.")
             return
         
-        # Hủy thread trước đó nếu đang chạy
+        # Hủy lần lấy thông tin trước: không chờ, kết quả trễ của nó bị bỏ qua
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait(1000)
+        self.info_requests.next()
+        
+        # Thông tin đã được lấy trước thì hiển thị ngay
+        prefetched_info = self.prefetcher.get(url)
+        if prefetched_info:
+            self.update_video_info(prefetched_info)
+            self.status_bar.showMessage("Đã tải thông tin video")
+            return
         
         # Cập nhật UI để hiển thị đang tải
+        self.thumbnail_source = None
         self.thumbnail_label.setText("Đang tải thông tin...")
         self.title_label.setText("Tiêu đề: Đang tải...")
         self.uploader_label.setText("Tác giả: Đang tải...")
@@ -1490,12 +1452,18 @@ class TikTokDownloaderWindow(QMainWindow):
         self.format_combo.setPlaceholderText("Đang tải danh sách chất lượng...")
         self.download_button.setEnabled(False)
         
+        # Prefetch cho URL này đang chạy: nhận kết quả thay vì tải lại từ đầu
+        if self.prefetcher.wait_for(url, self, self.info_requests.guard(self.update_video_info),
+                                   self.info_requests.guard(self.handle_info_error)):
+            self.status_bar.showMessage("Đang tải thông tin video...")
+            return
+        
         # Tạo và khởi chạy thread lấy thông tin
         self.info_thread = TikTokInfoThread(url)
-        self.info_thread.info_ready.connect(self.update_video_info)
-        self.info_thread.error.connect(self.handle_info_error)
-        self.info_thread.progress.connect(self.update_fetch_progress)
-        self.info_thread.finished.connect(self.info_thread_finished)
+        self.info_thread.info_ready.connect(self.info_requests.guard(self.update_video_info))
+        self.info_thread.error.connect(self.info_requests.guard(self.handle_info_error))
+        self.info_thread.progress.connect(self.info_requests.guard(self.update_fetch_progress))
+        self.info_thread.finished.connect(self.info_requests.guard(self.info_thread_finished))
         self.info_thread.start()
         
         self.status_bar.showMessage("Đang tải thông tin video...")
@@ -1506,6 +1474,7 @@ class TikTokDownloaderWindow(QMainWindow):
     def cancel_fetch(self):
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
+        self.info_requests.cancel()
         
         if hasattr(self, 'cancel_button') and self.cancel_button:
             self.cancel_button.setParent(None)
@@ -1514,6 +1483,30 @@ class TikTokDownloaderWindow(QMainWindow):
         self.title_label.setText("Tiêu đề: Đã hủy")
         self.status_bar.showMessage("Đã hủy lấy thông tin video")
 
+    def load_thumbnail(self, url, data=None):
+        """Show the thumbnail of url; fetched and scaled in the background by ThumbnailService"""
+        self.thumbnail_source = url
+        if not url:
+            return
+        size = (self.thumbnail_label.width(), self.thumbnail_label.height())
+        if data:
+            # Thumbnail đã có sẵn nếu thông tin đến từ prefetch
+            pixmap = QPixmap()
+            if pixmap.loadFromData(data):
+                self.thumbnail_label.setPixmap(pixmap.scaled(size[0], size[1], Qt.KeepAspectRatio,
+                                                             Qt.SmoothTransformation))
+                return
+
+        def show_thumbnail(pixmap):
+            if self.thumbnail_source != url:
+                return  # Người dùng đã chuyển sang video khác
+            if pixmap is None:
+                self.status_bar.showMessage("Không thể tải thumbnail")
+            else:
+                self.thumbnail_label.setPixmap(pixmap)
+
+        ThumbnailService.get_instance().request(url, size, show_thumbnail, owner=self)
+
     def update_video_info(self, info):
         # Cập nhật thông tin video lên UI
         
@@ -1533,38 +1526,46 @@ class TikTokDownloaderWindow(QMainWindow):
         duration_text = format_time(info['duration']) if info['duration'] > 0 else "Không rõ"
         self.duration_label.setText(f"Thời lượng: {duration_text}")
         
-        # Tải và hiển thị thumbnail
-        try:
-            if info['thumbnail_url']:
-                response = requests.get(info['thumbnail_url'])
-                if response.status_code == 200:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(BytesIO(response.content).read())
-                    # Thay đổi tỷ lệ khung hình, giữ AspectRatioMode là KeepAspectRatio để không bị méo
-                    self.thumbnail_label.setPixmap(pixmap.scaled(
-                        self.thumbnail_label.width(),
-                        self.thumbnail_label.height(),
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    ))
-        except Exception as e:
-            self.status_bar.showMessage(f"Không thể tải thumbnail: {str(e)}")
+        # Tải và hiển thị thumbnail (không chặn giao diện)
+        self.load_thumbnail(info['thumbnail_url'], info.get('thumbnail_data'))
         
         # Cập nhật combobox định dạng
         self.format_combo.clear()
         self.format_combo.setEnabled(True)  # Kích hoạt combo box
         self.format_combo.setPlaceholderText("Chọn chất lượng")
-        for fmt in info['formats']:
+        # Lựa chọn "Tự động" đứng đầu, chọn chất lượng cao nhất kịp thời hạn
+        self.current_formats = [AUTO_FORMAT] + info['formats']
+        for fmt in self.current_formats:
             self.format_combo.addItem(fmt['display_name'], fmt['format_id'])
         
         # Đặt format mặc định (thường là chất lượng cao nhất)
         if len(info['formats']) > 0:
-            self.format_combo.setCurrentIndex(0)
+            self.format_combo.setCurrentIndex(1)
+        self.refresh_quality_predictions()
         
         # Bật nút tải xuống
         self.download_button.setEnabled(True)
         self.status_bar.showMessage(f"Đã tải thông tin video: {info['title']}")
 
+    def current_throughput(self):
+        return self.bandwidth.estimate(self.link_input.text().strip() or "https://www.tiktok.com/")
+    
+    def resolve_auto_format(self):
+        """Định dạng mà lựa chọn "Tự động" đang trỏ tới với tốc độ đo được hiện tại"""
+        deadline, max_size = self.auto_quality.limits()
+        return choose_for_deadline(self.current_formats, self.current_throughput(), deadline, max_size)
+    
+    def refresh_quality_predictions(self, *args):
+        """Hiển thị thời gian tải dự kiến cho từng lựa chọn (gọi lại khi tốc độ đo được thay đổi)"""
+        if not self.current_formats or self.format_combo.count() != len(self.current_formats):
+            return
+        if self.download_thread and self.download_thread.isRunning():
+            return  # Đã bắt đầu tải, giữ nguyên lựa chọn
+        deadline, max_size = self.auto_quality.limits()
+        labels = quality_labels(self.current_formats, self.current_throughput(), deadline, max_size)
+        for index, text in enumerate(labels):
+            self.format_combo.setItemText(index, text)
+
     def handle_info_error(self, error):
         self.status_bar.showMessage(f"Lỗi: {error}")
         self.thumbnail_label.setText(f"Lỗi: {error}")
@@ -1573,6 +1574,7 @@ class TikTokDownloaderWindow(QMainWindow):
         self.duration_label.setText("Thời lượng: --")
         
         # Xử lý combo box
+        self.current_formats = []
         self.format_combo.clear()
         self.format_combo.setEnabled(False)  # Vô hiệu hóa combo box khi có lỗi
         self.format_combo.setPlaceholderText("Chọn chất lượng")
@@ -1607,6 +1609,9 @@ class TikTokDownloaderWindow(QMainWindow):
         if not format_id:
             self.status_bar.showMessage("Vui lòng chọn định dạng tải xuống")
             return
+        if format_id == 'auto':
+            # Giữ "best" khi chưa có định dạng nào ước tính được dung lượng
+            format_id = (self.resolve_auto_format() or {}).get('format_id', 'best')
         
         # Kiểm tra quyền ghi vào thư mục đầu ra
         try:
@@ -1637,6 +1642,9 @@ class TikTokDownloaderWindow(QMainWindow):
         self.cancel_download_button.clicked.connect(self.cancel_download)
         self.centralWidget().layout().insertWidget(5, self.cancel_download_button)
         
+        # Dùng URL đầy đủ đã mở rộng (nếu có) để không phải mở rộng lại link rút gọn
+        url = ShortLinkResolver.get_instance().canonical_url(url)
+        
         # Tạo và khởi chạy thread tải xuống
         self.download_thread = TikTokDownloadThread(url, format_id, self.output_path)
         self.download_thread.progress.connect(self.update_download_progress)
@@ -1651,7 +1659,6 @@ class TikTokDownloaderWindow(QMainWindow):
 
     def cancel_download(self):
         if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.should_stop = True
             self.download_thread.stop(pause=True)  # Explicitly pause when cancelling
             self.status_bar.showMessage("Đang hủy tải xuống...")
             
@@ -1740,7 +1747,7 @@ class TikTokDownloaderWindow(QMainWindow):
         # Only stop info thread, let download continue in background
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
         
         # Navigate back to main menu
         from ui.main_menu import MainMenu
@@ -1752,7 +1759,13 @@ class TikTokDownloaderWindow(QMainWindow):
         # Always stop info thread
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
+        
+        self.prefetcher.forget(self)
+        try:
+            self.bandwidth.throughput_changed.disconnect(self.refresh_quality_predictions)
+        except TypeError:
+            pass
         
         # Only stop download thread if not returning to hub
         if not self.returning_to_hub:
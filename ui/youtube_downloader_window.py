@@ -1,19 +1,42 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QProgressBar, QStatusBar, QComboBox,
-                             QMessageBox, QGroupBox, QFrame)
+                             QMessageBox, QGroupBox, QFrame, QCheckBox, QListWidget, QListWidgetItem, QSpinBox)
 from PyQt5.QtGui import QPixmap, QFont, QIcon
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer, QSize
 import os
 import time
 import urllib.parse
-import requests
 import sys
 import subprocess
+import re
+import threading
 from io import BytesIO
 from utils.helpers import clean_filename, format_size, format_time
+from utils import compat
 import yt_dlp
 from utils.download_manager import DownloadManager
 from utils.config_manager import ConfigManager
+from utils.ytdlp_cache import with_cache_dir
+from utils.ytdlp_pool import YoutubeDLPool
+from utils.fragment_tuner import FragmentTuner
+from utils.download_backends import choose_plan
+from utils.task_pool import PooledTask, LatestOnly
+from utils.cancellation import CancellationToken
+from utils.bandwidth import AUTO_FORMAT, BandwidthEstimator, choose_for_deadline, quality_labels
+from ui.auto_quality import AutoQualityLimits
+from utils.metadata_prefetcher import MetadataPrefetcher
+from utils.download_queue import DownloadQueue
+from utils.format_table import FormatTable, COMMON_HEIGHTS
+from utils.thumbnail_service import ThumbnailService
+from utils.thumbnail_store import store_remote_thumbnail
+
+# Tùy chọn yt-dlp chung cho việc lấy thông tin video (dùng chung instance trong YoutubeDLPool)
+VIDEO_INFO_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'socket_timeout': 15,
+    'extract_flat': False,
+}
 
 class DownloadThread(QThread):
     progress_signal = pyqtSignal(int, str, str, str, str)  # progress, speed, downloaded, remaining_time, total_size
@@ -21,23 +44,56 @@ class DownloadThread(QThread):
     error_signal = pyqtSignal(str)  # error message
     file_exists_signal = pyqtSignal(str)  # signal for existing file
     
-    def __init__(self, url, format_id, output_path):
+    def __init__(self, url, format_id, output_path, remux_only=False, download_id=None):
         super().__init__()
         self.url = url
         self.format_id = format_id
         self.output_path = output_path
-        self.is_cancelled = False
+        self.remux_only = remux_only  # Các luồng đã tương thích mp4, chỉ cần copy khi ghép
+        self.cancel_token = CancellationToken()
         self.download_manager = DownloadManager.get_instance()
-        self.download_id = None
+        self.download_id = download_id  # Có sẵn khi tiếp tục một download đã tạm dừng
+        self.resuming = download_id is not None
+        self.fragment_session = None
+        self.download_plan = None
+
+    @property
+    def is_cancelled(self):
+        return self.cancel_token.cancelled
+
+    def report_existing_file(self, file_path):
+        """
+        Kết thúc download vì file đã tồn tại. Trạng thái được cập nhật ở đây
+        vì thread chạy từ hàng đợi không có ai nhận file_exists_signal.
+        """
+        if self.download_id:
+            if os.path.exists(file_path):
+                self.download_manager.update_download(self.download_id, status='completed',
+                                                      progress=100, output_file=file_path)
+            else:
+                self.download_manager.update_download(self.download_id, status='error',
+                                                      error_message="File đã tồn tại")
+        self.file_exists_signal.emit(file_path)
 
     def run(self):
+        # FFmpeg/tiến trình con do yt-dlp mở trong thread này sẽ bị dừng khi hủy
+        self.cancel_token.bind()
         try:
             # Thiết lập các thông tin cơ bản và tạo download_id
-            self.download_id = self.download_manager.add_download(
-                source='youtube',
-                title=self.url,  # Ban đầu chỉ có URL, sau khi lấy thông tin sẽ cập nhật title
-                thumbnail_path=None
-            )
+            if self.download_id is None:
+                self.download_id = self.download_manager.add_download(
+                    source='youtube',
+                    title=self.url,  # Ban đầu chỉ có URL, sau khi lấy thông tin sẽ cập nhật title
+                    thumbnail_path=None
+                )
+            else:
+                self.download_manager.update_download(self.download_id, status='running')
+            self.download_manager.update_download(self.download_id, resume_info={
+                'url': self.url,
+                'format_id': self.format_id,
+                'output_path': self.output_path,
+                'remux_only': self.remux_only,
+            })
             
             # Clean the URL (remove tracking parameters)
             parsed_url = urllib.parse.urlparse(self.url)
@@ -78,6 +134,12 @@ class DownloadThread(QThread):
                     'format': 'bestvideo+bestaudio/best',
                     'merge_output_format': 'mp4',
                 })
+            # Format selectors (playlist downloads) and video+audio pairs already include audio
+            elif '[' in self.format_id or '+' in self.format_id:
+                ydl_opts.update({
+                    'format': self.format_id,
+                    'merge_output_format': 'mp4',
+                })
             # For specific format IDs, make sure we also get audio
             else:
                 # More detailed format specification for specific formats
@@ -86,6 +148,10 @@ class DownloadThread(QThread):
                     'merge_output_format': 'mp4',
                 })
             
+            # Remux only: copy both streams instead of re-encoding audio to AAC
+            if self.remux_only and self.format_id != 'bestaudio':
+                ydl_opts['postprocessor_args'] = {'ffmpeg': ['-c', 'copy']}
+            
             # Custom logger to capture filenames
             class MyLogger:
                 def __init__(self):
@@ -144,6 +210,8 @@ class DownloadThread(QThread):
                 def warning(self, msg):
                     clean_msg = self.strip_ansi_codes(msg)
                     print(f"Warning: {clean_msg}")
+                    # Phát hiện bị giới hạn (HTTP 429) hoặc lỗi fragment
+                    self.fragment_session.on_message(clean_msg)
                     self.last_messages.append(f"WARNING: {clean_msg}")
                     if len(self.last_messages) > 10:
                         self.last_messages.pop(0)
@@ -151,13 +219,19 @@ class DownloadThread(QThread):
                 def error(self, msg):
                     clean_msg = self.strip_ansi_codes(msg)
                     print(f"Error: {clean_msg}")
+                    self.fragment_session.on_message(clean_msg)
                     self.last_messages.append(f"ERROR: {clean_msg}")
                     if len(self.last_messages) > 10:
                         self.last_messages.pop(0)
             
+            # Số fragment tải song song (HLS/DASH) được tự điều chỉnh theo từng host
+            self.fragment_session = FragmentTuner.get_instance().start_session(self.url)
+            ydl_opts['concurrent_fragment_downloads'] = self.fragment_session.concurrency
+            
             logger = MyLogger()
             logger.download_manager = self.download_manager
             logger.download_id = self.download_id
+            logger.fragment_session = self.fragment_session
             ydl_opts['logger'] = logger
             
             # Additional download options to increase reliability
@@ -165,16 +239,16 @@ class DownloadThread(QThread):
                 'retries': 10,                  # Retry up to 10 times
                 'fragment_retries': 10,         # Retry fragment downloads
                 'continuedl': True,             # Continue partial downloads
-                'external_downloader_args': [   # Additional aria2 args for more reliability
-                    '--retry-wait=2',
-                    '--max-connection-per-server=16',
-                    '--min-split-size=1M'
-                ]
             })
             
+            # Engine tải (native/aria2c...) chọn theo host và giao thức
+            self.download_plan = choose_plan(self.url)
+            self.download_plan.apply(ydl_opts)
+            self.cancel_token.apply_ydl_options(ydl_opts)
+            
             # Try to get info about the video first to help locate the file later if needed
             try:
-                with yt_dlp.YoutubeDL({**ydl_opts, 'skip_download': True}) as ydl:
+                with YoutubeDLPool.get_instance().checkout('youtube:info', VIDEO_INFO_OPTIONS) as ydl:
                     info_dict = ydl.extract_info(clean_url, download=False)
                     if 'title' in info_dict:
                         # Set attributes for download manager
@@ -182,27 +256,18 @@ class DownloadThread(QThread):
                         download_info.title = info_dict['title']
                         
                         # Check for existing files more thoroughly BEFORE attempting download
-                        existing_file = self.check_for_existing_file(info_dict['title'])
+                        # (khi tiếp tục, các luồng đã tải xong của lần trước được yt-dlp dùng lại)
+                        existing_file = None if self.resuming else self.check_for_existing_file(info_dict['title'])
                         if existing_file:
-                            self.file_exists_signal.emit(existing_file)
+                            self.report_existing_file(existing_file)
                             return
                         
                         # Try to save thumbnail if available in app directory
                         if 'thumbnail' in info_dict:
                             try:
-                                thumbnail_url = info_dict['thumbnail']
-                                # Get the application's directory
-                                app_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-                                # Create thumbnails directory if it doesn't exist
-                                thumbnails_dir = os.path.join(app_dir, "thumbnails")
-                                os.makedirs(thumbnails_dir, exist_ok=True)
-                                
-                                thumbnail_path = os.path.join(thumbnails_dir, f"yt_{info_dict['id']}_thumbnail.jpg")
-                                
-                                response = requests.get(thumbnail_url)
-                                if response.status_code == 200:
-                                    with open(thumbnail_path, 'wb') as f:
-                                        f.write(response.content)
+                                # Lưu sẵn ở kích thước hiển thị, ảnh trùng nội dung chỉ lưu một lần
+                                thumbnail_path = store_remote_thumbnail(info_dict['thumbnail'], self.download_id)
+                                if thumbnail_path:
                                     download_info.thumbnail_path = thumbnail_path
                             except Exception as e:
                                 print(f"Could not save thumbnail: {str(e)}")
@@ -215,7 +280,8 @@ class DownloadThread(QThread):
                 
             # Now download the video
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with yt_dlp.YoutubeDL(with_cache_dir(ydl_opts)) as ydl:
+                    self.fragment_session.attach(ydl)
                     ydl.download([clean_url])
             except Exception as e:
                 if "already exists" in str(e):
@@ -224,10 +290,12 @@ class DownloadThread(QThread):
                 elif any(err in str(e) for err in ["Unable to rename file", "process cannot access the file", "Permission denied"]):
                     # Wait for file to be released
                     self.progress_signal.emit(95, "-- KB/s", "Finalizing...", "Waiting for file access", "")
-                    time.sleep(3)  # Wait for file access
+                    self.cancel_token.wait(3)  # Wait for file access
+                    self.cancel_token.raise_if_cancelled()
                     try:
                         # Try one more time
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                        with yt_dlp.YoutubeDL(with_cache_dir(ydl_opts)) as ydl:
+                            self.fragment_session.attach(ydl)
                             ydl.download([clean_url])
                     except Exception as retry_err:
                         # If still fails, check if any files were downloaded
@@ -237,6 +305,9 @@ class DownloadThread(QThread):
                     # If not a file access error, re-raise
                     raise e
             
+            self.fragment_session.finish(not self.is_cancelled)
+            self.download_manager.update_download(self.download_id, engine=self.download_plan.engine_label)
+            
             # Check if download was completed successfully
             if not self.is_cancelled:
                 # Check for successful download
@@ -339,6 +410,8 @@ class DownloadThread(QThread):
                         raise Exception("Không tìm thấy file đã tải xuống")
                     
         except Exception as e:
+            if self.fragment_session:
+                self.fragment_session.finish(False)
             if self.is_cancelled:
                 print("Download was cancelled by user")
                 return
@@ -354,13 +427,13 @@ class DownloadThread(QThread):
                     if match:
                         file_path = match.group(1)
                         if os.path.exists(file_path):
-                            self.file_exists_signal.emit(file_path)
+                            self.report_existing_file(file_path)
                             return
                 except:
                     pass
                 
                 # If we couldn't extract the path, emit a generic error
-                self.file_exists_signal.emit("Unknown file")
+                self.report_existing_file("Unknown file")
                 return
                 
             # Handle other types of errors
@@ -434,8 +507,12 @@ class DownloadThread(QThread):
         return None
     
     def progress_hook(self, d):
-        if self.is_cancelled:
-            raise Exception("Download cancelled")
+        self.cancel_token.raise_if_cancelled()
+        if self.fragment_session:
+            self.fragment_session.on_progress(d)
+        if self.download_plan:
+            self.download_plan.note_progress(d)
+        BandwidthEstimator.get_instance().observe(self.url, d)
             
         if d['status'] == 'downloading':
             # Existing progress calculation
@@ -655,8 +732,8 @@ class DownloadThread(QThread):
             print(f"Error cleaning up temp files: {str(e)}")
 
     def stop(self, pause=True):
-        """Stop the download thread, optionally setting status to paused"""
-        self.is_cancelled = True
+        """Stop the download thread, optionally setting status to paused (partial data is kept)"""
+        self.cancel_token.cancel(pause=pause)
         # Only change status if specifically requesting to pause
         if pause:
             self.download_manager.update_download(
@@ -664,7 +741,7 @@ class DownloadThread(QThread):
                 status='paused'
             )
 
-class VideoInfoThread(QThread):
+class VideoInfoThread(PooledTask):
     info_ready = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
@@ -672,7 +749,6 @@ class VideoInfoThread(QThread):
     def __init__(self, url):
         super().__init__()
         self.url = url
-        self.should_stop = False
 
     def clean_url(self, url):
         parsed_url = urllib.parse.urlparse(url)
@@ -697,17 +773,9 @@ class VideoInfoThread(QThread):
             
             self.progress.emit("Kiểm tra thư viện yt-dlp...")
             self.ensure_ytdlp_installed()
-            import yt_dlp
-            
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'socket_timeout': 15,
-                'extract_flat': False,
-            }
             
             self.progress.emit("Đang tải thông tin video từ YouTube...")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with YoutubeDLPool.get_instance().checkout('youtube:info', VIDEO_INFO_OPTIONS) as ydl:
                 if self.should_stop:
                     return
                 
@@ -769,45 +837,24 @@ class VideoInfoThread(QThread):
                 })
                 
                 self.progress.emit("Tổng hợp các định dạng tải xuống...")
-                video_formats = {}
-                for f in info_dict.get('formats', []):
+                format_table = FormatTable(info_dict)
+                
+                # Lựa chọn "cao nhất" cũng dùng cặp luồng remux được ở độ phân giải cao nhất
+                best_choice = format_table.best('mp4')
+                if best_choice:
+                    formats[0] = best_choice.to_format_dict("Video Chất Lượng Cao Nhất")
+                    formats[0]['is_best'] = True
+                
+                # Mỗi độ phân giải phổ biến một lựa chọn: codec, dung lượng ước tính, có chuyển mã hay không
+                for choice in format_table.choices('mp4', COMMON_HEIGHTS):
                     if self.should_stop:
                         return
-                    
-                    # Chỉ lọc các format video chính
-                    if f.get('vcodec') != 'none' and f.get('height'):
-                        height = f.get('height')
-                        # Nhóm các format theo độ phân giải và ưu tiên format có audio
-                        has_audio = f.get('acodec') != 'none'
-                        
-                        # Ưu tiên format có cả audio và video
-                        if height not in video_formats or (has_audio and not video_formats[height].get('acodec', 'none') != 'none'):
-                            video_formats[height] = f
+                    formats.append(choice.to_format_dict())
                 
-                common_resolutions = [144, 240, 360, 480, 720, 1080, 1440, 2160]
-                for height in sorted(video_formats.keys()):
-                    if height in common_resolutions:
-                        f = video_formats[height]
-                        format_id = f['format_id']
-                        formats.append({
-                            'format_id': format_id,
-                            'ext': 'mp4',
-                            'display_name': f"{height}p ({f.get('ext', 'mp4')})",
-                            'is_audio': False
-                        })
-                
-                if len(formats) <= 1:
+                if len(formats) <= 4:
                     self.progress.emit("Không tìm thấy định dạng video phù hợp...")
-                    for f in info_dict.get('formats', []):
-                        if f.get('ext') in ['mp4', 'webm'] and f.get('height') and f.get('vcodec') != 'none':
-                            format_id = f['format_id']
-                            height = f.get('height')
-                            formats.append({
-                                'format_id': format_id,
-                                'ext': f.get('ext', 'mp4'),
-                                'display_name': f"{height}p ({f.get('ext', 'mp4')})",
-                                'is_audio': False
-                            })
+                    for choice in format_table.choices('mp4'):
+                        formats.append(choice.to_format_dict())
                 
                 video_info = {
                     'title': info_dict.get('title', 'Unknown video'),
@@ -820,7 +867,7 @@ class VideoInfoThread(QThread):
                 
                 # Tìm format 1080p để đặt làm mặc định
                 for i, fmt in enumerate(formats):
-                    if '1080p' in fmt.get('display_name', ''):
+                    if fmt.get('height') == 1080 and not fmt.get('is_best'):
                         video_info['default_format_index'] = i
                         break
                 
@@ -842,6 +889,123 @@ class VideoInfoThread(QThread):
     def stop(self):
         self.should_stop = True
 
+class PlaylistEnumThread(QThread):
+    """Liệt kê video của playlist/kênh theo từng trang, không tải toàn bộ danh sách một lúc"""
+    entries_ready = pyqtSignal(list)  # Một lô entry: dict(index, id, title, url, duration)
+    playlist_info = pyqtSignal(str, str)  # tiêu đề playlist, người tải lên
+    finished_listing = pyqtSignal(int)  # tổng số entry đã liệt kê
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+
+    BATCH_SIZE = 50
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = normalize_collection_url(url)
+        self.should_stop = False
+
+    def run(self):
+        try:
+            self.progress.emit("Đang liệt kê video trong playlist/kênh...")
+            ydl_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'socket_timeout': 15,
+                'extract_flat': 'in_playlist',  # Chỉ lấy id/tiêu đề, không trích xuất từng video
+                'lazy_playlist': True,  # Các trang được tải khi duyệt tới
+                'ignoreerrors': True,
+            }
+            count = 0
+            with YoutubeDLPool.get_instance().checkout('youtube:playlist', ydl_opts) as ydl:
+                info = ydl.extract_info(self.url, download=False, process=False)
+                if not info:
+                    raise Exception("Không thể đọc playlist")
+                if info.get('_type') not in ('playlist', 'multi_video'):
+                    raise Exception("URL không phải là playlist hoặc kênh")
+
+                self.playlist_info.emit(info.get('title') or "Playlist",
+                                        info.get('uploader') or info.get('channel') or "")
+
+                batch = []
+                # process=False trả về generator, mỗi trang chỉ được tải khi cần
+                for entry in info.get('entries') or []:
+                    if self.should_stop:
+                        break
+                    if not entry:
+                        continue
+                    video_id = entry.get('id')
+                    url = entry.get('url') or (f"https://www.youtube.com/watch?v={video_id}" if video_id else None)
+                    if not url:
+                        continue
+                    count += 1
+                    batch.append({
+                        'index': count,
+                        'id': video_id,
+                        'title': entry.get('title') or video_id or url,
+                        'url': url,
+                        'duration': entry.get('duration') or 0,
+                    })
+                    if len(batch) >= self.BATCH_SIZE:
+                        self.entries_ready.emit(batch)
+                        self.progress.emit(f"Đã liệt kê {count} video...")
+                        batch = []
+
+                if batch:
+                    self.entries_ready.emit(batch)
+
+            self.finished_listing.emit(count)
+        except Exception as e:
+            self.error.emit(f"Lỗi: {str(e)}")
+
+    def stop(self):
+        self.should_stop = True
+
+
+def is_collection_url(url):
+    """Kiểm tra URL là playlist hoặc kênh YouTube (không phải một video đơn lẻ)"""
+    parsed_url = urllib.parse.urlparse(url)
+    path = parsed_url.path
+    query_params = urllib.parse.parse_qs(parsed_url.query)
+    if path.startswith('/playlist') and 'list' in query_params:
+        return True
+    return bool(re.match(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)(/(videos|shorts|streams))?/?$', path))
+
+
+def normalize_collection_url(url):
+    """Trang chủ kênh chứa nhiều tab, chuyển thẳng tới tab Videos"""
+    parsed_url = urllib.parse.urlparse(url)
+    if re.match(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)/?$', parsed_url.path):
+        return urllib.parse.urlunparse(parsed_url._replace(path=parsed_url.path.rstrip('/') + '/videos', query=''))
+    return url
+
+
+# Thread liệt kê đã bị thay thế nhưng chưa dừng hẳn: giữ tham chiếu tới khi finished,
+# hủy QThread đang chạy sẽ làm ứng dụng bị abort
+_retired_playlist_threads = set()
+
+
+def _retire_playlist_thread(thread):
+    for signal in (thread.playlist_info, thread.entries_ready, thread.finished_listing,
+                   thread.error, thread.progress):
+        try:
+            signal.disconnect()
+        except TypeError:
+            pass  # không có kết nối nào
+    thread.stop()
+    if thread.isRunning():
+        _retired_playlist_threads.add(thread)
+        thread.finished.connect(lambda: (thread.wait(), _retired_playlist_threads.discard(thread)))
+
+
+# Định dạng cho tải hàng loạt: không biết trước định dạng của từng video nên dùng bộ chọn theo độ phân giải
+PLAYLIST_FORMATS = [
+    ("Video Chất Lượng Cao Nhất", 'best'),
+    ("1080p", 'bestvideo[height<=1080]+bestaudio/best[height<=1080]'),
+    ("720p", 'bestvideo[height<=720]+bestaudio/best[height<=720]'),
+    ("480p", 'bestvideo[height<=480]+bestaudio/best[height<=480]'),
+    ("Audio MP3 (320kbps)", 'bestaudio'),
+]
+
 class YouTubeDownloaderWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -849,6 +1013,9 @@ class YouTubeDownloaderWindow(QMainWindow):
         self.setMinimumSize(900, 650)
         self.showMaximized()  # Đảm bảo mở full screen
         
+        # yt-dlp patches and FFmpeg lookup (no-op if the startup warm-up already ran it)
+        compat.ensure_initialized()
+        
         # Use ConfigManager for output path
         self.config_manager = ConfigManager.get_instance()
         self.output_path = self.config_manager.get_download_dir()
@@ -864,8 +1031,20 @@ class YouTubeDownloaderWindow(QMainWindow):
                 self.output_path = os.path.expanduser("~/Downloads")
                 os.makedirs(self.output_path, exist_ok=True)
         
+        # Khởi tạo sẵn YoutubeDL + extractor YouTube ở nền để lần lấy thông tin đầu tiên nhanh hơn
+        threading.Thread(target=YoutubeDLPool.get_instance().warm,
+                         args=('youtube:info', VIDEO_INFO_OPTIONS, ('Youtube', 'YoutubeTab')),
+                         daemon=True).start()
+        
         self.info_thread = None
+        self.info_requests = LatestOnly()  # bỏ kết quả của các lần lấy thông tin đã bị thay thế
         self.download_thread = None
+        self.playlist_thread = None
+        self.current_collection_url = None
+        self.current_collection_title = ""
+        self.current_formats = []
+        self.bandwidth = BandwidthEstimator.get_instance()
+        self.bandwidth.throughput_changed.connect(self.refresh_quality_predictions)
         self.returning_to_hub = False  # Add flag to track return to hub action
         self.initUI()
         self.setStyleSheet("""
@@ -1062,8 +1241,23 @@ class YouTubeDownloaderWindow(QMainWindow):
         link_layout.addWidget(fetch_button)
         input_layout.addLayout(link_layout)
         
+        # Tự động lấy trước thông tin khi sao chép/dán link (mặc định tắt)
+        self.prefetcher = MetadataPrefetcher.get_instance()
+        self.prefetch_checkbox = QCheckBox("Tự động lấy trước thông tin khi sao chép link")
+        self.prefetch_checkbox.setChecked(self.prefetcher.enabled)
+        self.prefetch_checkbox.toggled.connect(self.prefetcher.set_enabled)
+        self.link_input.textChanged.connect(self.prefetcher.hint)
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(self.prefetch_checkbox)
+        options_layout.addStretch(1)
+        subscriptions_button = QPushButton("Kênh đã theo dõi")
+        subscriptions_button.setObjectName("secondary")
+        subscriptions_button.clicked.connect(self.open_subscriptions)
+        options_layout.addWidget(subscriptions_button)
+        input_layout.addLayout(options_layout)
+        
         # Thêm gợi ý sử dụng
-        hint_label = QLabel("Ví dụ: https://www.youtube.com/watch?v=abc123")
+        hint_label = QLabel("Ví dụ: https://www.youtube.com/watch?v=abc123 (hỗ trợ cả link playlist và kênh)")
         hint_label.setStyleSheet("font-size: 14px; color: #777777; font-style: italic;")
         input_layout.addWidget(hint_label)
         
@@ -1253,6 +1447,11 @@ class YouTubeDownloaderWindow(QMainWindow):
         """)
         quality_layout.addWidget(self.format_combo)
         
+        # Thời hạn/dung lượng tối đa cho lựa chọn "Tự động"
+        self.auto_quality = AutoQualityLimits(self.config_manager)
+        self.auto_quality.limits_changed.connect(self.refresh_quality_predictions)
+        quality_layout.addWidget(self.auto_quality)
+        
         # Thêm stretch để đẩy các phần tử lên trên
         quality_layout.addStretch(1)
         
@@ -1261,6 +1460,84 @@ class YouTubeDownloaderWindow(QMainWindow):
         
         layout.addWidget(info_group)
 
+        # Playlist / kênh - chỉ hiện khi URL là playlist hoặc kênh
+        self.playlist_group = QGroupBox("Danh sách video")
+        playlist_layout = QVBoxLayout(self.playlist_group)
+        playlist_layout.setSpacing(10)
+        
+        self.playlist_title_label = QLabel("Playlist: ")
+        self.playlist_title_label.setObjectName("info")
+        playlist_layout.addWidget(self.playlist_title_label)
+        
+        self.playlist_list = QListWidget()
+        self.playlist_list.setMinimumHeight(220)
+        self.playlist_list.setUniformItemSizes(True)  # Danh sách dài vẫn cuộn mượt
+        playlist_layout.addWidget(self.playlist_list)
+        
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(QLabel("Từ video"))
+        self.range_start_spin = QSpinBox()
+        self.range_start_spin.setRange(1, 1)
+        range_layout.addWidget(self.range_start_spin)
+        range_layout.addWidget(QLabel("đến"))
+        self.range_end_spin = QSpinBox()
+        self.range_end_spin.setRange(1, 1)
+        range_layout.addWidget(self.range_end_spin)
+        
+        select_range_button = QPushButton("Chọn khoảng")
+        select_range_button.setObjectName("secondary")
+        select_range_button.clicked.connect(self.select_playlist_range)
+        range_layout.addWidget(select_range_button)
+        
+        select_all_button = QPushButton("Chọn tất cả")
+        select_all_button.setObjectName("secondary")
+        select_all_button.clicked.connect(lambda: self.set_all_playlist_checked(True))
+        range_layout.addWidget(select_all_button)
+        
+        clear_selection_button = QPushButton("Bỏ chọn")
+        clear_selection_button.setObjectName("cancel")
+        clear_selection_button.clicked.connect(lambda: self.set_all_playlist_checked(False))
+        range_layout.addWidget(clear_selection_button)
+        range_layout.addStretch(1)
+        playlist_layout.addLayout(range_layout)
+        
+        queue_layout = QHBoxLayout()
+        self.playlist_format_combo = QComboBox()
+        for display_name, format_id in PLAYLIST_FORMATS:
+            self.playlist_format_combo.addItem(display_name, format_id)
+        queue_layout.addWidget(self.playlist_format_combo)
+        
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, 6)
+        self.parallel_spin.setValue(DownloadQueue.get_instance().max_parallel)
+        self.parallel_spin.setPrefix("Song song: ")
+        self.parallel_spin.valueChanged.connect(DownloadQueue.get_instance().set_max_parallel)
+        queue_layout.addWidget(self.parallel_spin)
+        
+        self.stop_listing_button = QPushButton("Dừng liệt kê")
+        self.stop_listing_button.setObjectName("cancel")
+        self.stop_listing_button.clicked.connect(self.stop_playlist_listing)
+        queue_layout.addWidget(self.stop_listing_button)
+        
+        self.subscribe_button = QPushButton("Theo dõi")
+        self.subscribe_button.setObjectName("secondary")
+        self.subscribe_button.setToolTip("Lưu kênh/playlist này để đồng bộ video mới sau này")
+        self.subscribe_button.clicked.connect(self.subscribe_current_collection)
+        queue_layout.addWidget(self.subscribe_button)
+        
+        self.playlist_download_button = QPushButton("TẢI CÁC VIDEO ĐÃ CHỌN")
+        self.playlist_download_button.clicked.connect(self.download_playlist_selection)
+        queue_layout.addWidget(self.playlist_download_button, 1)
+        playlist_layout.addLayout(queue_layout)
+        
+        self.queue_status_label = QLabel("")
+        self.queue_status_label.setStyleSheet("color: #555555;")
+        playlist_layout.addWidget(self.queue_status_label)
+        
+        self.playlist_group.setVisible(False)
+        layout.addWidget(self.playlist_group)
+        DownloadQueue.get_instance().queue_changed.connect(self.update_queue_status)
+
         # Output Path Selection - modern style
         path_group = QGroupBox("Đường dẫn xuất file")
         path_group.setStyleSheet("""
@@ -1468,12 +1745,26 @@ class YouTubeDownloaderWindow(QMainWindow):
             QMessageBox.warning(self, "URL không hợp lệ", "URL không phải là link YouTube. Vui lòng kiểm tra lại.")
             return
         
-        # Cancel previous thread if running
+        # Hủy lần lấy thông tin trước: không chờ, kết quả trễ của nó bị bỏ qua
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.next()
+        
+        # Playlist hoặc kênh: liệt kê danh sách video thay vì chỉ lấy video đầu tiên
+        if is_collection_url(url):
+            self.start_playlist_listing(url)
+            return
+        self.playlist_group.setVisible(False)
+        
+        # Thông tin đã được lấy trước thì hiển thị ngay
+        prefetched_info = self.prefetcher.get(url)
+        if prefetched_info:
+            self.update_video_info(prefetched_info)
+            self.status_bar.showMessage("Đã tải thông tin video")
+            return
         
         # Update UI to show loading state
+        self.thumbnail_source = None
         self.thumbnail_label.setText("Đang tải thông tin...")
         self.title_label.setText("Tiêu đề: Đang tải...")
         self.channel_label.setText("Kênh: Đang tải...")
@@ -1483,15 +1774,45 @@ class YouTubeDownloaderWindow(QMainWindow):
         self.format_combo.setPlaceholderText("Đang tải danh sách chất lượng...")
         self.download_button.setEnabled(False)
         
+        # Prefetch cho URL này đang chạy: nhận kết quả thay vì tải lại từ đầu
+        if self.prefetcher.wait_for(url, self, self.info_requests.guard(self.update_video_info),
+                                   self.info_requests.guard(self.handle_info_error)):
+            self.status_bar.showMessage("Đang tải thông tin video...")
+            return
+        
         # Create and start thread to fetch video info
         self.info_thread = VideoInfoThread(url)
-        self.info_thread.info_ready.connect(self.update_video_info)
-        self.info_thread.error.connect(self.handle_info_error)
-        self.info_thread.progress.connect(self.update_status)
+        self.info_thread.info_ready.connect(self.info_requests.guard(self.update_video_info))
+        self.info_thread.error.connect(self.info_requests.guard(self.handle_info_error))
+        self.info_thread.progress.connect(self.info_requests.guard(self.update_status))
         self.info_thread.start()
         
         self.status_bar.showMessage("Đang tải thông tin video...")
 
+    def load_thumbnail(self, url, data=None):
+        """Show the thumbnail of url; fetched and scaled in the background by ThumbnailService"""
+        self.thumbnail_source = url
+        if not url:
+            return
+        size = (self.thumbnail_label.width(), self.thumbnail_label.height())
+        if data:
+            # Thumbnail đã có sẵn nếu thông tin đến từ prefetch
+            pixmap = QPixmap()
+            if pixmap.loadFromData(data):
+                self.thumbnail_label.setPixmap(pixmap.scaled(size[0], size[1], Qt.KeepAspectRatio,
+                                                             Qt.SmoothTransformation))
+                return
+
+        def show_thumbnail(pixmap):
+            if self.thumbnail_source != url:
+                return  # Người dùng đã chuyển sang video khác
+            if pixmap is None:
+                self.status_bar.showMessage("Không thể tải thumbnail")
+            else:
+                self.thumbnail_label.setPixmap(pixmap)
+
+        ThumbnailService.get_instance().request(url, size, show_thumbnail, owner=self)
+
     def update_video_info(self, info):
         """Update UI with video information"""
         # Giới hạn độ dài tiêu đề để tránh lỗi hiển thị
@@ -1514,37 +1835,193 @@ class YouTubeDownloaderWindow(QMainWindow):
         duration_str = format_time(info['duration'])
         self.duration_label.setText(f"Thời lượng: {duration_str}")
         
-        # Load thumbnail
-        if info['thumbnail_url']:
-            try:
-                response = requests.get(info['thumbnail_url'])
-                if response.status_code == 200:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    self.thumbnail_label.setPixmap(pixmap.scaled(
-                        self.thumbnail_label.width(),
-                        self.thumbnail_label.height(),
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    ))
-            except Exception as e:
-                self.status_bar.showMessage(f"Không thể tải thumbnail: {str(e)}")
+        # Tải và hiển thị thumbnail (không chặn giao diện)
+        self.load_thumbnail(info['thumbnail_url'], info.get('thumbnail_data'))
         
         # Update format combo box
         self.format_combo.clear()
         self.format_combo.setEnabled(True)  # Kích hoạt combo box khi có thông tin video
         self.format_combo.setPlaceholderText("Chọn chất lượng")
-        for fmt in info['formats']:
+        # Lựa chọn "Tự động" đứng đầu, chọn chất lượng cao nhất kịp thời hạn
+        self.current_formats = [AUTO_FORMAT] + info['formats']
+        for fmt in self.current_formats:
             self.format_combo.addItem(fmt['display_name'], fmt['format_id'])
         
         # Set default format
         if 'default_format_index' in info and 0 <= info['default_format_index'] < len(info['formats']):
-            self.format_combo.setCurrentIndex(info['default_format_index'])
+            self.format_combo.setCurrentIndex(info['default_format_index'] + 1)
+        self.refresh_quality_predictions()
         
         # Enable download button
         self.download_button.setEnabled(True)
         self.status_bar.showMessage(f"Đã tải thông tin video: {info['title']}")
 
+    def current_throughput(self):
+        return self.bandwidth.estimate(self.link_input.text().strip() or "https://www.youtube.com/")
+    
+    def resolve_auto_format(self):
+        """Định dạng mà lựa chọn "Tự động" đang trỏ tới với tốc độ đo được hiện tại"""
+        deadline, max_size = self.auto_quality.limits()
+        return choose_for_deadline(self.current_formats, self.current_throughput(), deadline, max_size)
+    
+    def refresh_quality_predictions(self, *args):
+        """Hiển thị thời gian tải dự kiến cho từng lựa chọn (gọi lại khi tốc độ đo được thay đổi)"""
+        if not self.current_formats or self.format_combo.count() != len(self.current_formats):
+            return
+        if self.download_thread and self.download_thread.isRunning():
+            return  # Đã bắt đầu tải, giữ nguyên lựa chọn
+        deadline, max_size = self.auto_quality.limits()
+        labels = quality_labels(self.current_formats, self.current_throughput(), deadline, max_size)
+        for index, text in enumerate(labels):
+            self.format_combo.setItemText(index, text)
+
+    def start_playlist_listing(self, url):
+        """Bắt đầu liệt kê video của playlist/kênh, kết quả được thêm dần vào danh sách"""
+        # Lô trễ của playlist trước không được thêm vào danh sách mới
+        self.retire_playlist_thread()
+        
+        self.playlist_list.clear()
+        self.current_collection_url = url
+        self.current_collection_title = ""
+        self.playlist_title_label.setText("Playlist: Đang tải...")
+        self.range_start_spin.setRange(1, 1)
+        self.range_end_spin.setRange(1, 1)
+        self.playlist_group.setVisible(True)
+        self.stop_listing_button.setEnabled(True)
+        self.download_button.setEnabled(False)
+        
+        self.playlist_thread = PlaylistEnumThread(url)
+        self.playlist_thread.playlist_info.connect(self.update_playlist_info)
+        self.playlist_thread.entries_ready.connect(self.add_playlist_entries)
+        self.playlist_thread.finished_listing.connect(self.playlist_listing_finished)
+        self.playlist_thread.error.connect(self.handle_playlist_error)
+        self.playlist_thread.progress.connect(self.update_status)
+        self.playlist_thread.start()
+        
+        self.status_bar.showMessage("Đang liệt kê video trong playlist/kênh...")
+
+    def retire_playlist_thread(self):
+        """Dừng và ngắt kết nối thread liệt kê hiện tại mà không chờ nó kết thúc"""
+        if self.playlist_thread is not None:
+            _retire_playlist_thread(self.playlist_thread)
+            self.playlist_thread = None
+        self.stop_listing_button.setEnabled(False)
+
+    def stop_playlist_listing(self):
+        """Dừng liệt kê (các video đã liệt kê vẫn được giữ lại)"""
+        if self.playlist_thread and self.playlist_thread.isRunning():
+            self.playlist_thread.stop()
+        self.stop_listing_button.setEnabled(False)
+
+    def update_playlist_info(self, title, uploader):
+        self.current_collection_title = title
+        text = f"Playlist: {title}"
+        if uploader:
+            text += f" - {uploader}"
+        self.playlist_title_label.setText(text)
+
+    def add_playlist_entries(self, entries):
+        """Thêm một lô video vào danh sách (mặc định được chọn)"""
+        self.playlist_list.setUpdatesEnabled(False)
+        for entry in entries:
+            label = f"{entry['index']}. {entry['title']}"
+            if entry['duration']:
+                label += f"  [{format_time(entry['duration'])}]"
+            item = QListWidgetItem(label)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            item.setData(Qt.UserRole, entry['url'])
+            self.playlist_list.addItem(item)
+        self.playlist_list.setUpdatesEnabled(True)
+        
+        count = self.playlist_list.count()
+        follow_end = self.range_end_spin.value() == self.range_end_spin.maximum()
+        self.range_start_spin.setRange(1, count)
+        self.range_end_spin.setRange(1, count)
+        if follow_end:
+            self.range_end_spin.setValue(count)
+
+    def playlist_listing_finished(self, count):
+        self.stop_listing_button.setEnabled(False)
+        self.status_bar.showMessage(f"Đã liệt kê {count} video")
+
+    def handle_playlist_error(self, error):
+        self.stop_listing_button.setEnabled(False)
+        self.status_bar.showMessage(error)
+        if self.playlist_list.count() == 0:
+            QMessageBox.critical(self, "Lỗi", f"Không thể liệt kê playlist: {error}")
+
+    def select_playlist_range(self):
+        """Chỉ chọn các video trong khoảng đã nhập"""
+        start = self.range_start_spin.value()
+        end = self.range_end_spin.value()
+        if start > end:
+            start, end = end, start
+        for row in range(self.playlist_list.count()):
+            in_range = start - 1 <= row <= end - 1
+            self.playlist_list.item(row).setCheckState(Qt.Checked if in_range else Qt.Unchecked)
+
+    def set_all_playlist_checked(self, checked):
+        state = Qt.Checked if checked else Qt.Unchecked
+        for row in range(self.playlist_list.count()):
+            self.playlist_list.item(row).setCheckState(state)
+
+    def download_playlist_selection(self):
+        """Đưa các video đã chọn vào hàng đợi tải song song"""
+        urls = []
+        for row in range(self.playlist_list.count()):
+            item = self.playlist_list.item(row)
+            if item.checkState() == Qt.Checked:
+                urls.append(item.data(Qt.UserRole))
+        
+        if not urls:
+            QMessageBox.warning(self, "Lỗi", "Vui lòng chọn ít nhất một video")
+            return
+        
+        # Check write permission on output directory
+        try:
+            test_file = os.path.join(self.output_path, ".write_test")
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi quyền truy cập", 
+                f"Không thể ghi vào thư mục đầu ra: {self.output_path}\nLỗi: {str(e)}")
+            return
+        
+        format_id = self.playlist_format_combo.currentData()
+        output_path = self.output_path
+        DownloadQueue.get_instance().enqueue_many(
+            (url, lambda url=url: DownloadThread(url, format_id, output_path)) for url in urls
+        )
+        self.status_bar.showMessage(f"Đã thêm {len(urls)} video vào hàng đợi tải xuống")
+
+    def subscribe_current_collection(self):
+        """Theo dõi playlist/kênh đang hiển thị, lần đồng bộ sau chỉ tải video mới"""
+        if not self.current_collection_url:
+            return
+        from utils.subscriptions import SubscriptionManager
+        manager = SubscriptionManager.get_instance()
+        subscription_id = manager.add_subscription(self.current_collection_url,
+                                                   self.current_collection_title,
+                                                   self.playlist_format_combo.currentData(),
+                                                   self.output_path)
+        # Lần đồng bộ đầu chỉ ghi nhận các video hiện có
+        manager.sync([subscription_id])
+        self.status_bar.showMessage("Đã theo dõi. Các video đăng sau này sẽ được tải khi đồng bộ")
+
+    def open_subscriptions(self):
+        from ui.subscriptions_dialog import SubscriptionsDialog
+        dialog = SubscriptionsDialog(self)
+        dialog.exec_()
+
+    def update_queue_status(self, pending, running, finished):
+        if pending or running:
+            self.queue_status_label.setText(
+                f"Hàng đợi: {running} đang tải, {pending} đang chờ, {finished} đã xong")
+        else:
+            self.queue_status_label.setText(f"Hàng đợi trống ({finished} video đã xử lý)")
+
     def handle_info_error(self, error):
         """Handle errors during info fetching"""
         self.thumbnail_label.setText("Không thể tải thông tin video")
@@ -1623,7 +2100,14 @@ class YouTubeDownloaderWindow(QMainWindow):
             self.cancel_button.setVisible(True)
         
         # Create and start download thread
-        self.download_thread = DownloadThread(url, format_id, self.output_path)
+        selected_format = {}
+        if 0 <= self.format_combo.currentIndex() < len(self.current_formats):
+            selected_format = self.current_formats[self.format_combo.currentIndex()]
+        if selected_format.get('is_auto'):
+            selected_format = self.resolve_auto_format() or {}
+            format_id = selected_format.get('format_id', 'bestvideo+bestaudio/best')
+        remux_only = selected_format.get('needs_transcode') is False
+        self.download_thread = DownloadThread(url, format_id, self.output_path, remux_only=remux_only)
         self.download_thread.progress_signal.connect(self.update_download_progress)
         self.download_thread.finished_signal.connect(self.download_finished)
         self.download_thread.error_signal.connect(self.download_error)
@@ -1755,7 +2239,9 @@ class YouTubeDownloaderWindow(QMainWindow):
         # Only stop the info thread which is just for UI updates
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
+        
+        self.retire_playlist_thread()
         
         # Navigate back to main menu
         from ui.main_menu import MainMenu
@@ -1768,7 +2254,15 @@ class YouTubeDownloaderWindow(QMainWindow):
         # Stop running threads
         if self.info_thread and self.info_thread.isRunning():
             self.info_thread.stop()
-            self.info_thread.wait()
+        self.info_requests.cancel()
+        
+        self.prefetcher.forget(self)
+        try:
+            self.bandwidth.throughput_changed.disconnect(self.refresh_quality_predictions)
+        except TypeError:
+            pass
+        
+        self.retire_playlist_thread()
         
         if not self.returning_to_hub:
             # Only pause downloads if actually closing the app, not returning to hub
@@ -3,11 +3,10 @@ Utility modules for KHyTool.
 This package contains utility functions and classes used throughout the application.
 """
 
-# Run thumbnail cleanup check at startup
+# Reconcile the thumbnail index with the thumbnails folder in the background
 try:
-    from utils.helpers import check_and_clean_thumbnails
-    # Schedule thumbnail cleanup check
-    check_and_clean_thumbnails()
+    from utils.thumbnail_store import ThumbnailIndex
+    ThumbnailIndex.get_instance().start_reconcile()
 except ImportError:
     # This will happen during early imports, so we can ignore it
     pass
@@ -0,0 +1,202 @@
+"""
+Measured download throughput per host, and quality selection against a
+deadline or size budget.
+
+Download threads feed their yt-dlp progress dicts to
+``BandwidthEstimator.observe``. Each finished stream updates an EWMA of the
+throughput for the page host (youtube.com, tiktok.com, ...), which is what
+the windows know before a download starts. Results are kept in
+``bandwidth.json`` in the data directory; ``throughput_changed`` lets an
+open window re-evaluate its predictions while the user is still choosing.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.fragment_tuner import host_key
+from utils.helpers import get_data_dir
+
+EWMA_ALPHA = 0.4
+MIN_SAMPLE_BYTES = 512 * 1024
+MIN_SAMPLE_SECONDS = 1.0
+# Sau thời gian này phép đo cũ ít đáng tin, mẫu mới được tính nặng hơn
+STALE_SECONDS = 24 * 3600
+# Chỉ báo thay đổi khi tốc độ lệch đáng kể so với lần báo trước
+CHANGE_THRESHOLD = 0.15
+
+# Mục "Tự động" đặt đầu danh sách chất lượng của các cửa sổ tải
+AUTO_FORMAT = {'format_id': 'auto', 'display_name': 'Tự động theo thời hạn', 'is_auto': True}
+
+
+class BandwidthEstimator(QObject):
+    """Per-host throughput, shared by all download threads"""
+    throughput_changed = pyqtSignal(str)  # host
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = BandwidthEstimator()
+        return cls._instance
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__()
+        self.path = path or os.path.join(get_data_dir(), "bandwidth.json")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._hosts: Dict[str, dict] = {}  # host -> {'bps', 'updated', 'reported'}
+        self._streams: Dict[str, dict] = {}  # filename -> {'start', 'start_bytes'}
+        self._load()
+
+    def estimate(self, url: str) -> Optional[float]:
+        """Recent throughput in bytes/s for the host of url, or None if never measured"""
+        with self._lock:
+            record = self._hosts.get(host_key(url))
+            return record['bps'] if record else None
+
+    def observe(self, url: str, d: Dict) -> None:
+        """Call from a yt-dlp progress hook of a download of url"""
+        filename = d.get('filename') or ''
+        status = d.get('status')
+        with self._lock:
+            stream = self._streams.get(filename)
+            if status == 'downloading' and stream is None:
+                self._streams[filename] = {'start': time.time(),
+                                           'start_bytes': d.get('downloaded_bytes') or 0}
+                return
+            if status not in ('finished', 'error') or stream is None:
+                return
+            del self._streams[filename]
+        if status == 'finished':
+            size = (d.get('total_bytes') or d.get('downloaded_bytes') or 0) - stream['start_bytes']
+            self.record(url, size, time.time() - stream['start'])
+
+    def record(self, url: str, size: int, seconds: float) -> None:
+        if size < MIN_SAMPLE_BYTES or seconds < MIN_SAMPLE_SECONDS:
+            return
+        host = host_key(url)
+        sample = size / seconds
+        with self._lock:
+            record = self._hosts.get(host)
+            if record is None or time.time() - record['updated'] > STALE_SECONDS:
+                bps = sample
+                reported = record['reported'] if record else None
+            else:
+                bps = EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * record['bps']
+                reported = record['reported']
+            changed = not reported or abs(bps - reported) / reported >= CHANGE_THRESHOLD
+            self._hosts[host] = {'bps': bps, 'updated': time.time(),
+                                 'reported': bps if changed else reported}
+        self._save()
+        if changed:
+            self.throughput_changed.emit(host)
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._hosts = json.load(f)
+        except Exception as e:
+            print(f"Error loading bandwidth data: {str(e)}")
+            self._hosts = {}
+
+    def _save(self):
+        try:
+            # Chụp dữ liệu trong _save_lock để bản cũ không ghi đè bản mới hơn
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._hosts, indent=2)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving bandwidth data: {str(e)}")
+
+
+def predict_seconds(size: int, bytes_per_second: Optional[float]) -> Optional[float]:
+    if not size or not bytes_per_second:
+        return None
+    return size / bytes_per_second
+
+
+def choose_for_deadline(formats: List[Dict], bytes_per_second: Optional[float],
+                        deadline_seconds: Optional[float] = None,
+                        max_size: Optional[int] = None) -> Optional[Dict]:
+    """
+    Highest-resolution video format (dicts from FormatChoice.to_format_dict)
+    that finishes within deadline_seconds and fits in max_size. Falls back to
+    the smallest one when nothing fits.
+
+    Without a throughput measurement (bytes_per_second is None) the deadline
+    cannot be checked and is ignored: only max_size limits the choice, so the
+    best quality within the size budget is returned. quality_labels() marks
+    that case with "(chưa đo tốc độ)".
+    """
+    candidates = [f for f in formats
+                  if not f.get('is_audio') and not f.get('is_auto') and f.get('estimated_size')]
+    if not candidates:
+        return None
+
+    def fits(fmt):
+        size = fmt['estimated_size']
+        if max_size and size > max_size:
+            return False
+        if deadline_seconds and bytes_per_second:
+            return size / bytes_per_second <= deadline_seconds
+        return True
+
+    fitting = [f for f in candidates if fits(f)]
+    if fitting:
+        # Cùng độ phân giải: ưu tiên lựa chọn không cần chuyển mã rồi tới dung lượng lớn hơn
+        return max(fitting, key=lambda f: (f.get('height') or 0, not f.get('needs_transcode'),
+                                           f['estimated_size']))
+    return min(candidates, key=lambda f: f['estimated_size'])
+
+
+def quality_labels(formats: List[Dict], bytes_per_second: Optional[float],
+                   deadline_seconds: Optional[float] = None,
+                   max_size: Optional[int] = None) -> List[str]:
+    """
+    Combo box texts for formats: the predicted download time of each format
+    (flagged when it misses the deadline), and for the AUTO_FORMAT entry the
+    format it currently resolves to.
+    """
+    labels = []
+    for fmt in formats:
+        text = fmt['display_name']
+        if fmt.get('is_auto'):
+            target = choose_for_deadline(formats, bytes_per_second, deadline_seconds, max_size)
+            if target:
+                text += f" → {target.get('height') or ''}p"
+                seconds = predict_seconds(target.get('estimated_size'), bytes_per_second)
+                if seconds is not None:
+                    text += f" (~{format_eta(seconds)})"
+                elif not bytes_per_second:
+                    text += " (chưa đo tốc độ)"
+        else:
+            seconds = predict_seconds(fmt.get('estimated_size'), bytes_per_second)
+            if seconds is not None:
+                text += f" · ~{format_eta(seconds)}"
+                if deadline_seconds and seconds > deadline_seconds:
+                    text += " (quá thời hạn)"
+        labels.append(text)
+    return labels
+
+
+def format_eta(seconds: float) -> str:
+    """45s, 3m 20s, 1h 5m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
@@ -0,0 +1,160 @@
+"""
+Cancellation tokens for download threads.
+
+A ``CancellationToken`` replaces the ``should_stop``/``is_cancelled`` flags
+that were only checked between chunks. Cancelling it:
+
+* runs the registered closers right away (open HTTP responses are closed,
+  which interrupts a blocked socket read),
+* terminates child processes started by yt-dlp (FFmpeg merges and
+  post-processing, external downloaders) on the thread the token is bound
+  to, killing them if they are still alive after ``PROCESS_KILL_GRACE``
+  seconds,
+* makes ``raise_if_cancelled()`` raise ``DownloadCancelled`` at the next
+  checkpoint (yt-dlp progress hooks, segment loops).
+
+yt-dlp's own sockets cannot be closed from outside, so ``apply_ydl_options``
+caps ``socket_timeout`` to bound how long a stalled read can delay a cancel.
+``cancel(pause=True)`` marks the cancel as a pause: partial data is kept so
+the download can be resumed later.
+"""
+import subprocess
+import threading
+from typing import Callable, Dict
+
+PROCESS_KILL_GRACE = 3  # giây chờ sau terminate() trước khi kill()
+YDL_SOCKET_TIMEOUT = 15  # giây, thời gian tối đa một lần đọc socket bị treo
+
+
+class DownloadCancelled(Exception):
+    """Raised inside a download when its token is cancelled"""
+
+    def __init__(self, paused: bool = False):
+        super().__init__("Download paused" if paused else "Download cancelled")
+        self.paused = paused
+
+
+_bound = threading.local()
+
+
+def current_token():
+    """Token bound to the calling thread, or None"""
+    return getattr(_bound, 'token', None)
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._closers: Dict[int, Callable[[], None]] = {}
+        self._next_handle = 0
+        self.paused = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, pause: bool = False) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.paused = pause
+            self._event.set()
+            closers = list(self._closers.values())
+            self._closers.clear()
+        for closer in closers:
+            try:
+                closer()
+            except Exception as e:
+                print(f"Error while cancelling download: {str(e)}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise DownloadCancelled(self.paused)
+
+    def wait(self, seconds: float) -> bool:
+        """Interruptible sleep; True if the token was cancelled meanwhile"""
+        return self._event.wait(seconds)
+
+    def on_cancel(self, closer: Callable[[], None]) -> int:
+        """Run closer when the token is cancelled (immediately if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                handle = self._next_handle
+                self._next_handle += 1
+                self._closers[handle] = closer
+                return handle
+        closer()
+        return -1
+
+    def remove(self, handle: int) -> None:
+        with self._lock:
+            self._closers.pop(handle, None)
+
+    # === Thread binding (child process tracking) ===
+
+    def bind(self) -> None:
+        """Bind to the calling thread so the processes it starts are stopped on cancel"""
+        install_process_tracking()
+        _bound.token = self
+
+    def unbind(self) -> None:
+        if getattr(_bound, 'token', None) is self:
+            _bound.token = None
+
+    def track_process(self, process: subprocess.Popen) -> None:
+        handle = self.on_cancel(lambda: _stop_process(process))
+        # Bỏ đăng ký khi tiến trình kết thúc bình thường
+        threading.Thread(target=lambda: (process.wait(), self.remove(handle)), daemon=True).start()
+
+    def apply_ydl_options(self, ydl_opts: Dict) -> Dict:
+        ydl_opts['socket_timeout'] = min(ydl_opts.get('socket_timeout') or YDL_SOCKET_TIMEOUT,
+                                         YDL_SOCKET_TIMEOUT)
+        return ydl_opts
+
+
+def _stop_process(process):
+    if process.poll() is not None:
+        return
+    try:
+        process.terminate()
+    except OSError:
+        return
+
+    def kill_later():
+        try:
+            process.wait(PROCESS_KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    threading.Thread(target=kill_later, daemon=True).start()
+
+
+_tracking_installed = False
+_tracking_lock = threading.Lock()
+
+
+def install_process_tracking() -> None:
+    """Make yt-dlp's Popen register its processes with the thread's token"""
+    global _tracking_installed
+    with _tracking_lock:
+        if _tracking_installed:
+            return
+        _tracking_installed = True
+        try:
+            from yt_dlp.utils import Popen
+        except ImportError:
+            return
+
+        original_init = Popen.__init__
+
+        def tracked_init(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            token = current_token()
+            if token is not None:
+                token.track_process(self)
+
+        Popen.__init__ = tracked_init
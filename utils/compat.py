@@ -7,6 +7,7 @@ import sys
 import logging
 import shutil
 import subprocess
+import threading
 from pathlib import Path
 
 # Set up logging
@@ -121,5 +122,17 @@ def init_compatibility():
         logger.warning("Compatibility layer initialization incomplete")
         return False
 
-# Run initialization when module is imported
-init_result = init_compatibility()
+# Initialization is no longer run at import time: it imports yt-dlp and spawns
+# ffmpeg, which used to delay the first window. main.py starts it in the
+# background after the main menu is shown; windows that need it call
+# ensure_initialized(), which waits for a run in progress instead of repeating it.
+init_result = None
+_init_lock = threading.Lock()
+
+def ensure_initialized():
+    """Run init_compatibility once per session and return its result"""
+    global init_result
+    with _init_lock:
+        if init_result is None:
+            init_result = init_compatibility()
+    return init_result
@@ -55,7 +55,11 @@ class ConfigManager:
                 "theme": "light",
                 "check_updates": True,
                 "first_run": True,
-                "auto_reload_projects": True  # Add auto-reload setting
+                "auto_reload_projects": True,  # Add auto-reload setting
+                "stall_watchdog": {
+                    "enabled": False,
+                    "threshold_ms": 500
+                }
             },
             "directories": {
                 "projects_dir": os.path.join(os.path.expanduser("~"), "KHyTool Projects"),
@@ -83,8 +87,27 @@ class ConfigManager:
                 "thumbnail_cleanup": {
                     "enabled": True,
                     "max_age_days": 7,
-                    "max_count": 500,
-                    "last_cleanup": None
+                    "max_size_mb": 50
+                },
+                "ytdlp_cache": {
+                    "max_size_mb": 200,
+                    "warm_on_startup": True
+                },
+                "prefetch": {
+                    "enabled": False
+                },
+                "subscriptions": {
+                    "auto_sync": False,
+                    "interval_hours": 24,
+                    "max_parallel": 4
+                },
+                "backends": {
+                    "default": "auto",
+                    "hosts": {}
+                },
+                "auto_quality": {
+                    "deadline_minutes": 10,
+                    "max_size_mb": 0
                 }
             },
             "audio_separator": {
@@ -362,29 +385,150 @@ class ConfigManager:
         self.save()
     
     @property
-    def thumbnail_max_count(self) -> int:
-        """Get maximum number of thumbnails to keep"""
-        return self.get("downloader", "thumbnail_cleanup", {}).get("max_count", 500)
+    def thumbnail_max_size_mb(self) -> int:
+        """Get the byte budget (MB) of the thumbnails folder"""
+        return self.get("downloader", "thumbnail_cleanup", {}).get("max_size_mb", 50)
     
-    @thumbnail_max_count.setter
-    def thumbnail_max_count(self, value: int) -> None:
-        """Set maximum number of thumbnails to keep"""
+    @thumbnail_max_size_mb.setter
+    def thumbnail_max_size_mb(self, value: int) -> None:
+        """Set the byte budget (MB) of the thumbnails folder"""
         if "thumbnail_cleanup" not in self._config.get("downloader", {}):
             self._config["downloader"]["thumbnail_cleanup"] = {}
-        self._config["downloader"]["thumbnail_cleanup"]["max_count"] = value
+        self._config["downloader"]["thumbnail_cleanup"]["max_size_mb"] = value
         self.save()
     
+    # yt-dlp cache settings
     @property
-    def thumbnail_last_cleanup(self) -> float:
-        """Get timestamp of last thumbnail cleanup"""
-        return self.get("downloader", "thumbnail_cleanup", {}).get("last_cleanup")
+    def ytdlp_cache_max_size_mb(self) -> int:
+        """Get maximum size in MB of the yt-dlp cache directory"""
+        return self.get("downloader", "ytdlp_cache", {}).get("max_size_mb", 200)
+    
+    @ytdlp_cache_max_size_mb.setter
+    def ytdlp_cache_max_size_mb(self, value: int) -> None:
+        """Set maximum size in MB of the yt-dlp cache directory"""
+        if "ytdlp_cache" not in self._config.get("downloader", {}):
+            self._config["downloader"]["ytdlp_cache"] = {}
+        self._config["downloader"]["ytdlp_cache"]["max_size_mb"] = value
+        self.save()
     
-    @thumbnail_last_cleanup.setter
-    def thumbnail_last_cleanup(self, value: float) -> None:
-        """Set timestamp of last thumbnail cleanup"""
-        if "thumbnail_cleanup" not in self._config.get("downloader", {}):
-            self._config["downloader"]["thumbnail_cleanup"] = {}
-        self._config["downloader"]["thumbnail_cleanup"]["last_cleanup"] = value
+    @property
+    def ytdlp_cache_warm_on_startup(self) -> bool:
+        """Get if the yt-dlp cache should be warmed up at startup"""
+        return self.get("downloader", "ytdlp_cache", {}).get("warm_on_startup", True)
+    
+    @ytdlp_cache_warm_on_startup.setter
+    def ytdlp_cache_warm_on_startup(self, value: bool) -> None:
+        """Set if the yt-dlp cache should be warmed up at startup"""
+        if "ytdlp_cache" not in self._config.get("downloader", {}):
+            self._config["downloader"]["ytdlp_cache"] = {}
+        self._config["downloader"]["ytdlp_cache"]["warm_on_startup"] = value
+        self.save()
+    
+    @property
+    def prefetch_enabled(self) -> bool:
+        """Get if video info should be prefetched from the clipboard and link fields"""
+        return self.get("downloader", "prefetch", {}).get("enabled", False)
+    
+    @prefetch_enabled.setter
+    def prefetch_enabled(self, value: bool) -> None:
+        """Set if video info should be prefetched from the clipboard and link fields"""
+        if "prefetch" not in self._config.get("downloader", {}):
+            self._config["downloader"]["prefetch"] = {}
+        self._config["downloader"]["prefetch"]["enabled"] = value
+        self.save()
+    
+    @property
+    def subscriptions_auto_sync(self) -> bool:
+        """Get if subscriptions are synced automatically on a schedule"""
+        return self.get("downloader", "subscriptions", {}).get("auto_sync", False)
+    
+    @subscriptions_auto_sync.setter
+    def subscriptions_auto_sync(self, value: bool) -> None:
+        """Set if subscriptions are synced automatically on a schedule"""
+        if "subscriptions" not in self._config.get("downloader", {}):
+            self._config["downloader"]["subscriptions"] = {}
+        self._config["downloader"]["subscriptions"]["auto_sync"] = value
+        self.save()
+    
+    @property
+    def subscriptions_interval_hours(self) -> int:
+        """Get hours between scheduled subscription syncs"""
+        return self.get("downloader", "subscriptions", {}).get("interval_hours", 24)
+    
+    @subscriptions_interval_hours.setter
+    def subscriptions_interval_hours(self, value: int) -> None:
+        """Set hours between scheduled subscription syncs"""
+        if "subscriptions" not in self._config.get("downloader", {}):
+            self._config["downloader"]["subscriptions"] = {}
+        self._config["downloader"]["subscriptions"]["interval_hours"] = value
+        self.save()
+    
+    @property
+    def subscriptions_max_parallel(self) -> int:
+        """Get maximum number of subscriptions synced at the same time"""
+        return self.get("downloader", "subscriptions", {}).get("max_parallel", 4)
+    
+    @subscriptions_max_parallel.setter
+    def subscriptions_max_parallel(self, value: int) -> None:
+        """Set maximum number of subscriptions synced at the same time"""
+        if "subscriptions" not in self._config.get("downloader", {}):
+            self._config["downloader"]["subscriptions"] = {}
+        self._config["downloader"]["subscriptions"]["max_parallel"] = value
+        self.save()
+    
+    @property
+    def download_backend(self) -> str:
+        """Get preferred download engine ("auto", "native", "aria2c", "curl")"""
+        return self.get("downloader", "backends", {}).get("default", "auto")
+    
+    @download_backend.setter
+    def download_backend(self, value: str) -> None:
+        """Set preferred download engine ("auto", "native", "aria2c", "curl")"""
+        if "backends" not in self._config.get("downloader", {}):
+            self._config["downloader"]["backends"] = {}
+        self._config["downloader"]["backends"]["default"] = value
+        self.save()
+    
+    @property
+    def download_backend_hosts(self) -> dict:
+        """Get per-host download engine overrides (host -> engine name)"""
+        return self.get("downloader", "backends", {}).get("hosts", {})
+    
+    def set_download_backend_for_host(self, host: str, engine: Optional[str]) -> None:
+        """Set (or clear with None) the download engine used for a host"""
+        if "backends" not in self._config.get("downloader", {}):
+            self._config["downloader"]["backends"] = {}
+        hosts = self._config["downloader"]["backends"].setdefault("hosts", {})
+        if engine:
+            hosts[host] = engine
+        else:
+            hosts.pop(host, None)
+        self.save()
+    
+    @property
+    def auto_quality_deadline_minutes(self) -> int:
+        """Get the deadline used by the automatic quality choice"""
+        return self.get("downloader", "auto_quality", {}).get("deadline_minutes", 10)
+    
+    @auto_quality_deadline_minutes.setter
+    def auto_quality_deadline_minutes(self, value: int) -> None:
+        """Set the deadline used by the automatic quality choice"""
+        if "auto_quality" not in self._config.get("downloader", {}):
+            self._config["downloader"]["auto_quality"] = {}
+        self._config["downloader"]["auto_quality"]["deadline_minutes"] = value
+        self.save()
+    
+    @property
+    def auto_quality_max_size_mb(self) -> int:
+        """Get the size budget of the automatic quality choice (0 = no limit)"""
+        return self.get("downloader", "auto_quality", {}).get("max_size_mb", 0)
+    
+    @auto_quality_max_size_mb.setter
+    def auto_quality_max_size_mb(self, value: int) -> None:
+        """Set the size budget of the automatic quality choice (0 = no limit)"""
+        if "auto_quality" not in self._config.get("downloader", {}):
+            self._config["downloader"]["auto_quality"] = {}
+        self._config["downloader"]["auto_quality"]["max_size_mb"] = value
         self.save()
     
     # Auto-reload setting
@@ -398,6 +542,33 @@ class ConfigManager:
         """Set if projects should auto-reload when files change"""
         self.set("general", "auto_reload_projects", value)
         self.save()
+    
+    # Stall watchdog settings
+    @property
+    def stall_watchdog_enabled(self) -> bool:
+        """Get if event-loop stalls should be detected and reported"""
+        return self.get("general", "stall_watchdog", {}).get("enabled", False)
+    
+    @stall_watchdog_enabled.setter
+    def stall_watchdog_enabled(self, value: bool) -> None:
+        """Set if event-loop stalls should be detected and reported"""
+        if "stall_watchdog" not in self._config.get("general", {}):
+            self._config["general"]["stall_watchdog"] = {}
+        self._config["general"]["stall_watchdog"]["enabled"] = value
+        self.save()
+    
+    @property
+    def stall_watchdog_threshold_ms(self) -> int:
+        """Get how long the event loop may block before it counts as a stall"""
+        return self.get("general", "stall_watchdog", {}).get("threshold_ms", 500)
+    
+    @stall_watchdog_threshold_ms.setter
+    def stall_watchdog_threshold_ms(self, value: int) -> None:
+        """Set how long the event loop may block before it counts as a stall"""
+        if "stall_watchdog" not in self._config.get("general", {}):
+            self._config["general"]["stall_watchdog"] = {}
+        self._config["general"]["stall_watchdog"]["threshold_ms"] = value
+        self.save()
 
 # Ví dụ sử dụng:
 # config = ConfigManager.get_instance()
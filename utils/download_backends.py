@@ -0,0 +1,564 @@
+"""
+Download engines and per-host/protocol engine selection.
+
+Engines:
+    native     yt-dlp's built-in HTTP/fragment downloader (always available)
+    aria2c     external multi-connection downloader, used through yt-dlp's
+               ``external_downloader`` when aria2c is on PATH
+    curl       external single-connection downloader (manual choice only)
+    segmented  the app's own multi-connection Range downloader, used for
+               direct media URLs the app downloads itself (Facebook direct
+               links); yt-dlp has no hook for third-party engines
+
+``choose_plan(url)`` picks an engine for each yt-dlp protocol group. HLS/DASH
+stay on the native downloader, which already fetches fragments concurrently
+(see fragment_tuner). A per-host override can be set in the configuration
+(``downloader.backends``). The plan records which engines actually ran so
+the download history can show it.
+
+Run ``python -m utils.download_backends [size_mb]`` to benchmark the
+available engines against a local test server.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.cancellation import CancellationToken, DownloadCancelled
+from utils.fragment_tuner import host_key
+
+ENGINE_NATIVE = 'native'
+ENGINE_ARIA2C = 'aria2c'
+ENGINE_CURL = 'curl'
+ENGINE_SEGMENTED = 'segmented'
+
+# yt-dlp protocol -> key used in the external_downloader dict
+PROTOCOL_GROUPS = {
+    'http': 'http', 'https': 'http',
+    'http_dash_segments': 'dash', 'http_dash_segments_generator': 'dash',
+    'm3u8': 'm3u8', 'm3u8_native': 'm3u8',
+}
+
+
+class DownloaderBackend:
+    """A download engine"""
+    name = None
+    protocols = ()  # yt-dlp protocol groups the engine can handle
+    executable = None  # external program that has to be on PATH
+    ytdlp_external = False  # selected through yt-dlp's external_downloader option
+    direct_only = False  # only for URLs the app downloads itself
+
+    def is_available(self) -> bool:
+        return self.executable is None or shutil.which(self.executable) is not None
+
+    def ytdlp_args(self) -> List[str]:
+        return []
+
+
+class NativeBackend(DownloaderBackend):
+    name = ENGINE_NATIVE
+    protocols = ('http', 'dash', 'm3u8')
+
+
+class Aria2cBackend(DownloaderBackend):
+    name = ENGINE_ARIA2C
+    protocols = ('http',)
+    executable = 'aria2c'
+    ytdlp_external = True
+
+    def ytdlp_args(self):
+        return ['--retry-wait=2', '--split=16', '--max-connection-per-server=16', '--min-split-size=1M']
+
+
+class CurlBackend(DownloaderBackend):
+    name = ENGINE_CURL
+    protocols = ('http',)
+    executable = 'curl'
+    ytdlp_external = True
+
+    def ytdlp_args(self):
+        return ['--retry', '3']
+
+
+class SegmentedBackend(DownloaderBackend):
+    name = ENGINE_SEGMENTED
+    protocols = ('http',)
+    direct_only = True
+
+
+BACKENDS = {backend.name: backend for backend in
+            (NativeBackend(), Aria2cBackend(), CurlBackend(), SegmentedBackend())}
+
+# Thứ tự ưu tiên khi chọn tự động (curl không nhanh hơn native nên không được chọn tự động)
+AUTO_PREFERENCE = {
+    'http': [ENGINE_ARIA2C, ENGINE_NATIVE],
+    'dash': [ENGINE_NATIVE],
+    'm3u8': [ENGINE_NATIVE],
+}
+DIRECT_AUTO_PREFERENCE = [ENGINE_SEGMENTED]
+
+_availability = {}
+_availability_lock = threading.Lock()
+
+
+def is_engine_available(name: str) -> bool:
+    """Detect (once per session) whether an engine can run here"""
+    with _availability_lock:
+        if name not in _availability:
+            backend = BACKENDS.get(name)
+            _availability[name] = bool(backend and backend.is_available())
+        return _availability[name]
+
+
+def available_engines() -> List[str]:
+    return [name for name in BACKENDS if is_engine_available(name)]
+
+
+def refresh_availability() -> None:
+    with _availability_lock:
+        _availability.clear()
+
+
+class DownloadPlan:
+    """Engines chosen for one download, per yt-dlp protocol group"""
+
+    def __init__(self, host: str, engines: Dict[str, str], direct_engine: str = ENGINE_SEGMENTED):
+        self.host = host
+        self.engines = engines  # protocol group -> engine name
+        self.direct_engine = direct_engine
+        self.engines_used = []
+
+    def apply(self, ydl_opts: Dict) -> Dict:
+        """Set yt-dlp's external_downloader options for the chosen engines"""
+        external = {}
+        external_args = {}
+        for group, name in self.engines.items():
+            backend = BACKENDS[name]
+            if backend.ytdlp_external:
+                external[group] = name
+                external_args[name] = backend.ytdlp_args()
+        ydl_opts.pop('external_downloader', None)
+        ydl_opts.pop('external_downloader_args', None)
+        if external:
+            ydl_opts['external_downloader'] = external
+            ydl_opts['external_downloader_args'] = external_args
+        return ydl_opts
+
+    def engine_for_protocol(self, protocol: Optional[str]) -> str:
+        group = PROTOCOL_GROUPS.get(protocol or 'https', 'http')
+        return self.engines.get(group, ENGINE_NATIVE)
+
+    def note_engine(self, name: str) -> None:
+        if name and name not in self.engines_used:
+            self.engines_used.append(name)
+
+    def note_progress(self, d: Dict) -> None:
+        """Call from a yt-dlp progress hook to record the engine that handled the stream"""
+        info = d.get('info_dict') or {}
+        for protocol in (info.get('protocol') or 'https').split('+'):
+            self.note_engine(self.engine_for_protocol(protocol))
+
+    @property
+    def engine_label(self) -> str:
+        return '+'.join(self.engines_used) if self.engines_used else ENGINE_NATIVE
+
+
+def _configured_engine(host: str) -> str:
+    try:
+        from utils.config_manager import ConfigManager
+        config = ConfigManager.get_instance()
+        return config.download_backend_hosts.get(host) or config.download_backend
+    except Exception as e:
+        print(f"Error reading download backend settings: {str(e)}")
+        return 'auto'
+
+
+def choose_plan(url: str) -> DownloadPlan:
+    """Pick an engine per protocol group for a download of url"""
+    host = host_key(url)
+    preferred = _configured_engine(host)
+
+    engines = {}
+    for group, auto_order in AUTO_PREFERENCE.items():
+        order = auto_order
+        backend = BACKENDS.get(preferred)
+        if backend and group in backend.protocols and not backend.direct_only:
+            order = [preferred] + auto_order
+        engines[group] = next((name for name in order if is_engine_available(name)), ENGINE_NATIVE)
+
+    direct_order = DIRECT_AUTO_PREFERENCE
+    if preferred == ENGINE_NATIVE:
+        direct_order = [ENGINE_NATIVE]  # một kết nối
+    return DownloadPlan(host, engines, direct_order[0])
+
+
+class SegmentedDownloader:
+    """
+    Multi-connection HTTP downloader using Range requests.
+
+    Data goes to ``<output>.part`` and the per-segment positions to
+    ``<output>.part.json``, so a cancelled (paused) download continues from
+    the exact offsets on the next call. Falls back to a single stream, from
+    the start, when the server does not support ranges. Requests go through
+    the shared keep-alive session (utils.http_session) unless one is given,
+    so the probe, the segments and later downloads from the same host reuse
+    connections.
+    """
+    CHUNK_SIZE = 256 * 1024
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, url: str, output_path: str, headers: Optional[Dict] = None,
+                 connections: int = 8, min_segment_size: int = 1024 * 1024,
+                 verify: bool = True, timeout: int = 30, retries: int = 3,
+                 cancel_token: Optional[CancellationToken] = None, session=None):
+        self.url = url
+        self.output_path = output_path
+        self.part_path = output_path + '.part'
+        self.state_path = output_path + '.part.json'
+        self.headers = dict(headers or {})
+        self.headers.pop('Range', None)
+        self.connections = max(1, connections)
+        self.min_segment_size = min_segment_size
+        self.verify = verify
+        self.timeout = timeout
+        self.retries = retries
+        self.token = cancel_token or CancellationToken()
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._report_lock = threading.Lock()
+        self._downloaded = 0
+        self._total = 0
+        self._last_progress = 0
+        self._progress_callback = None
+        self._segments = []  # [start, end, position]
+        self._abort = threading.Event()  # một segment lỗi hẳn: dừng các segment khác
+
+    def download(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+        """Download to output_path; progress_callback(downloaded, total). Returns the size."""
+        if self.session is None:
+            from utils.http_session import get_session
+            self.session = get_session()
+
+        self._progress_callback = progress_callback
+        self.token.raise_if_cancelled()
+
+        total, supports_ranges = self._probe()
+        self._total = total
+        if not supports_ranges or not total:
+            return self._download_single()
+
+        self._segments = self._load_state(total) or self._plan_segments(total)
+        self._downloaded = sum(position - start for start, _, position in self._segments)
+        if not os.path.exists(self.part_path) or os.path.getsize(self.part_path) != total:
+            with open(self.part_path, 'ab') as f:
+                f.truncate(total)
+
+        pending = [segment for segment in self._segments if segment[2] <= segment[1]]
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                    futures = [pool.submit(self._download_segment, segment) for segment in pending]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except BaseException:
+                        self._abort.set()
+                        raise
+        except BaseException:
+            self._save_state()  # giữ vị trí các segment để tải tiếp
+            raise
+
+        os.replace(self.part_path, self.output_path)
+        self._remove_state()
+        self._report(force=True)
+        return total
+
+    def discard_partial(self) -> None:
+        """Delete the partial data (cancel without keeping it for a resume)"""
+        for path in (self.part_path, self.state_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _plan_segments(self, total):
+        segment_count = max(1, min(self.connections, total // self.min_segment_size))
+        segment_size = total // segment_count
+        segments = []
+        for i in range(segment_count):
+            start = i * segment_size
+            end = total - 1 if i == segment_count - 1 else start + segment_size - 1
+            segments.append([start, end, start])
+        return segments
+
+    def _load_state(self, total):
+        try:
+            if os.path.exists(self.state_path) and os.path.exists(self.part_path):
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('total') == total:
+                    return [list(segment) for segment in state['segments']]
+        except Exception as e:
+            print(f"Cannot resume {self.output_path}, starting over: {str(e)}")
+        return None
+
+    def _save_state(self):
+        if not self._segments:
+            return
+        try:
+            with self._lock:
+                data = json.dumps({'url': self.url, 'total': self._total, 'segments': self._segments})
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"Error saving download state: {str(e)}")
+
+    def _remove_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    def _probe(self):
+        """Return (size, supports_ranges)"""
+        headers = dict(self.headers, Range='bytes=0-0')
+        try:
+            with self.session.get(self.url, headers=headers, stream=True, verify=self.verify,
+                              timeout=self.timeout) as response:
+                if response.status_code == 206:
+                    content_range = response.headers.get('Content-Range', '')
+                    if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+                        return int(content_range.rsplit('/', 1)[1]), True
+                return int(response.headers.get('Content-Length') or 0), False
+        except Exception as e:
+            print(f"Range probe failed, using a single connection: {str(e)}")
+            return 0, False
+
+    def _open(self, headers):
+        """Streamed GET whose connection is closed as soon as the token is cancelled"""
+        response = self.session.get(self.url, headers=headers, stream=True, verify=self.verify,
+                               timeout=self.timeout)
+        handle = self.token.on_cancel(response.close)
+        return response, handle
+
+    def _download_single(self):
+        self._downloaded = 0
+        response, handle = self._open(self.headers)
+        try:
+            if response.status_code not in (200, 206):
+                raise Exception(f"HTTP Status {response.status_code}")
+            self._total = self._total or int(response.headers.get('Content-Length') or 0)
+            with open(self.part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                    self.token.raise_if_cancelled()
+                    if chunk:
+                        f.write(chunk)
+                        self._add_progress(len(chunk))
+        except Exception:
+            self.token.raise_if_cancelled()  # lỗi do đóng kết nối khi hủy
+            raise
+        finally:
+            self.token.remove(handle)
+            response.close()
+        self.token.raise_if_cancelled()
+        os.replace(self.part_path, self.output_path)
+        self._report(force=True)
+        return self._downloaded
+
+    def _download_segment(self, segment):
+        start, end, _ = segment
+        attempt = 0
+        with open(self.part_path, 'r+b') as f:
+            while segment[2] <= end and not self._abort.is_set():
+                self.token.raise_if_cancelled()
+                handle = None
+                response = None
+                try:
+                    headers = dict(self.headers, Range=f'bytes={segment[2]}-{end}')
+                    response, handle = self._open(headers)
+                    if response.status_code != 206:
+                        raise Exception(f"HTTP Status {response.status_code}")
+                    f.seek(segment[2])
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        self.token.raise_if_cancelled()
+                        if self._abort.is_set():
+                            return
+                        if not chunk:
+                            continue
+                        chunk = chunk[:end - segment[2] + 1]
+                        f.write(chunk)
+                        with self._lock:
+                            segment[2] += len(chunk)
+                        self._add_progress(len(chunk))
+                        if segment[2] > end:
+                            break
+                    if segment[2] <= end:
+                        raise Exception("Kết nối bị đóng trước khi tải xong segment")
+                except DownloadCancelled:
+                    raise
+                except Exception:
+                    self.token.raise_if_cancelled()  # lỗi do đóng kết nối khi hủy
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise
+                    f.flush()
+                    # tiếp tục từ vị trí đã tải, chờ có thể bị hủy ngang
+                    if self.token.wait(min(2 ** attempt, 10)):
+                        raise DownloadCancelled(self.token.paused)
+                finally:
+                    if handle is not None:
+                        self.token.remove(handle)
+                    if response is not None:
+                        response.close()
+
+    def _add_progress(self, size):
+        with self._lock:
+            self._downloaded += size
+        self._report()
+
+    def _report(self, force=False):
+        # Nhiều segment cùng báo tiến trình: chỉ một thread gọi callback mỗi lần
+        if not self._report_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.time()
+            if not force and now - self._last_progress < self.PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            if self._segments and not force:
+                self._save_state()
+            if self._progress_callback:
+                self._progress_callback(self._downloaded, self._total)
+        finally:
+            self._report_lock.release()
+
+
+def download_direct(plan: DownloadPlan, url: str, output_path: str, headers: Optional[Dict] = None,
+                    progress_callback=None, cancel_token: Optional[CancellationToken] = None,
+                    verify: bool = True) -> int:
+    """
+    Download a direct media URL with the plan's direct engine and record it.
+    A paused download left behind by an earlier call is continued.
+    """
+    connections = 8 if plan.direct_engine == ENGINE_SEGMENTED else 1
+    downloader = SegmentedDownloader(url, output_path, headers, connections=connections, verify=verify,
+                                     cancel_token=cancel_token)
+    try:
+        size = downloader.download(progress_callback)
+    except DownloadCancelled as e:
+        if not e.paused:
+            downloader.discard_partial()
+        raise
+    plan.note_engine(plan.direct_engine)
+    return size
+
+
+# === Benchmark ===
+
+def _start_test_server(payload: bytes, per_connection_bps: int):
+    """Local HTTP server with Range support and a per-connection bandwidth cap"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self._respond(send_body=False)
+
+        def do_GET(self):
+            self._respond(send_body=True)
+
+        def _respond(self, send_body):
+            start, end = 0, len(payload) - 1
+            range_header = self.headers.get('Range')
+            if range_header and range_header.startswith('bytes='):
+                first, _, last = range_header[6:].partition('-')
+                start = int(first or 0)
+                end = min(int(last), end) if last else end
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(payload)}')
+            else:
+                self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+            if not send_body:
+                return
+            block = 64 * 1024
+            began = time.time()
+            sent = 0
+            try:
+                for offset in range(start, end + 1, block):
+                    data = payload[offset:min(offset + block, end + 1)]
+                    self.wfile.write(data)
+                    sent += len(data)
+                    # Giới hạn tốc độ mỗi kết nối, giống CDN thật
+                    delay = sent / per_connection_bps - (time.time() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _benchmark_ytdlp(engine, url, path):
+    import yt_dlp
+    plan = DownloadPlan('localhost', {'http': engine})
+    opts = plan.apply({'quiet': True, 'no_warnings': True, 'noprogress': True, 'outtmpl': path})
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.dl(path, {'url': url, 'protocol': 'http', 'ext': 'mp4', 'id': 'benchmark',
+                      'title': 'benchmark', 'http_headers': {}})
+
+
+def run_benchmark(size_mb: int = 32, per_connection_mbps: float = 4.0) -> None:
+    import hashlib
+    import tempfile
+
+    payload = os.urandom(size_mb * 1024 * 1024)
+    expected = hashlib.sha256(payload).hexdigest()
+    server = _start_test_server(payload, int(per_connection_mbps * 1024 * 1024))
+    url = f"http://127.0.0.1:{server.server_address[1]}/video.mp4"
+    print(f"{size_mb} MB test file, server limited to {per_connection_mbps} MB/s per connection")
+
+    engines = [name for name in (ENGINE_NATIVE, ENGINE_ARIA2C, ENGINE_CURL, ENGINE_SEGMENTED)
+               if is_engine_available(name)]
+    missing = [name for name in BACKENDS if name not in engines]
+    tmp_dir = tempfile.mkdtemp(prefix="khytool-bench-")
+    try:
+        for engine in engines:
+            path = os.path.join(tmp_dir, f"{engine}.mp4")
+            start = time.perf_counter()
+            try:
+                if engine == ENGINE_SEGMENTED:
+                    SegmentedDownloader(url, path).download()
+                else:
+                    _benchmark_ytdlp(engine, url, path)
+            except Exception as e:
+                print(f"{engine:>10}: failed ({str(e)})")
+                continue
+            elapsed = time.perf_counter() - start
+            with open(path, 'rb') as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == expected
+            print(f"{engine:>10}: {elapsed:6.2f} s  {size_mb / elapsed:6.1f} MB/s  {'OK' if ok else 'CHECKSUM MISMATCH'}")
+        if missing:
+            print(f"Not available here: {', '.join(missing)}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 32)
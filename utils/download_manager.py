@@ -3,7 +3,10 @@ import time
 import uuid
 import json
 import os
-import sys
+import threading
+from contextlib import contextmanager
+from utils.helpers import get_data_dir
+from utils.thumbnail_store import ThumbnailIndex
 
 class DownloadInfo:
     def __init__(self, source, title, thumbnail_path=None):
@@ -19,12 +22,14 @@ class DownloadInfo:
         self.status = "running"  # running, paused, completed, error
         self.error_message = ""
         self.output_file = ""
+        self.engine = ""  # native, aria2c, segmented... (engine đã dùng để tải)
+        self.resume_info = {}  # url, format_id, output_path... để tiếp tục khi đã tạm dừng
         self.start_time = time.time()
         self.timestamp = time.time()
     
     def update(self, progress=None, speed=None, downloaded=None, 
                total_size=None, remaining_time=None, status=None, 
-               error_message=None, output_file=None):
+               error_message=None, output_file=None, engine=None, resume_info=None):
         if progress is not None: self.progress = progress
         if speed is not None: self.speed = speed
         if downloaded is not None: self.downloaded = downloaded
@@ -33,6 +38,8 @@ class DownloadInfo:
         if status is not None: self.status = status
         if error_message is not None: self.error_message = error_message
         if output_file is not None: self.output_file = output_file
+        if engine is not None: self.engine = engine
+        if resume_info is not None: self.resume_info = resume_info
         self.timestamp = time.time()  # Update timestamp when the download is updated
     
     def to_dict(self):
@@ -45,6 +52,8 @@ class DownloadInfo:
             'progress': self.progress,
             'status': self.status,
             'output_file': self.output_file,
+            'engine': self.engine,
+            'resume_info': self.resume_info,
             'timestamp': self.timestamp
         }
     
@@ -56,6 +65,8 @@ class DownloadInfo:
         download_info.progress = data['progress']
         download_info.status = data['status']
         download_info.output_file = data.get('output_file', '')
+        download_info.engine = data.get('engine', '')
+        download_info.resume_info = data.get('resume_info', {})
         download_info.timestamp = data.get('timestamp', time.time())
         return download_info
 
@@ -65,6 +76,10 @@ class DownloadManager(QObject):
     download_completed = pyqtSignal(str, str)  # Emits download_id, output_file
     download_error = pyqtSignal(str, str)  # Emits download_id, error_message
     download_removed = pyqtSignal(str)  # Emits download_id when a download is removed
+    download_added = pyqtSignal(str)  # Emits download_id when a download is added
+    # Trong batch() các tín hiệu từng mục được gom thành một lần phát
+    downloads_updated = pyqtSignal(list)  # Emits download_ids updated (or added) by a batch
+    downloads_removed = pyqtSignal(list)  # Emits download_ids removed by a batch
     
     _instance = None
     _mutex = QMutex()
@@ -80,27 +95,122 @@ class DownloadManager(QObject):
     def __init__(self):
         super().__init__()
         self.downloads = {}  # Map of download_id to DownloadInfo
+        self._batch_thread = None  # luồng đang mở batch()
+        self._batch_depth = 0
+        self._batch_updated = {}  # download_id -> None (giữ thứ tự, không trùng)
+        self._batch_removed = []
+        self._batch_dirty = False
         self.load_downloads()  # Load downloads when initializing
     
+    @contextmanager
+    def batch(self):
+        """
+        Apply several changes with one save_downloads() and one
+        downloads_updated / downloads_removed signal at the end. Only calls
+        from the thread that opened the batch are grouped; download threads
+        updating meanwhile keep their per-download signals.
+        """
+        if self._batch_depth and self._batch_thread != threading.get_ident():
+            raise RuntimeError("DownloadManager batch already open in another thread")
+        self._batch_thread = threading.get_ident()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_thread = None
+                self._flush_batch()
+    
+    def _in_batch(self):
+        return self._batch_depth > 0 and self._batch_thread == threading.get_ident()
+    
+    def _flush_batch(self):
+        removed, self._batch_removed = self._batch_removed, []
+        updated = [download_id for download_id in self._batch_updated if download_id in self.downloads]
+        self._batch_updated = {}
+        dirty, self._batch_dirty = self._batch_dirty, False
+        
+        if removed:
+            # Thumbnail bị xóa khi không còn download nào dùng
+            ThumbnailIndex.get_instance().release_many(removed)
+        if dirty:
+            self.save_downloads()
+        if removed:
+            self.downloads_removed.emit(removed)
+        if updated:
+            self.downloads_updated.emit(updated)
+    
+    def _notify_updated(self, download_id):
+        if self._in_batch():
+            self._batch_updated[download_id] = None
+        else:
+            self.download_updated.emit(download_id)
+    
+    def _persist(self):
+        if self._in_batch():
+            self._batch_dirty = True
+        else:
+            self.save_downloads()
+    
     def add_download(self, source, title, thumbnail_path=None):
         download_info = DownloadInfo(source, title, thumbnail_path)
         self.downloads[download_info.id] = download_info
         self.save_downloads()  # Save downloads after adding a new one
+        self.download_added.emit(download_info.id)
         return download_info.id
     
     def update_download(self, download_id, **kwargs):
         if download_id in self.downloads:
             self.downloads[download_id].update(**kwargs)
-            self.download_updated.emit(download_id)
+            self._notify_updated(download_id)
             
             # Check for completion or error
             status = kwargs.get('status')
             if status == 'completed':
                 self.download_completed.emit(download_id, self.downloads[download_id].output_file)
-                self.save_downloads()  # Save downloads after completion
+                self._persist()  # Save downloads after completion
             elif status == 'error':
                 self.download_error.emit(download_id, kwargs.get('error_message', ''))
-                self.save_downloads()  # Save downloads after error
+                self._persist()  # Save downloads after error
+            elif status == 'paused':
+                self._persist()  # Giữ trạng thái tạm dừng để tiếp tục sau khi mở lại ứng dụng
+    
+    def can_resume(self, download_id):
+        download_info = self.downloads.get(download_id)
+        return bool(download_info and download_info.status == 'paused'
+                    and download_info.resume_info.get('url'))
+    
+    def resume_download(self, download_id):
+        """Tiếp tục một download đã tạm dừng từ phần dữ liệu đã tải"""
+        if not self.can_resume(download_id):
+            return False
+        download_info = self.downloads[download_id]
+        resume_info = dict(download_info.resume_info)
+        source = download_info.source
+        
+        def create_thread():
+            # Import muộn để tránh vòng lặp import giữa utils và ui
+            if source == 'youtube':
+                from ui.youtube_downloader_window import DownloadThread
+                return DownloadThread(resume_info['url'], resume_info['format_id'], resume_info['output_path'],
+                                      remux_only=resume_info.get('remux_only', False), download_id=download_id)
+            if source == 'tiktok':
+                from ui.tiktok_downloader_window import TikTokDownloadThread
+                return TikTokDownloadThread(resume_info['url'], resume_info['format_id'], resume_info['output_path'],
+                                            download_id=download_id)
+            if source == 'facebook':
+                from ui.facebook_downloader_window import FacebookDownloadThread
+                return FacebookDownloadThread(resume_info['url'], resume_info['format_id'], resume_info['output_path'],
+                                              resume_info.get('direct_url'), download_id=download_id,
+                                              target_file=resume_info.get('target_file'))
+            raise ValueError(f"Unknown download source: {source}")
+        
+        from utils.download_queue import DownloadQueue
+        download_info.update(status='running', error_message='')
+        self.download_updated.emit(download_id)
+        DownloadQueue.get_instance().enqueue(download_info.title, create_thread)
+        return True
     
     def remove_download(self, download_id):
         """Remove a download from the list with improved error handling"""
@@ -111,7 +221,8 @@ class DownloadManager(QObject):
                 
             # Double-check the download exists
             if download_id in self.downloads:
-                print(f"Removing download: {download_id}")
+                if not self._in_batch():
+                    print(f"Removing download: {download_id}")
                 
                 # Get info before deletion for logging
                 download_info = self.downloads[download_id]
@@ -120,15 +231,24 @@ class DownloadManager(QObject):
                 # Remove download from dictionary
                 del self.downloads[download_id]
                 
-                # Emit signal after successful removal
-                try:
-                    self.download_removed.emit(download_id)
-                    print(f"Emitted download_removed signal for: {download_id}")
-                except Exception as signal_error:
-                    print(f"Error emitting download_removed signal: {str(signal_error)}")
-                
-                # Save downloads after removal
-                self.save_downloads()
+                if self._in_batch():
+                    # Thumbnail, lưu file và tín hiệu được xử lý một lần khi batch kết thúc
+                    self._batch_removed.append(download_id)
+                    self._batch_updated.pop(download_id, None)
+                    self._batch_dirty = True
+                else:
+                    # Thumbnail bị xóa khi không còn download nào dùng
+                    ThumbnailIndex.get_instance().release(download_id)
+                    
+                    # Emit signal after successful removal
+                    try:
+                        self.download_removed.emit(download_id)
+                        print(f"Emitted download_removed signal for: {download_id}")
+                    except Exception as signal_error:
+                        print(f"Error emitting download_removed signal: {str(signal_error)}")
+                    
+                    # Save downloads after removal
+                    self.save_downloads()
                 
                 # Return summary
                 return {
@@ -144,6 +264,14 @@ class DownloadManager(QObject):
             print(f"Error removing download: {str(e)}")
             return False
     
+    def remove_downloads(self, download_ids):
+        """Remove many downloads with one save and one downloads_removed signal"""
+        with self.batch():
+            results = [self.remove_download(download_id) for download_id in download_ids]
+        removed = [result for result in results if result]
+        print(f"Removed {len(removed)} downloads")
+        return removed
+    
     def get_download(self, download_id):
         """Get a download by ID with improved error handling"""
         if not download_id:
@@ -177,33 +305,7 @@ class DownloadManager(QObject):
     
     def get_data_dir(self):
         """Get the directory for saving persistent data"""
-        try:
-            # Get the application's directory - fixing the path to ensure it exists
-            app_dir = os.path.dirname(os.path.dirname(os.path.abspath(sys.argv[0])))
-            data_dir = os.path.join(app_dir, "data")
-            
-            # Create directory if it doesn't exist
-            os.makedirs(data_dir, exist_ok=True)
-            
-            # Verify it's writable by testing
-            test_file = os.path.join(data_dir, ".test_write")
-            try:
-                with open(test_file, 'w') as f:
-                    f.write("test")
-                os.remove(test_file)
-            except Exception as e:
-                print(f"Warning: Data directory is not writable: {str(e)}")
-                # Fall back to temp directory
-                import tempfile
-                data_dir = tempfile.gettempdir()
-                print(f"Using temp directory instead: {data_dir}")
-            
-            return data_dir
-        except Exception as e:
-            print(f"Error getting data directory: {str(e)}")
-            # Fall back to temp directory
-            import tempfile
-            return tempfile.gettempdir()
+        return get_data_dir()
     
     def get_downloads_file_path(self):
         """Get the path to the downloads data file"""
@@ -214,8 +316,8 @@ class DownloadManager(QObject):
         try:
             downloads_data = []
             for download_id, download_info in self.downloads.items():
-                # Only save completed or failed downloads
-                if download_info.status in ['completed', 'error']:
+                # Only save completed, failed or paused downloads
+                if download_info.status in ['completed', 'error', 'paused']:
                     # Check if output file exists for completed downloads
                     if download_info.status == 'completed' and download_info.output_file:
                         if not os.path.exists(download_info.output_file):
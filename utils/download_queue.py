@@ -0,0 +1,105 @@
+from PyQt5.QtCore import QObject, pyqtSignal, QMutex, QMutexLocker
+from collections import deque
+
+
+class DownloadQueue(QObject):
+    """
+    Hàng đợi tải xuống song song có giới hạn.
+
+    Mỗi job là một hàm tạo QThread (chưa start). Queue chỉ chạy tối đa
+    max_parallel thread cùng lúc, thread nào kết thúc thì job tiếp theo được
+    khởi chạy. Tiến độ từng video vẫn do DownloadManager theo dõi.
+    """
+    job_started = pyqtSignal(str)  # Emits job label (thường là URL)
+    job_finished = pyqtSignal(str)  # Emits job label
+    queue_changed = pyqtSignal(int, int, int)  # pending, running, finished
+    queue_empty = pyqtSignal()
+
+    DEFAULT_MAX_PARALLEL = 3
+
+    _instance = None
+    _mutex = QMutex()
+
+    @staticmethod
+    def get_instance():
+        if DownloadQueue._instance is None:
+            with QMutexLocker(DownloadQueue._mutex):
+                if DownloadQueue._instance is None:
+                    DownloadQueue._instance = DownloadQueue()
+        return DownloadQueue._instance
+
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL):
+        super().__init__()
+        self.max_parallel = max(1, max_parallel)
+        self._pending = deque()  # (label, create_thread)
+        self._running = {}  # thread -> label
+        self._finished_count = 0
+
+    def enqueue(self, label, create_thread):
+        """Thêm một job; create_thread() phải trả về QThread chưa được start"""
+        self._pending.append((label, create_thread))
+        self._start_next()
+        self._emit_changed()
+
+    def enqueue_many(self, jobs):
+        """Thêm nhiều job (label, create_thread) cùng lúc"""
+        for label, create_thread in jobs:
+            self._pending.append((label, create_thread))
+        self._start_next()
+        self._emit_changed()
+
+    def set_max_parallel(self, value):
+        self.max_parallel = max(1, int(value))
+        self._start_next()
+
+    def clear_pending(self):
+        """Bỏ các job chưa chạy (job đang chạy không bị ảnh hưởng)"""
+        self._pending.clear()
+        self._emit_changed()
+        if not self._running:
+            self.queue_empty.emit()
+
+    def stop_all(self):
+        """Bỏ các job chưa chạy và dừng các thread đang chạy"""
+        self._pending.clear()
+        for thread in list(self._running):
+            if hasattr(thread, 'stop'):
+                thread.stop()
+        self._emit_changed()
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def running_count(self):
+        return len(self._running)
+
+    def _start_next(self):
+        while self._pending and len(self._running) < self.max_parallel:
+            label, create_thread = self._pending.popleft()
+            try:
+                thread = create_thread()
+            except Exception as e:
+                print(f"Error creating download job for {label}: {str(e)}")
+                self._finished_count += 1
+                continue
+
+            self._running[thread] = label
+            # QThread.finished chạy trên GUI thread sau khi run() kết thúc, kể cả khi lỗi
+            thread.finished.connect(lambda t=thread: self._on_thread_finished(t))
+            thread.start()
+            self.job_started.emit(label)
+
+    def _on_thread_finished(self, thread):
+        label = self._running.pop(thread, None)
+        if label is None:
+            return
+        self._finished_count += 1
+        self.job_finished.emit(label)
+        thread.deleteLater()
+        self._start_next()
+        self._emit_changed()
+        if not self._pending and not self._running:
+            self.queue_empty.emit()
+
+    def _emit_changed(self):
+        self.queue_changed.emit(len(self._pending), len(self._running), self._finished_count)
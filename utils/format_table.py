@@ -0,0 +1,206 @@
+"""
+Bảng định dạng có kiểu cho kết quả yt-dlp và bộ chọn định dạng ưu tiên remux.
+
+yt-dlp ghép video + audio bằng FFmpeg. Nếu cả hai luồng đã tương thích với
+container đích thì chỉ cần remux (``-c copy``, gần như tức thì). Ngược lại
+âm thanh phải được mã hóa lại. Bộ chọn ưu tiên các cặp luồng không cần
+chuyển mã và ước tính dung lượng cho từng lựa chọn.
+"""
+from typing import Dict, List, Optional
+
+from utils.helpers import format_size
+
+COMMON_HEIGHTS = [144, 240, 360, 480, 720, 1080, 1440, 2160]
+
+# Codec có thể copy thẳng vào container (không cần mã hóa lại)
+REMUX_COMPATIBLE = {
+    'mp4': {'video': {'h264', 'h265', 'av1', 'vp9'}, 'audio': {'aac', 'mp3'}},
+    'webm': {'video': {'vp9', 'av1'}, 'audio': {'opus', 'vorbis'}},
+    'mkv': {'video': {'h264', 'h265', 'av1', 'vp9'}, 'audio': {'aac', 'mp3', 'opus', 'vorbis'}},
+}
+
+# Thứ tự ưu tiên codec video khi cùng độ phân giải (H.264 dễ dựng/chỉnh sửa nhất)
+VIDEO_CODEC_RANK = {'h264': 0, 'h265': 1, 'av1': 2, 'vp9': 3}
+
+_CODEC_FAMILIES = [
+    ('avc', 'h264'), ('h264', 'h264'),
+    ('hvc', 'h265'), ('hev', 'h265'), ('h265', 'h265'), ('bytevc1', 'h265'),
+    ('av01', 'av1'), ('av1', 'av1'),
+    ('vp09', 'vp9'), ('vp9', 'vp9'), ('vp8', 'vp8'),
+    ('mp4a', 'aac'), ('aac', 'aac'),
+    ('opus', 'opus'), ('vorbis', 'vorbis'), ('mp3', 'mp3'),
+]
+
+
+def codec_family(codec: Optional[str]) -> Optional[str]:
+    """Chuẩn hóa chuỗi codec của yt-dlp ('avc1.640028', 'mp4a.40.2', ...) thành họ codec"""
+    if not codec or codec == 'none':
+        return None
+    codec = codec.lower()
+    for prefix, family in _CODEC_FAMILIES:
+        if codec.startswith(prefix):
+            return family
+    return codec.split('.')[0]
+
+
+class StreamFormat:
+    """Một định dạng trong danh sách 'formats' của yt-dlp"""
+
+    def __init__(self, fmt: Dict, duration: float = 0):
+        self.format_id: str = str(fmt.get('format_id', ''))
+        self.ext: str = fmt.get('ext') or ''
+        self.protocol: str = fmt.get('protocol') or ''
+        self.raw_vcodec: str = fmt.get('vcodec') or 'none'
+        self.raw_acodec: str = fmt.get('acodec') or 'none'
+        self.vcodec: Optional[str] = codec_family(self.raw_vcodec)
+        self.acodec: Optional[str] = codec_family(self.raw_acodec)
+        self.width: int = fmt.get('width') or 0
+        self.height: int = fmt.get('height') or 0
+        self.fps: float = fmt.get('fps') or 0
+        self.tbr: float = fmt.get('tbr') or 0  # kbit/s
+        self.vbr: float = fmt.get('vbr') or 0
+        self.abr: float = fmt.get('abr') or 0
+
+        # Dung lượng: chính xác > xấp xỉ của yt-dlp > ước tính từ bitrate * thời lượng
+        self.filesize: int = fmt.get('filesize') or fmt.get('filesize_approx') or 0
+        self.size_is_estimate: bool = not fmt.get('filesize')
+        if not self.filesize and duration:
+            bitrate = self.tbr or (self.vbr + self.abr)
+            self.filesize = int(bitrate * 1000 / 8 * duration)
+
+        # Một số extractor (TikTok) không ghi codec nhưng định dạng vẫn có cả hình và tiếng
+        if self.raw_vcodec == 'none' and self.raw_acodec == 'none' and self.height:
+            self.vcodec = None
+            self.has_video = True
+            self.has_audio = True
+        else:
+            self.has_video = self.raw_vcodec != 'none' and bool(self.height or self.vcodec)
+            self.has_audio = self.raw_acodec != 'none'
+
+    @property
+    def is_muxed(self) -> bool:
+        return self.has_video and self.has_audio
+
+    def __repr__(self):
+        return (f"StreamFormat({self.format_id}, {self.height}p, {self.vcodec}/{self.acodec}, "
+                f"{self.tbr:.0f}k, {self.filesize} bytes)")
+
+
+class FormatChoice:
+    """Một lựa chọn chất lượng: luồng video (+ luồng audio riêng nếu cần ghép)"""
+
+    def __init__(self, video: StreamFormat, audio: Optional[StreamFormat], container: str):
+        self.video = video
+        self.audio = audio
+        self.container = container
+        self.height = video.height
+
+        compatible = REMUX_COMPATIBLE.get(container, REMUX_COMPATIBLE['mkv'])
+        audio_codec = audio.acodec if audio else video.acodec
+        video_ok = video.vcodec is None or video.vcodec in compatible['video']
+        audio_ok = audio_codec is None or audio_codec in compatible['audio']
+        self.needs_transcode: bool = not (video_ok and audio_ok)
+
+        self.estimated_size: int = video.filesize + (audio.filesize if audio else 0)
+
+    @property
+    def format_spec(self) -> str:
+        """Chuỗi định dạng cho yt-dlp"""
+        if self.audio:
+            return f"{self.video.format_id}+{self.audio.format_id}"
+        return self.video.format_id
+
+    @property
+    def codec_label(self) -> str:
+        vcodec = (self.video.vcodec or '?').upper()
+        acodec = ((self.audio.acodec if self.audio else self.video.acodec) or '?').upper()
+        return f"{vcodec}/{acodec}"
+
+    def display_name(self, prefix: Optional[str] = None) -> str:
+        name = prefix or f"{self.height}p"
+        if not prefix and self.video.fps and self.video.fps > 30:
+            name += f"{int(self.video.fps)}"
+        parts = [name, self.codec_label]
+        if self.estimated_size:
+            parts.append(f"~{format_size(self.estimated_size)}")
+        parts.append("cần chuyển mã âm thanh" if self.needs_transcode else "không chuyển mã")
+        return " · ".join(parts)
+
+    def to_format_dict(self, prefix: Optional[str] = None) -> Dict:
+        """Dạng dict dùng cho format_combo của các cửa sổ tải xuống"""
+        return {
+            'format_id': self.format_spec,
+            'ext': self.container,
+            'display_name': self.display_name(prefix),
+            'is_audio': False,
+            'height': self.height,
+            'estimated_size': self.estimated_size,
+            'needs_transcode': self.needs_transcode,
+        }
+
+
+class FormatTable:
+    """Toàn bộ định dạng của một video, phân loại theo video/audio/đã ghép"""
+
+    def __init__(self, info_dict: Dict):
+        self.duration: float = info_dict.get('duration') or 0
+        self.formats: List[StreamFormat] = [
+            StreamFormat(f, self.duration) for f in info_dict.get('formats') or []
+            if f.get('format_id') and not (f.get('format_note') or '').lower().startswith('storyboard')
+            and f.get('ext') != 'mhtml'
+        ]
+
+    @property
+    def video_formats(self) -> List[StreamFormat]:
+        return [f for f in self.formats if f.has_video]
+
+    @property
+    def audio_only_formats(self) -> List[StreamFormat]:
+        return [f for f in self.formats if f.has_audio and not f.has_video]
+
+    def heights(self) -> List[int]:
+        return sorted({f.height for f in self.video_formats if f.height})
+
+    def best_audio(self, container: str = 'mp4') -> Optional[StreamFormat]:
+        """Audio tốt nhất, ưu tiên codec copy được vào container"""
+        compatible = REMUX_COMPATIBLE.get(container, REMUX_COMPATIBLE['mkv'])['audio']
+        candidates = self.audio_only_formats
+        if not candidates:
+            return None
+        return max(candidates, key=lambda f: (f.acodec in compatible, f.abr or f.tbr, f.filesize))
+
+    def select(self, height: int, container: str = 'mp4') -> Optional[FormatChoice]:
+        """Chọn cặp luồng tốt nhất cho một độ phân giải, ưu tiên cặp không cần chuyển mã"""
+        candidates = [f for f in self.video_formats if f.height == height]
+        if not candidates:
+            return None
+
+        audio = self.best_audio(container)
+        choices = []
+        for video in candidates:
+            if video.is_muxed:
+                choices.append(FormatChoice(video, None, container))
+            elif audio:
+                choices.append(FormatChoice(video, audio, container))
+        if not choices:
+            # Chỉ có video không tiếng và không có audio riêng
+            choices = [FormatChoice(video, None, container) for video in candidates]
+
+        return max(choices, key=lambda c: (
+            not c.needs_transcode,
+            -VIDEO_CODEC_RANK.get(c.video.vcodec, len(VIDEO_CODEC_RANK)),
+            c.video.fps,
+            c.video.tbr or c.video.vbr,
+        ))
+
+    def choices(self, container: str = 'mp4', heights: Optional[List[int]] = None) -> List[FormatChoice]:
+        """Một lựa chọn cho mỗi độ phân giải (tăng dần)"""
+        available = self.heights()
+        if heights is not None:
+            available = [h for h in available if h in heights]
+        return [choice for choice in (self.select(h, container) for h in available) if choice]
+
+    def best(self, container: str = 'mp4') -> Optional[FormatChoice]:
+        """Lựa chọn ở độ phân giải cao nhất"""
+        heights = self.heights()
+        return self.select(heights[-1], container) if heights else None
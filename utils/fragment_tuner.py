@@ -0,0 +1,265 @@
+"""
+Adaptive ``concurrent_fragment_downloads`` for HLS/DASH downloads.
+
+yt-dlp reads ``concurrent_fragment_downloads`` when each fragmented stream
+starts, so the tuner works between downloads (and between the video and
+audio stream of one download): every download runs at the host's current
+level and reports its throughput. The level starts at 2, climbs
+2 -> 4 -> 8 -> 16 while the measured throughput keeps improving, settles on
+the best level, and is halved (with a ceiling that recovers slowly) as soon
+as the host answers with HTTP 429 or repeated fragment errors. Results are kept per host in
+``fragment_tuning.json`` in the data directory.
+"""
+import json
+import os
+import threading
+import time
+import urllib.parse
+from typing import Dict, Optional
+
+from utils.helpers import get_data_dir
+
+LEVELS = [1, 2, 4, 8, 16]
+DEFAULT_LEVEL = 2
+# A higher level must beat the current best by this much to count as an improvement
+IMPROVEMENT_THRESHOLD = 1.10
+# Successful downloads needed before a lowered ceiling is raised one step again
+CEILING_RECOVERY_DOWNLOADS = 5
+# Ignore streams that are too small to give a meaningful throughput
+MIN_SAMPLE_BYTES = 2 * 1024 * 1024
+MIN_SAMPLE_SECONDS = 2.0
+EWMA_ALPHA = 0.5
+MAX_HOSTS = 200
+
+THROTTLE_MARKERS = ('429', 'too many requests', 'rate limit', 'rate-limit')
+ERROR_MARKERS = ('retrying fragment', 'fragment not found', 'skipping fragment')
+
+
+# Nhãn cấp hai hay gặp dưới tên miền quốc gia (example.co.uk, example.com.vn)
+SECOND_LEVEL_LABELS = {'co', 'com', 'net', 'org', 'gov', 'edu', 'ac', 'or', 'ne', 'go'}
+
+
+def host_key(url: str) -> str:
+    """
+    Registrable part of a host name: www.youtube.com -> youtube.com,
+    m.example.co.uk -> example.co.uk. Callers pass the page URL (the level has
+    to be chosen before yt-dlp picks the media URLs), so results are kept per
+    site (youtube.com, tiktok.com) rather than per CDN host.
+    """
+    host = (urllib.parse.urlparse(url).hostname or '').lower()
+    parts = [p for p in host.split('.') if p]
+    if len(parts) >= 3 and len(parts[-1]) == 2 and parts[-2] in SECOND_LEVEL_LABELS:
+        return '.'.join(parts[-3:])
+    return '.'.join(parts[-2:]) if len(parts) >= 2 else host
+
+
+def _lower_level(level: int) -> int:
+    lower = [l for l in LEVELS if l < level]
+    return lower[-1] if lower else LEVELS[0]
+
+
+def _higher_level(level: int) -> Optional[int]:
+    higher = [l for l in LEVELS if l > level]
+    return higher[0] if higher else None
+
+
+class FragmentTuningSession:
+    """Measures one download and feeds the result back to the tuner"""
+
+    def __init__(self, tuner, host: str, level: int):
+        self.tuner = tuner
+        self.host = host
+        self.start_level = level
+        self.level = level
+        self.throttled = False
+        self.errors = 0
+        self._streams: Dict[str, dict] = {}  # filename -> {'start', 'bytes', 'fragmented'}
+        self._samples = []  # (bytes, seconds)
+        self._params = None
+        self._finished = False
+
+    @property
+    def concurrency(self) -> int:
+        return self.level
+
+    def attach(self, ydl) -> None:
+        """Let a backoff take effect for the next stream of this download"""
+        self._params = ydl.params
+
+    def on_progress(self, d: dict) -> None:
+        """Call from a yt-dlp progress hook"""
+        filename = d.get('filename') or ''
+        stream = self._streams.get(filename)
+        if d.get('status') == 'downloading':
+            if stream is None:
+                stream = self._streams[filename] = {
+                    'start': time.time(),
+                    'start_bytes': d.get('downloaded_bytes') or 0,  # resumed downloads
+                    'bytes': 0,
+                    'fragmented': False,
+                }
+            stream['bytes'] = d.get('downloaded_bytes') or 0
+            if d.get('fragment_count'):
+                stream['fragmented'] = True
+        elif d.get('status') == 'finished' and stream is not None:
+            elapsed = time.time() - stream['start']
+            size = (d.get('total_bytes') or stream['bytes']) - stream['start_bytes']
+            if stream['fragmented'] and size >= MIN_SAMPLE_BYTES and elapsed >= MIN_SAMPLE_SECONDS:
+                self._samples.append((size, elapsed))
+            del self._streams[filename]
+
+    def on_message(self, message: str) -> None:
+        """Call from the yt-dlp logger (warning/error) to detect throttling"""
+        text = (message or '').lower()
+        if any(marker in text for marker in THROTTLE_MARKERS):
+            if not self.throttled:
+                self.throttled = True
+                self._back_off()
+        elif any(marker in text for marker in ERROR_MARKERS):
+            self.errors += 1
+
+    def _back_off(self):
+        self.level = _lower_level(self.level)
+        if self._params is not None:
+            self._params['concurrent_fragment_downloads'] = self.level
+
+    def finish(self, success: bool = True) -> None:
+        """Report the result to the tuner (only the first call counts)"""
+        if self._finished:
+            return
+        self._finished = True
+        throughput = None
+        if self._samples:
+            total_bytes = sum(size for size, _ in self._samples)
+            total_seconds = sum(seconds for _, seconds in self._samples)
+            throughput = total_bytes / total_seconds
+        self.tuner.record(self.host, self.start_level, throughput, success, self.throttled, self.errors)
+
+
+class FragmentTuner:
+    """Per-host concurrency levels, shared by all download threads"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = FragmentTuner()
+        return cls._instance
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_data_dir(), "fragment_tuning.json")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._hosts: Dict[str, dict] = {}
+        self._load()
+
+    def _record_for(self, host):
+        record = self._hosts.get(host)
+        if record is None:
+            record = self._hosts[host] = {
+                'level': DEFAULT_LEVEL,
+                'ceiling': LEVELS[-1],
+                'throughput': {},  # str(level) -> bytes/s (EWMA)
+                'clean_downloads': 0,
+                'updated': time.time(),
+            }
+        return record
+
+    def level_for(self, url: str) -> int:
+        with self._lock:
+            record = self._hosts.get(host_key(url))
+            return record['level'] if record else DEFAULT_LEVEL
+
+    def start_session(self, url: str) -> FragmentTuningSession:
+        """Start measuring a download of url (page or media URL)"""
+        host = host_key(url)
+        return FragmentTuningSession(self, host, self.level_for(url))
+
+    def record(self, host: str, level: int, throughput: Optional[float], success: bool,
+               throttled: bool = False, errors: int = 0) -> None:
+        with self._lock:
+            record = self._record_for(host)
+            record['updated'] = time.time()
+
+            if throttled or errors >= 3:
+                # Back off: halve and cap until the host has been well-behaved for a while
+                record['ceiling'] = max(LEVELS[0], _lower_level(max(level, LEVELS[1])))
+                record['level'] = min(record['level'], record['ceiling'])
+                record['throughput'] = {k: v for k, v in record['throughput'].items()
+                                        if int(k) <= record['ceiling']}
+                record['clean_downloads'] = 0
+            elif success:
+                record['clean_downloads'] += 1
+                if (record['clean_downloads'] >= CEILING_RECOVERY_DOWNLOADS
+                        and record['ceiling'] < LEVELS[-1]):
+                    record['ceiling'] = _higher_level(record['ceiling'])
+                    record['clean_downloads'] = 0
+
+                if throughput:
+                    key = str(level)
+                    old = record['throughput'].get(key)
+                    record['throughput'][key] = throughput if old is None else (
+                        EWMA_ALPHA * throughput + (1 - EWMA_ALPHA) * old)
+                    record['level'] = self._next_level(record)
+
+            self._trim()
+        self._save()
+
+    @staticmethod
+    def _next_level(record) -> int:
+        """Best measured level, or one step higher while higher levels keep helping"""
+        measured = {int(k): v for k, v in record['throughput'].items() if int(k) <= record['ceiling']}
+        if not measured:
+            return min(DEFAULT_LEVEL, record['ceiling'])
+        best = LEVELS[0]
+        best_throughput = 0
+        for level in sorted(measured):
+            # Only accept a higher level if it is clearly faster than the best lower one
+            if not best_throughput or measured[level] >= best_throughput * IMPROVEMENT_THRESHOLD:
+                best, best_throughput = level, measured[level]
+        higher = _higher_level(best)
+        if higher is not None and higher <= record['ceiling'] and higher not in measured:
+            return higher  # Not tried yet: explore
+        return best
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return json.loads(json.dumps(self._hosts))
+
+    def reset(self, host: Optional[str] = None) -> None:
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
+        self._save()
+
+    def _trim(self):
+        if len(self._hosts) > MAX_HOSTS:
+            for host, _ in sorted(self._hosts.items(), key=lambda item: item[1]['updated'])[:len(self._hosts) - MAX_HOSTS]:
+                del self._hosts[host]
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._hosts = json.load(f)
+        except Exception as e:
+            print(f"Error loading fragment tuning data: {str(e)}")
+            self._hosts = {}
+
+    def _save(self):
+        try:
+            # Chụp dữ liệu trong _save_lock để bản cũ không ghi đè bản mới hơn
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._hosts, indent=2)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving fragment tuning data: {str(e)}")
@@ -1,9 +1,9 @@
 import os
 import re
-import time
+import sys
 from datetime import datetime
 import logging
-from typing import List, Tuple
+from typing import List
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtCore import Qt
@@ -34,6 +34,36 @@ def load_image_from_path(image_path):
     
     return pixmap
 
+def get_data_dir() -> str:
+    """Get the directory for saving persistent data (downloads.json, caches, ...)"""
+    try:
+        # Get the application's directory - fixing the path to ensure it exists
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(sys.argv[0])))
+        data_dir = os.path.join(app_dir, "data")
+
+        # Create directory if it doesn't exist
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Verify it's writable by testing
+        test_file = os.path.join(data_dir, ".test_write")
+        try:
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
+        except Exception as e:
+            print(f"Warning: Data directory is not writable: {str(e)}")
+            # Fall back to temp directory
+            import tempfile
+            data_dir = tempfile.gettempdir()
+            print(f"Using temp directory instead: {data_dir}")
+
+        return data_dir
+    except Exception as e:
+        print(f"Error getting data directory: {str(e)}")
+        # Fall back to temp directory
+        import tempfile
+        return tempfile.gettempdir()
+
 def clean_filename(filename: str) -> str:
     """Cleans a filename by removing invalid characters and replacing spaces."""
     # Replace any non-alphanumeric/non-space characters with underscores
@@ -67,117 +97,6 @@ def format_time(seconds: int) -> str:
         secs = seconds % 60
         return f"{hours} hours {minutes} minutes {secs} seconds"
 
-def clean_thumbnails(thumbnails_dir: str, max_age_days: int = 7, max_count: int = 500) -> Tuple[int, int]:
-    """
-    Clean thumbnail files to prevent storage bloat.
-    
-    Args:
-        thumbnails_dir: Directory where thumbnails are stored
-        max_age_days: Maximum age in days for thumbnails before deletion
-        max_count: Maximum number of thumbnails to keep
-        
-    Returns:
-        Tuple of (number of files deleted by age, number of files deleted by count)
-    """
-    if not os.path.exists(thumbnails_dir):
-        logger.warning(f"Thumbnail directory not found: {thumbnails_dir}")
-        return (0, 0)
-    
-    # Get all thumbnail files
-    thumbnail_files = []
-    for filename in os.listdir(thumbnails_dir):
-        file_path = os.path.join(thumbnails_dir, filename)
-        # Skip directories and non-image files
-        if os.path.isdir(file_path):
-            continue
-        if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp')):
-            continue
-            
-        # Get file info
-        try:
-            mtime = os.path.getmtime(file_path)
-            size = os.path.getsize(file_path)
-            thumbnail_files.append((file_path, mtime, size))
-        except Exception as e:
-            logger.error(f"Error getting file info for {file_path}: {str(e)}")
-    
-    # No thumbnails to clean
-    if not thumbnail_files:
-        return (0, 0)
-    
-    # Step 1: Delete old thumbnails
-    now = time.time()
-    max_age_seconds = max_age_days * 24 * 60 * 60
-    age_deleted = 0
-    
-    for file_path, mtime, _ in thumbnail_files[:]:
-        if now - mtime > max_age_seconds:
-            try:
-                os.remove(file_path)
-                thumbnail_files.remove((file_path, mtime, _))
-                age_deleted += 1
-                logger.debug(f"Deleted old thumbnail: {file_path}")
-            except Exception as e:
-                logger.error(f"Error deleting thumbnail {file_path}: {str(e)}")
-    
-    # Step 2: If we still have too many thumbnails, delete the oldest ones
-    count_deleted = 0
-    if len(thumbnail_files) > max_count:
-        # Sort by modification time (oldest first)
-        thumbnail_files.sort(key=lambda x: x[1])
-        
-        # Delete excess thumbnails
-        excess_count = len(thumbnail_files) - max_count
-        for file_path, _, _ in thumbnail_files[:excess_count]:
-            try:
-                os.remove(file_path)
-                count_deleted += 1
-                logger.debug(f"Deleted excess thumbnail: {file_path}")
-            except Exception as e:
-                logger.error(f"Error deleting thumbnail {file_path}: {str(e)}")
-    
-    logger.info(f"Thumbnail cleanup: {age_deleted} files deleted by age, {count_deleted} files deleted by count")
-    return (age_deleted, count_deleted)
-
-def check_and_clean_thumbnails():
-    """
-    Check if thumbnail cleanup is needed and perform cleanup if necessary.
-    This is meant to be called at application startup.
-    """
-    try:
-        # Import here to avoid circular import
-        from utils.config_manager import ConfigManager
-        
-        config = ConfigManager.get_instance()
-        
-        # Skip if thumbnail cleanup is disabled
-        if not config.thumbnail_cleanup_enabled:
-            return
-        
-        # Get the last cleanup time
-        last_cleanup = config.thumbnail_last_cleanup
-        now = time.time()
-        
-        # If never cleaned or more than 3 days since last cleanup
-        if last_cleanup is None or (now - last_cleanup > 3 * 24 * 60 * 60):
-            # Get the app's directory
-            app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            thumbnails_dir = os.path.join(app_dir, "thumbnails")
-            
-            # Perform cleanup
-            age_deleted, count_deleted = clean_thumbnails(
-                thumbnails_dir,
-                config.thumbnail_max_age_days,
-                config.thumbnail_max_count
-            )
-            
-            # Update last cleanup time
-            config.thumbnail_last_cleanup = now
-            
-            logger.info(f"Automated thumbnail cleanup completed. Deleted {age_deleted + count_deleted} files.")
-    except Exception as e:
-        logger.error(f"Error during thumbnail cleanup check: {str(e)}")
-
 def get_stylesheet():
     """Stylesheet chung cho ứng dụng"""
     return """
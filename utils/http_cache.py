@@ -0,0 +1,286 @@
+"""
+On-disk HTTP cache for scraped pages (TikTok embed/mobile pages, Facebook
+watch pages).
+
+Bodies are stored zlib-compressed in ``http_cache/`` in the data directory.
+A page fetched less than ``fresh_for`` seconds ago is served from disk
+without touching the network; after that it is revalidated with
+If-None-Match / If-Modified-Since, so an unchanged page costs a 304. Each
+host has its own size budget, oldest-used entries are evicted first.
+Responses marked ``Cache-Control: no-store`` are not kept (``private`` is
+fine, this is a single-user cache).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Dict, Optional
+
+from utils.helpers import get_data_dir
+from utils.http_session import get_session
+
+DEFAULT_FRESH_SECONDS = 60
+MAX_BYTES_PER_HOST = 8 * 1024 * 1024  # kích thước đã nén
+MAX_ENTRY_BYTES = 4 * 1024 * 1024  # không lưu trang lớn hơn (chưa nén)
+MAX_AGE_SECONDS = 7 * 24 * 3600  # mục quá cũ bị bỏ khi tải index
+
+
+class CachedResponse:
+    """The parts of a requests.Response the scrapers use"""
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str], url: str,
+                 encoding: Optional[str] = None, from_cache: bool = False, revalidated: bool = False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.url = url
+        self.encoding = encoding or 'utf-8'
+        self.from_cache = from_cache  # True khi không cần tải lại body
+        self.revalidated = revalidated  # True khi server trả 304
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+
+class HttpCache:
+    """Conditional page cache shared by all info threads"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = HttpCache()
+        return cls._instance
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes_per_host: int = MAX_BYTES_PER_HOST):
+        self.cache_dir = cache_dir or os.path.join(get_data_dir(), "http_cache")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.max_bytes_per_host = max_bytes_per_host
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    # === Public API ===
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: int = 15,
+            allow_redirects: bool = True, fresh_for: int = DEFAULT_FRESH_SECONDS,
+            session=None) -> CachedResponse:
+        """GET url, answering from the cache when possible"""
+        headers = dict(headers or {})
+        key = self._key(url, headers)
+        entry = self._lookup(key)
+
+        if entry and time.time() - entry['stored'] < min(fresh_for, entry.get('max_age', fresh_for)):
+            body = self._read_body(entry)
+            if body is not None:
+                return self._response_from_entry(entry, body, revalidated=False)
+            entry = None
+
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        if session is None:
+            session = get_session()
+        response = session.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+
+        if response.status_code == 304 and entry:
+            body = self._read_body(entry)
+            if body is not None:
+                self._touch(key, response.headers)
+                return self._response_from_entry(entry, body, revalidated=True)
+            # Mất file body: tải lại không điều kiện
+            headers.pop('If-None-Match', None)
+            headers.pop('If-Modified-Since', None)
+            response = session.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+
+        result = CachedResponse(response.status_code, response.content, dict(response.headers),
+                                response.url, response.encoding or response.apparent_encoding)
+        if response.status_code == 200:
+            self._store(key, url, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+        for key in keys:
+            self._remove_file(key)
+        self._save()
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-host entry count and stored (compressed) bytes"""
+        result = {}
+        with self._lock:
+            for entry in self._entries.values():
+                host = result.setdefault(entry['host'], {'entries': 0, 'bytes': 0})
+                host['entries'] += 1
+                host['bytes'] += entry['size']
+        return result
+
+    # === Internals ===
+
+    @staticmethod
+    def _key(url, headers):
+        # Trang desktop và mobile khác nhau theo User-Agent
+        user_agent = headers.get('User-Agent', '')
+        return hashlib.sha1(f"{url}\n{user_agent}".encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.z")
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['last_access'] = time.time()
+                return dict(entry)
+        return None
+
+    def _read_body(self, entry):
+        try:
+            with open(self._body_path(entry['key']), 'rb') as f:
+                return zlib.decompress(f.read())
+        except Exception:
+            with self._lock:
+                self._entries.pop(entry['key'], None)
+            return None
+
+    @staticmethod
+    def _response_from_entry(entry, body, revalidated):
+        return CachedResponse(200, body, dict(entry.get('headers', {})), entry.get('final_url') or entry['url'],
+                              entry.get('encoding'), from_cache=True, revalidated=revalidated)
+
+    @staticmethod
+    def _cache_control(headers):
+        directives = {}
+        for part in (headers.get('Cache-Control') or headers.get('cache-control') or '').split(','):
+            name, _, value = part.strip().partition('=')
+            if name:
+                directives[name.lower()] = value.strip('"')
+        return directives
+
+    def _store(self, key, url, response):
+        directives = self._cache_control(response.headers)
+        if 'no-store' in directives:
+            return
+        if len(response.content) > MAX_ENTRY_BYTES:
+            return
+
+        data = zlib.compress(response.content, 6)
+        if len(data) > self.max_bytes_per_host:
+            return
+        try:
+            tmp_path = self._body_path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._body_path(key))
+        except Exception as e:
+            print(f"Error writing HTTP cache entry: {str(e)}")
+            return
+
+        entry = {
+            'key': key,
+            'url': url,
+            'final_url': response.url,
+            'host': (urllib.parse.urlparse(url).hostname or '').lower(),
+            'etag': response.headers.get('ETag') or response.headers.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or response.headers.get('last-modified'),
+            'encoding': response.encoding,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() in ('content-type', 'etag', 'last-modified')},
+            'stored': time.time(),
+            'last_access': time.time(),
+            'size': len(data),
+        }
+        max_age = directives.get('max-age', '')
+        if max_age.isdigit():
+            entry['max_age'] = int(max_age)
+        if 'no-cache' in directives:
+            entry['max_age'] = 0  # luôn hỏi lại server
+
+        with self._lock:
+            self._entries[key] = entry
+            evicted = self._evict(entry['host'])
+        for old_key in evicted:
+            self._remove_file(old_key)
+        self._save()
+
+    def _touch(self, key, headers):
+        """Entry confirmed by a 304: restart its freshness window"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['stored'] = time.time()
+            entry['last_access'] = time.time()
+            etag = headers.get('ETag') or headers.get('etag')
+            if etag:
+                entry['etag'] = etag
+        self._save()
+
+    def _evict(self, host):
+        """Drop least recently used entries of host over budget (lock held)"""
+        entries = sorted((e for e in self._entries.values() if e['host'] == host),
+                         key=lambda e: e['last_access'])
+        total = sum(e['size'] for e in entries)
+        evicted = []
+        for entry in entries:
+            if total <= self.max_bytes_per_host:
+                break
+            total -= entry['size']
+            del self._entries[entry['key']]
+            evicted.append(entry['key'])
+        return evicted
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def _load(self):
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                now = time.time()
+                self._entries = {k: e for k, e in entries.items()
+                                 if now - e.get('last_access', 0) < MAX_AGE_SECONDS
+                                 and os.path.exists(self._body_path(k))}
+                for key in set(entries) - set(self._entries):
+                    self._remove_file(key)
+        except Exception as e:
+            print(f"Error loading HTTP cache index: {str(e)}")
+            self._entries = {}
+
+    def _save(self):
+        try:
+            # Chụp dữ liệu trong _save_lock để bản cũ không ghi đè bản mới hơn
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._entries)
+                tmp_path = self.index_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving HTTP cache index: {str(e)}")
+
+
+def cached_get(url: str, headers: Optional[Dict] = None, timeout: int = 15,
+               allow_redirects: bool = True, fresh_for: int = DEFAULT_FRESH_SECONDS) -> CachedResponse:
+    """requests.get replacement for page scrapes, backed by the shared HttpCache"""
+    return HttpCache.get_instance().get(url, headers, timeout=timeout,
+                                        allow_redirects=allow_redirects, fresh_for=fresh_for)
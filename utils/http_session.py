@@ -0,0 +1,96 @@
+"""
+Shared requests session and connection prewarming.
+
+Page scrapes, API calls, short-link resolution, thumbnail fetches and the
+app's own direct downloads (SegmentedDownloader) go through one keep-alive
+``requests.Session`` so connections are reused between requests and
+threads. ``prewarm(hosts)`` resolves the hosts and opens connections to
+them in the background (a HEAD request whose connection goes back to the
+session's pool), so the first page or thumbnail request of a downloader
+window does not pay for DNS, TCP and TLS setup.
+
+Only hosts the session actually talks to are worth warming: yt-dlp opens
+its own connections, and video CDN hosts change per video and region.
+"""
+import socket
+import threading
+import time
+from typing import Iterable, List
+
+POOL_CONNECTIONS = 16  # số host được giữ pool
+POOL_MAXSIZE = 8  # kết nối giữ lại cho mỗi host
+PREWARM_TIMEOUT = 5
+# Kết nối keep-alive thường bị server đóng sau khoảng 1-2 phút không dùng
+PREWARM_INTERVAL = 60
+
+TIKTOK_HOSTS = [
+    'www.tiktok.com',
+    'vm.tiktok.com',
+    'p16-sign-va.tiktokcdn.com',  # thumbnail
+]
+FACEBOOK_HOSTS = [
+    'www.facebook.com',
+    'm.facebook.com',
+    'scontent.xx.fbcdn.net',  # thumbnail
+]
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
+}
+
+_session = None
+_session_lock = threading.Lock()
+_warmed = {}  # host -> thời điểm prewarm gần nhất
+_warmed_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide keep-alive session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def _hosts_to_warm(hosts: Iterable[str]) -> List[str]:
+    now = time.time()
+    result = []
+    with _warmed_lock:
+        for host in hosts:
+            if now - _warmed.get(host, 0) >= PREWARM_INTERVAL:
+                _warmed[host] = now
+                result.append(host)
+    return result
+
+
+def _warm_host(host: str) -> None:
+    try:
+        # DNS trước: kết quả nằm trong cache của hệ điều hành cho lần kết nối sau
+        socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+    except OSError:
+        return
+    try:
+        response = get_session().head(f"https://{host}/", headers=_HEADERS, timeout=PREWARM_TIMEOUT,
+                                      allow_redirects=False)
+        response.close()  # trả kết nối về pool
+    except Exception:
+        # Prewarm chỉ là tối ưu, lỗi mạng sẽ được báo ở request thật
+        with _warmed_lock:
+            _warmed.pop(host, None)
+
+
+def prewarm(hosts: Iterable[str]) -> None:
+    """Resolve hosts and open pooled connections to them in the background"""
+    hosts = _hosts_to_warm(hosts)
+    for host in hosts:
+        threading.Thread(target=_warm_host, args=(host,), daemon=True,
+                         name=f"prewarm-{host}").start()
@@ -0,0 +1,179 @@
+"""
+Short-link resolution cache for TikTok and Facebook share links.
+
+vm.tiktok.com / vt.tiktok.com / tiktok.com/t/ and fb.watch / facebook.com/share/
+links need a redirect chase before yt-dlp or the scrapers can use them. The
+result is stored in ``short_links.json`` under the data directory with a TTL,
+so a link pasted again (or handed to the download thread) resolves instantly.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from utils.helpers import get_data_dir
+
+DEFAULT_TTL_HOURS = 24 * 7
+MAX_ENTRIES = 2000
+
+_SHORT_LINK_PATTERN = re.compile(
+    r'^https?://(?:'
+    r'(?:vm|vt)\.tiktok\.com/|'
+    r'(?:www\.|m\.)?tiktok\.com/t/|'
+    r'fb\.watch/|'
+    r'(?:www\.|m\.|web\.)?facebook\.com/share/'
+    r')',
+    re.IGNORECASE
+)
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+
+def is_short_link(url: str) -> bool:
+    """Check if a URL is a TikTok/Facebook share link that redirects to the real video URL"""
+    return bool(url) and _SHORT_LINK_PATTERN.match(url.strip()) is not None
+
+
+class ShortLinkResolver:
+    """
+    Resolves share links to canonical URLs and caches the result on disk.
+
+    Thread-safe: info threads and download threads can use the shared
+    instance concurrently.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = ShortLinkResolver()
+        return cls._instance
+
+    def __init__(self, cache_file: Optional[str] = None, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.cache_file = cache_file or os.path.join(get_data_dir(), "short_links.json")
+        self.ttl = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # info/download threads save concurrently
+        self._entries: Dict[str, dict] = {}  # short url -> {'url': canonical, 'resolved_at': timestamp}
+        self._listeners = []
+        self._load()
+
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """Register callback(short_url, canonical_url), called whenever a link is resolved"""
+        self._listeners.append(callback)
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Return the cached canonical URL without touching the network, or None"""
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry['resolved_at'] < self.ttl:
+                return entry['url']
+        return None
+
+    def canonical_url(self, url: str) -> str:
+        """Best canonical form available right now (cached resolution or the URL itself)"""
+        if not is_short_link(url):
+            return url.strip()
+        return self.lookup(url) or url.strip()
+
+    def resolve(self, url: str, timeout: int = 10) -> str:
+        """
+        Resolve a share link to its canonical URL.
+
+        Non-short URLs are returned unchanged. On network errors the original
+        URL is returned (and nothing is cached) so callers can still try it.
+        """
+        if not is_short_link(url):
+            return url.strip()
+
+        cached = self.lookup(url)
+        if cached:
+            return cached
+
+        resolved = self._fetch(url.strip(), timeout)
+        if not resolved:
+            return url.strip()
+
+        with self._lock:
+            self._entries[self._key(url)] = {'url': resolved, 'resolved_at': time.time()}
+            self._prune()
+        self._save()
+
+        for callback in list(self._listeners):
+            try:
+                callback(url.strip(), resolved)
+            except Exception as e:
+                print(f"Short link listener error: {str(e)}")
+        return resolved
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._save()
+
+    def _fetch(self, url: str, timeout: int) -> Optional[str]:
+        from utils.http_session import get_session
+        session = get_session()
+
+        try:
+            response = session.head(url, headers=_HEADERS, allow_redirects=True, timeout=timeout)
+            # Some share endpoints reject HEAD, fall back to a streamed GET (body is never read)
+            if response.status_code >= 400 or response.url == url:
+                response = session.get(url, headers=_HEADERS, allow_redirects=True,
+                                        timeout=timeout, stream=True)
+                response.close()
+            if response.url and response.url != url:
+                return response.url
+        except Exception as e:
+            print(f"Error resolving short link {url}: {str(e)}")
+        return None
+
+    @staticmethod
+    def _key(url: str) -> str:
+        # Share links carry tracking parameters that do not change the target
+        return url.strip().split('?')[0].split('#')[0].rstrip('/')
+
+    def _prune(self) -> None:
+        """Drop expired entries and keep at most MAX_ENTRIES (caller holds the lock)"""
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now - entry['resolved_at'] >= self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) > MAX_ENTRIES:
+            oldest = sorted(self._entries, key=lambda key: self._entries[key]['resolved_at'])
+            for key in oldest[:len(self._entries) - MAX_ENTRIES]:
+                del self._entries[key]
+
+    def _load(self) -> None:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._entries = {key: entry for key, entry in data.items()
+                                     if isinstance(entry, dict) and 'url' in entry and 'resolved_at' in entry}
+                    self._prune()
+        except Exception as e:
+            print(f"Error loading short link cache: {str(e)}")
+
+    def _save(self) -> None:
+        try:
+            # Chụp dữ liệu trong _save_lock để bản cũ không ghi đè bản mới hơn
+            with self._save_lock:
+                with self._lock:
+                    data = dict(self._entries)
+                temp_file = self.cache_file + ".tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving short link cache: {str(e)}")
@@ -0,0 +1,311 @@
+"""
+Speculative metadata prefetch for links copied to the clipboard or typed into
+a downloader's link field.
+
+When enabled, a supported URL queues a low-priority info task on the shared
+task pool (the same VideoInfoThread / TikTokInfoThread / FacebookInfoThread
+the windows use) and the result, plus the thumbnail bytes, is kept in a small
+in-memory cache.
+When the user presses "Lấy thông tin" the window takes the cached result, or
+attaches to the prefetch that is still running instead of starting over.
+"""
+import importlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from utils.link_resolver import ShortLinkResolver
+from utils.task_pool import run_in_pool
+
+# Nguồn hỗ trợ: (tên, regex nhận diện URL, module, lớp info thread)
+SOURCES = [
+    ('youtube', re.compile(r'^https?://(?:www\.|m\.)?(?:youtube\.com/(?:watch\?|shorts/)|youtu\.be/)', re.I),
+     'ui.youtube_downloader_window', 'VideoInfoThread'),
+    ('tiktok', re.compile(r'^https?://(?:[\w-]+\.)?tiktok\.com/', re.I),
+     'ui.tiktok_downloader_window', 'TikTokInfoThread'),
+    ('facebook', re.compile(r'^https?://(?:[\w-]+\.)?(?:facebook\.com|fb\.com|fb\.watch)/', re.I),
+     'ui.facebook_downloader_window', 'FacebookInfoThread'),
+]
+
+CACHE_TTL = 10 * 60  # giây
+DEBOUNCE_MS = 500
+THUMBNAIL_TIMEOUT = 10
+
+
+def detect_source(url):
+    """Trả về tên nguồn ('youtube', 'tiktok', 'facebook') hoặc None"""
+    url = (url or '').strip()
+    if not url or len(url) > 2048 or any(c.isspace() for c in url):
+        return None
+    for name, pattern, _, _ in SOURCES:
+        if pattern.match(url):
+            return name
+    return None
+
+
+class MetadataPrefetcher(QObject):
+    """
+    Bộ lấy trước thông tin video (tùy chọn, mặc định tắt).
+
+    Giới hạn: tối đa max_concurrent info thread cùng lúc, chỉ giữ yêu cầu mới
+    nhất đang chờ, cache tối đa max_entries kết quả và max_thumbnail_bytes
+    dữ liệu thumbnail.
+    """
+    info_prefetched = pyqtSignal(str)  # canonical URL vừa có trong cache
+
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if MetadataPrefetcher._instance is None:
+            MetadataPrefetcher._instance = MetadataPrefetcher()
+        return MetadataPrefetcher._instance
+
+    def __init__(self, max_concurrent=1, max_entries=20, max_thumbnail_bytes=8 * 1024 * 1024):
+        super().__init__()
+        from utils.config_manager import ConfigManager
+        self.config = ConfigManager.get_instance()
+
+        self.max_concurrent = max_concurrent
+        self.max_entries = max_entries
+        self.max_thumbnail_bytes = max_thumbnail_bytes
+
+        self._cache = OrderedDict()  # key -> {'info': dict, 'time': float, 'thumb_bytes': int}
+        self._thumbnail_bytes = 0
+        self._running = {}  # key -> QThread
+        self._pending = None  # (key, url, source) mới nhất đang chờ
+        self._waiters = {}  # key -> [(owner, on_info, on_error)]
+        self._lock = threading.Lock()  # bảo vệ cache khi thread thumbnail ghi vào
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._flush_hint)
+        self._hinted_url = None
+
+        self._clipboard_connected = False
+        # Link rút gọn được mở rộng sau này vẫn trỏ tới cùng một mục trong cache
+        ShortLinkResolver.get_instance().add_listener(self._on_short_link_resolved)
+
+        if self.enabled:
+            self.set_enabled(True)
+
+    # === Bật/tắt ===
+
+    @property
+    def enabled(self):
+        return self.config.prefetch_enabled
+
+    def set_enabled(self, value):
+        self.config.prefetch_enabled = bool(value)
+        clipboard = QApplication.clipboard() if QApplication.instance() else None
+        if value and clipboard and not self._clipboard_connected:
+            clipboard.dataChanged.connect(self._on_clipboard_changed)
+            self._clipboard_connected = True
+        elif not value:
+            if clipboard and self._clipboard_connected:
+                clipboard.dataChanged.disconnect(self._on_clipboard_changed)
+                self._clipboard_connected = False
+            self._pending = None
+            for key, thread in list(self._running.items()):
+                if not self._waiters.get(key):
+                    thread.stop()
+
+    # === Gợi ý URL ===
+
+    def hint(self, url):
+        """Gợi ý một URL (từ clipboard hoặc ô nhập link); có debounce"""
+        if not self.enabled or not detect_source(url):
+            return
+        self._hinted_url = url.strip()
+        self._debounce.start(DEBOUNCE_MS)
+
+    def _on_clipboard_changed(self):
+        self.hint(QApplication.clipboard().text())
+
+    def _flush_hint(self):
+        url, self._hinted_url = self._hinted_url, None
+        if url:
+            self.prefetch(url)
+
+    def prefetch(self, url):
+        """Bắt đầu lấy trước thông tin cho URL nếu chưa có trong cache"""
+        source = detect_source(url)
+        if not source:
+            return
+        key = self.cache_key(url)
+        if self.get(url) is not None or key in self._running:
+            return
+
+        # Yêu cầu cũ đang chờ bị thay bằng yêu cầu mới nhất
+        self._pending = (key, url.strip(), source)
+        self._cancel_unwanted()
+        self._start_pending()
+
+    def _cancel_unwanted(self):
+        """Dừng các prefetch không có ai chờ để nhường chỗ cho yêu cầu mới"""
+        for key, thread in list(self._running.items()):
+            if not self._waiters.get(key):
+                thread.stop()
+
+    def _start_pending(self):
+        if not self._pending or len(self._running) >= self.max_concurrent:
+            return
+        key, url, source = self._pending
+        self._pending = None
+
+        module_name, class_name = next((m, c) for name, _, m, c in SOURCES if name == source)
+        try:
+            thread_class = getattr(importlib.import_module(module_name), class_name)
+            thread = thread_class(url)
+        except Exception as e:
+            print(f"Prefetch error for {url}: {str(e)}")
+            return
+
+        self._running[key] = thread
+        # Khóa được tính lại khi có kết quả: link rút gọn được info thread mở rộng trong lúc chạy
+        thread.info_ready.connect(lambda info, k=key, u=url: self._on_info_ready(self._rekey(k, u), info))
+        thread.error.connect(lambda error, k=key, u=url: self._on_error(self._rekey(k, u), error))
+        thread.finished.connect(lambda k=key, u=url, t=thread: self._on_thread_finished(self._rekey(k, u), t))
+        thread.start(QThread.LowPriority)
+
+    # === Kết quả ===
+
+    def _rekey(self, key, url):
+        """Move the running prefetch and its waiters of key to the current key of url"""
+        new_key = self.cache_key(url)
+        if new_key == key:
+            return key
+        thread = self._running.pop(key, None)
+        if thread is not None and new_key not in self._running:
+            self._running[new_key] = thread
+        waiters = self._waiters.pop(key, None)
+        if waiters:
+            self._waiters.setdefault(new_key, []).extend(waiters)
+        return new_key
+
+    def _on_info_ready(self, key, info):
+        self._store(key, info)
+        for owner, on_info, _ in self._waiters.pop(key, []):
+            try:
+                on_info(info)
+            except Exception as e:
+                print(f"Prefetch callback error: {str(e)}")
+        self.info_prefetched.emit(key)
+
+        if info.get('thumbnail_url') and 'thumbnail_data' not in info:
+            run_in_pool(self._fetch_thumbnail, key, info['thumbnail_url'], priority=QThread.LowPriority)
+
+    def _on_error(self, key, error):
+        for owner, _, on_error in self._waiters.pop(key, []):
+            try:
+                on_error(error)
+            except Exception as e:
+                print(f"Prefetch callback error: {str(e)}")
+
+    def _on_thread_finished(self, key, thread):
+        if self._running.get(key) is thread:
+            del self._running[key]
+        # Thread kết thúc mà không có kết quả (bị dừng): báo cho người đang chờ
+        if key in self._waiters and self.get_by_key(key) is None:
+            self._on_error(key, "Đã hủy lấy thông tin")
+        thread.deleteLater()
+        self._start_pending()
+
+    def _fetch_thumbnail(self, key, thumbnail_url):
+        try:
+            from utils.http_session import get_session
+            response = get_session().get(thumbnail_url, timeout=THUMBNAIL_TIMEOUT)
+            if response.status_code != 200 or len(response.content) > self.max_thumbnail_bytes // 4:
+                return
+            data = response.content
+        except Exception:
+            return
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return
+            entry['info']['thumbnail_data'] = data
+            entry['thumb_bytes'] = len(data)
+            self._thumbnail_bytes += len(data)
+            self._enforce_limits()
+
+    # === Cache ===
+
+    @staticmethod
+    def cache_key(url):
+        return ShortLinkResolver.get_instance().canonical_url(url.strip())
+
+    def _store(self, key, info):
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old:
+                self._thumbnail_bytes -= old['thumb_bytes']
+            self._cache[key] = {'info': dict(info), 'time': time.time(), 'thumb_bytes': 0}
+            self._enforce_limits()
+
+    def _enforce_limits(self):
+        """Xóa mục cũ nhất cho tới khi nằm trong giới hạn (gọi khi đang giữ lock)"""
+        while self._cache and (len(self._cache) > self.max_entries
+                               or self._thumbnail_bytes > self.max_thumbnail_bytes):
+            _, entry = self._cache.popitem(last=False)
+            self._thumbnail_bytes -= entry['thumb_bytes']
+
+    def get_by_key(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['time'] > CACHE_TTL:
+                del self._cache[key]
+                self._thumbnail_bytes -= entry['thumb_bytes']
+                return None
+            self._cache.move_to_end(key)
+            return dict(entry['info'])
+
+    def get(self, url):
+        """Thông tin đã lấy trước cho URL, hoặc None"""
+        return self.get_by_key(self.cache_key(url))
+
+    def _running_key(self, url):
+        """Key of the prefetch running for url; a short link may not be re-keyed yet"""
+        for key in (self.cache_key(url), url.strip()):
+            if key in self._running:
+                return key
+        return None
+
+    def is_pending(self, url):
+        return self._running_key(url) is not None
+
+    def wait_for(self, url, owner, on_info, on_error):
+        """
+        Nhận kết quả của prefetch đang chạy thay vì bắt đầu lại.
+        Task chưa chạy được đưa lên ưu tiên bình thường vì người dùng đang chờ.
+        """
+        key = self._running_key(url)
+        if key is None:
+            return False
+        thread = self._running[key]
+        self._waiters.setdefault(key, []).append((owner, on_info, on_error))
+        thread.setPriority(QThread.NormalPriority)
+        return True
+
+    def forget(self, owner):
+        """Bỏ các callback của một cửa sổ (gọi khi cửa sổ đóng)"""
+        for key in list(self._waiters):
+            self._waiters[key] = [w for w in self._waiters[key] if w[0] is not owner]
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _on_short_link_resolved(self, short_url, canonical_url):
+        # Gọi từ thread bất kỳ; chỉ đổi khóa trong cache
+        with self._lock:
+            entry = self._cache.pop(short_url, None)
+            if entry is not None and canonical_url not in self._cache:
+                self._cache[canonical_url] = entry
+            elif entry is not None:
+                self._thumbnail_bytes -= entry['thumb_bytes']
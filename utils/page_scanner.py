@@ -0,0 +1,417 @@
+"""
+Precompiled field scanners for scraped TikTok and Facebook pages.
+
+The direct-extraction fallbacks pull a handful of fields (title, author,
+thumbnail, video URLs, IDs) out of multi-megabyte HTML. Every pattern here is
+compiled once at import, each field stops at its first accepted match, and
+the old ``findall`` / DOTALL ``<video>...</video>`` scans are gone. Most
+patterns start with a fixed key (``"playAddr":"``, ``<meta``); the scanner
+looks that key up with ``str.find`` first, so a pattern whose key is not on
+the page costs a substring search instead of a full regex pass, and a
+``PageIndex`` remembers those lookups across the fields of one page.
+
+Run ``python -m utils.page_scanner`` for a fixture benchmark against the old
+inline extraction code.
+"""
+import json
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Post-processor: receives the captured text, returns the value or None to reject the match
+PostProcess = Optional[Callable[[str], Optional[str]]]
+
+_REGEX_SPECIAL = set('.^$*+?{}[]()|\\')
+# Shorter keys (like "<") occur everywhere and are not worth a lookup
+MIN_KEY_LENGTH = 3
+
+
+def unescape_url(value: str) -> str:
+    """Undo the JSON escaping used for URLs embedded in page scripts."""
+    return value.replace('\\u002F', '/').replace('\\/', '/')
+
+
+def literal_prefix(regex: str) -> str:
+    """Fixed text every match of regex starts with ('' if there is none)."""
+    prefix = []
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            if i + 1 >= len(regex) or regex[i + 1].isalnum():
+                break  # \s, \d, \b... are not literals
+            char = regex[i + 1]
+            i += 2
+        elif char in _REGEX_SPECIAL:
+            break
+        else:
+            i += 1
+        if i < len(regex) and regex[i] in '*?{':
+            break  # the last character is optional
+        prefix.append(char)
+        if i < len(regex) and regex[i] == '+':
+            break
+    return ''.join(prefix)
+
+
+class PageIndex:
+    """
+    First positions of fixed keys in one page, shared by the fields scanned
+    from it. A key containing a key already known to be absent is absent too.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._positions: Dict[str, int] = {}
+        self._absent: List[str] = []
+
+    def find(self, key: str) -> int:
+        position = self._positions.get(key)
+        if position is None:
+            if any(absent in key for absent in self._absent):
+                position = -1
+            else:
+                position = self.text.find(key)
+                if position < 0:
+                    self._absent.append(key)
+            self._positions[key] = position
+        return position
+
+
+class PageScanner:
+    """
+    Collects several fields from a scraped page with precompiled patterns.
+
+    Patterns are given as ``(field, regex, postprocess)`` tuples. For a field
+    with several patterns, the order in the list is the priority: the first
+    pattern that yields a value wins and the remaining ones are never run.
+    Each regex should have at most one capturing group; the group (or the
+    whole match) is the field value.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str, PostProcess]]):
+        self.patterns = list(patterns)
+        self.fields: List[str] = []
+        self._alternatives: Dict[str, List[Tuple[re.Pattern, str, PostProcess]]] = {}
+
+        for field, regex, postprocess in self.patterns:
+            compiled = re.compile(regex)
+            if compiled.groups > 1:
+                raise ValueError(f"Pattern for '{field}' has more than one capturing group: {regex}")
+
+            if field not in self._alternatives:
+                self.fields.append(field)
+                self._alternatives[field] = []
+            key = literal_prefix(regex)
+            if len(key) < MIN_KEY_LENGTH:
+                key = ''
+            self._alternatives[field].append((compiled, key, postprocess))
+
+    def index(self, text: str) -> PageIndex:
+        """Key index to share between several scan_field() calls on the same page."""
+        return PageIndex(text)
+
+    def scan_field(self, text: str, field: str, index: Optional[PageIndex] = None) -> Optional[str]:
+        """Return the first accepted value for one field, or None."""
+        if index is None:
+            index = PageIndex(text)
+        for compiled, key, postprocess in self._alternatives[field]:
+            # No match can start before the first occurrence of the key
+            start = index.find(key) if key else 0
+            if start < 0:
+                continue
+            # finditer stops at the first accepted match instead of collecting
+            # every occurrence like findall does
+            for match in compiled.finditer(text, start):
+                value = match.group(1) if compiled.groups else match.group(0)
+                if postprocess is not None:
+                    value = postprocess(value)
+                if value:
+                    return value
+        return None
+
+    def scan(self, text: str, fields: Optional[Iterable[str]] = None,
+             index: Optional[PageIndex] = None) -> Dict[str, Optional[str]]:
+        """Scan text and return a dict with one entry per field (None if not found)."""
+        wanted = self.fields if fields is None else list(fields)
+        if index is None:
+            index = PageIndex(text)
+        return {field: self.scan_field(text, field, index) for field in wanted}
+
+
+# === Facebook ===
+
+def _clean_facebook_title(value: str) -> Optional[str]:
+    title = value.replace(" | Facebook", "").replace("Facebook Watch", "").strip()
+    return title or None
+
+
+_JSON_BLOCK_MP4 = re.compile(r'(https?://[^"\']+\.mp4[^"\']*)')
+
+
+def _first_mp4_in_block(value: str) -> Optional[str]:
+    match = _JSON_BLOCK_MP4.search(value)
+    return unescape_url(match.group(1)) if match else None
+
+
+FACEBOOK_PAGE_SCANNER = PageScanner(
+    [
+        ('hd_url', r'"hd_src":"(https:\\\/\\\/[^"]*)"', unescape_url),
+        ('sd_url', r'"sd_src":"(https:\\\/\\\/[^"]*)"', unescape_url),
+        # Fallback video URLs, in the order the old extractor tried them
+        ('video_url', r'videoData"?:\s*{(?:[^{}]|{[^{}]*})*?}', _first_mp4_in_block),
+        ('video_url', r'"videoData"?:\s*\[[^\]]*\]', _first_mp4_in_block),
+        ('video_url', r'"media"?:\s*{(?:[^{}]|{[^{}]*})*?}', _first_mp4_in_block),
+        ('video_url', r'"media"?:\s*\[[^\]]*\]', _first_mp4_in_block),
+        ('video_url', r'"attachments"?:\s*\[[^\]]*\]', _first_mp4_in_block),
+        # Only sources of a <video> element (not <audio> or <img>)
+        ('video_url', r'<video\b[^>]*\bsrc=["\'](https?://[^\'"]+)[\'"]', None),
+        ('video_url', r'<video\b[^>]*>(?:(?!</video>)[\s\S])*?<source\b[^>]*\bsrc=["\'](https?://[^\'"]+)[\'"]', None),
+        ('video_url', r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', unescape_url),
+        ('video_url', r'(https?://video[\.\-][^"\'>\s]+)', unescape_url),
+        ('video_url', r'(https?://[^"\'>\s]*fbcdn[^"\'>\s]*)', unescape_url),
+        ('video_url', r'(https?://[^"\'>\s]*fbpx[^"\'>\s]*)', unescape_url),
+        ('title', r'<meta property="og:title" content="([^"]+)"', _clean_facebook_title),
+        ('title', r'<title>([^<]*)</title>', _clean_facebook_title),
+        ('title', r'"name":"([^"]+)"', _clean_facebook_title),
+        ('uploader', r'<meta property="og:site_name" content="([^"]+)"', None),
+        ('uploader', r'"ownerName":"([^"]+)"', None),
+        ('uploader', r'"publisher_name":"([^"]+)"', None),
+        ('uploader', r'"publisher":\{"name":"([^"]+)"', None),
+        ('thumbnail', r'<meta property="og:image" content="([^"]+)"', unescape_url),
+        ('thumbnail', r'"thumbnailUrl":"(https:\\\/\\\/[^"]*)"', unescape_url),
+        ('thumbnail', r'"thumbnailImage":{"uri":"([^"]+)"', unescape_url),
+        ('thumbnail', r'"image":{"uri":"([^"]+)"', unescape_url),
+    ]
+)
+
+# Video ID patterns, most specific first
+_FACEBOOK_ID_SCANNER = PageScanner(
+    [
+        ('video_id', r'\/videos\/(\d+)', None),
+        ('video_id', r'[?&]v=(\d+)', None),
+        ('video_id', r'watch\/?\?v=(\d+)', None),
+        ('video_id', r'\/(\d{15,})', None),
+        ('video_id', r'[?&]idorvanity=(\d+)', None),
+        ('video_id', r'\/reel\/(\d+)', None),
+    ]
+)
+
+
+def scan_facebook_id(url: str) -> Optional[str]:
+    """Extract a Facebook video ID from any of the supported URL shapes."""
+    return _FACEBOOK_ID_SCANNER.scan(url)['video_id']
+
+
+# === TikTok ===
+
+def _embed_json_video_url(value: str) -> Optional[str]:
+    """Dig the video URL out of the embed page's JSON props."""
+    try:
+        data = json.loads(value)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    video_data = data.get('props', {}).get('initialProps', {}).get('videoData', {})
+    if not isinstance(video_data, dict):
+        return None
+    return video_data.get('contentUrl') or video_data.get('playAddr')
+
+
+_TIKTOK_META_PATTERNS = [
+    ('title', r'property="og:title"\s+content="([^"]+)"', None),
+    ('thumbnail', r'property="og:image"\s+content="([^"]+)"', None),
+]
+
+# Embed pages carry og:author, mobile pages a plain author meta tag
+TIKTOK_EMBED_SCANNER = PageScanner(
+    _TIKTOK_META_PATTERNS + [
+        ('author', r'property="og:author"\s+content="([^"]+)"', None),
+        ('video_url', r'<script[^>]*type="application/json"[^>]*>([^<]+)</script>', _embed_json_video_url),
+        ('video_url', r'<video[^>]*src="([^"]+)"', None),
+        ('video_url', r'"playAddr":"(https:\\\/\\\/[^"]+)"', unescape_url),
+        ('video_url', r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', None),
+        ('video_url', r'(https?://[^"\'>\s]+/play/[^"\'>\s]*)', None),
+        ('video_url', r'(https?://[^"\'>\s]+\.tiktokcdn\.com[^"\'>\s]*)', None),
+    ]
+)
+
+TIKTOK_MOBILE_SCANNER = PageScanner(
+    _TIKTOK_META_PATTERNS + [
+        ('author', r'<meta\s+name="author"\s+content="([^"]+)"', None),
+        ('video_url', r'<video[^>]*src="([^"]+)"', None),
+        ('video_url', r'"playAddr":"([^"]+)"', unescape_url),
+        ('video_url', r'"downloadAddr":"([^"]+)"', unescape_url),
+        ('video_url', r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', None),
+    ]
+)
+
+
+
+
+# === Benchmark ===
+
+def _legacy_facebook(page_content: str) -> Dict[str, Optional[str]]:
+    """The extraction order of the old FacebookInfoThread.try_direct_extraction."""
+    video_url = None
+    hd_src_match = re.search(r'"hd_src":"(https:\\\/\\\/[^"]*)"', page_content)
+    sd_src_match = re.search(r'"sd_src":"(https:\\\/\\\/[^"]*)"', page_content)
+    if hd_src_match:
+        video_url = hd_src_match.group(1).replace('\\/', '/')
+    elif sd_src_match:
+        video_url = sd_src_match.group(1).replace('\\/', '/')
+
+    if not video_url:
+        for pattern in [r'videoData"?:\s*{(?:[^{}]|{[^{}]*})*?}', r'"videoData"?:\s*\[[^\]]*\]',
+                        r'"media"?:\s*{(?:[^{}]|{[^{}]*})*?}', r'"media"?:\s*\[[^\]]*\]',
+                        r'"attachments"?:\s*\[[^\]]*\]']:
+            for match in re.finditer(pattern, page_content):
+                urls = re.findall(r'(https?://[^"\']+\.mp4[^"\']*)', match.group(0))
+                if urls:
+                    video_url = urls[0].replace('\\/', '/')
+                    break
+            if video_url:
+                break
+
+    if not video_url:
+        for tag in re.findall(r'<video[^>]*>(.*?)</video>', page_content, re.DOTALL):
+            source_match = re.search(r'src=["\'](https?://[^\'"]+)[\'"]', tag)
+            if source_match:
+                video_url = source_match.group(1)
+                break
+
+    if not video_url:
+        for pattern in [r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', r'(https?://video[\.\-][^"\'>\s]+)',
+                        r'(https?://[^"\'>\s]*fbcdn[^"\'>\s]*)', r'(https?://[^"\'>\s]*fbpx[^"\'>\s]*)']:
+            url_matches = re.findall(pattern, page_content)
+            if url_matches:
+                video_url = url_matches[0].replace('\\/', '/')
+                break
+
+    title = uploader = thumbnail = None
+    for pattern in [r'<meta property="og:title" content="([^"]+)"', r'<title>(.*?)</title>', r'"name":"([^"]+)"']:
+        title_match = re.search(pattern, page_content)
+        if title_match:
+            title = title_match.group(1).replace(" | Facebook", "").replace("Facebook Watch", "").strip()
+            if title:
+                break
+    for pattern in [r'<meta property="og:site_name" content="([^"]+)"', r'"ownerName":"([^"]+)"',
+                    r'"publisher_name":"([^"]+)"', r'"publisher":\{"name":"([^"]+)"']:
+        uploader_match = re.search(pattern, page_content)
+        if uploader_match:
+            uploader = uploader_match.group(1)
+            break
+    for pattern in [r'<meta property="og:image" content="([^"]+)"', r'"thumbnailUrl":"(https:\\\/\\\/[^"]*)"',
+                    r'"thumbnailImage":{"uri":"([^"]+)"', r'"image":{"uri":"([^"]+)"']:
+        thumbnail_match = re.search(pattern, page_content)
+        if thumbnail_match:
+            thumbnail = thumbnail_match.group(1).replace('\\/', '/')
+            break
+
+    return {'video_url': video_url, 'title': title, 'uploader': uploader, 'thumbnail': thumbnail}
+
+
+def _scan_facebook(page_content: str) -> Dict[str, Optional[str]]:
+    scanner = FACEBOOK_PAGE_SCANNER
+    index = scanner.index(page_content)
+    video_url = (scanner.scan_field(page_content, 'hd_url', index)
+                 or scanner.scan_field(page_content, 'sd_url', index)
+                 or scanner.scan_field(page_content, 'video_url', index))
+    result = scanner.scan(page_content, ('title', 'uploader', 'thumbnail'), index)
+    result['video_url'] = video_url
+    return result
+
+
+def _legacy_tiktok_mobile(page_content: str) -> Dict[str, Optional[str]]:
+    """The extraction order of the old TikTokInfoThread.extract_from_mobile_page."""
+    result = {}
+    for field, pattern in [('title', r'<meta\s+property="og:title"\s+content="([^"]+)"'),
+                           ('author', r'<meta\s+name="author"\s+content="([^"]+)"'),
+                           ('thumbnail', r'<meta\s+property="og:image"\s+content="([^"]+)"')]:
+        match = re.search(pattern, page_content)
+        result[field] = match.group(1) if match else None
+
+    video_url = None
+    video_url_match = re.search(r'<video[^>]*src="([^"]+)"', page_content)
+    if video_url_match:
+        video_url = video_url_match.group(1)
+    for pattern in [r'"playAddr":"([^"]+)"', r'"downloadAddr":"([^"]+)"']:
+        if not video_url:
+            for match in re.findall(pattern, page_content):
+                video_url = match.replace('\\u002F', '/').replace('\\/', '/')
+                break
+    if not video_url:
+        mp4_matches = re.findall(r'(https?://[^"\'>\s]+\.mp4[^"\'>\s]*)', page_content)
+        if mp4_matches:
+            video_url = mp4_matches[0]
+    result['video_url'] = video_url
+    return result
+
+
+_FACEBOOK_HEAD = (
+    '<html><head><title>Clip | Facebook</title>'
+    '<meta property="og:title" content="Sample clip | Facebook" />'
+    '{site_name}'
+    '<meta property="og:image" content="https://scontent.xx.fbcdn.net/v/t15/thumb.jpg" />'
+    '</head><body>{padding}'
+)
+
+_FIXTURES = {
+    # hd_src present: the old code stops after two searches for the video URL
+    'facebook': (
+        _legacy_facebook, _scan_facebook,
+        _FACEBOOK_HEAD.replace('{site_name}', '<meta property="og:site_name" content="Sample Page" />')
+        + '<script>{{"sd_src":"https:\\/\\/video.xx.fbcdn.net\\/v\\/sd.mp4",'
+        '"hd_src":"https:\\/\\/video.xx.fbcdn.net\\/v\\/hd.mp4"}}</script>'
+        '{padding}</body></html>',
+    ),
+    # No hd/sd sources or site name: every fallback runs over the whole page
+    'facebook_fallback': (
+        _legacy_facebook, _scan_facebook,
+        _FACEBOOK_HEAD.replace('{site_name}', '')
+        + '<script>{{"ownerName":"Sample Page"}}</script>'
+        '<a href="https://video-hkg1-1.xx.fbcdn.net/o1/v/t2/f2/m69/clip.mp4?efg=abc">clip</a>'
+        '{padding}</body></html>',
+    ),
+    'tiktok_mobile': (
+        _legacy_tiktok_mobile,
+        lambda page: TIKTOK_MOBILE_SCANNER.scan(page),
+        '<html><head><meta property="og:title" content="Sample TikTok" />'
+        '<meta name="author" content="sample_user" />'
+        '<meta property="og:image" content="https://p16-sign.tiktokcdn.com/cover.jpeg" />'
+        '</head><body>{padding}'
+        '<script>{{"downloadAddr":"https:\\u002F\\u002Fv16.tiktokcdn.com\\u002Fdl.mp4"}}</script>'
+        '{padding}</body></html>',
+    ),
+}
+
+
+def run_benchmark(padding_kb: int = 2048, rounds: int = 5) -> None:
+    """Compare the scanners with the old inline extraction code on the bundled fixtures."""
+    # Link-heavy filler, closer to a real page than plain text
+    filler = ('<div class="x1n2onr6"><a href="https://www.facebook.com/people/sample/100012345678"'
+              ' role="link" tabindex="0">lorem ipsum</a> dolor sit amet "__typename":"User"</div>\n')
+    padding = filler * max(1, (padding_kb * 1024) // (2 * len(filler)))
+
+    for name, (legacy_func, scan_func, template) in _FIXTURES.items():
+        page = template.format(padding=padding)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            legacy = legacy_func(page)
+        legacy_time = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            result = scan_func(page)
+        scan_time = (time.perf_counter() - start) / rounds
+
+        same = all(result.get(field) == value for field, value in legacy.items())
+        print(f"{name:18s} page={len(page) / 1024:6.0f} KB  legacy={legacy_time * 1000:8.1f} ms  "
+              f"scanner={scan_time * 1000:8.1f} ms  speedup={legacy_time / max(scan_time, 1e-9):5.1f}x  "
+              f"same_result={same}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
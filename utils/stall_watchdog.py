@@ -0,0 +1,184 @@
+"""
+Event-loop stall watchdog (optional, for diagnosing freezes).
+
+A QTimer on the GUI thread ticks every ``HEARTBEAT_MS``; a background thread
+checks the time of the last tick. When the event loop has not ticked for
+longer than the threshold, the main thread's stack is captured with
+``sys._current_frames()`` and the stall is attributed to the innermost frame
+in the application's own code (``ui/...``, ``utils/...``), so freezes in
+Qt or library calls are counted against the line that called them.
+
+Stalls are aggregated by call site and written to ``stall_report.txt`` in the
+data directory, worst total time first. ``stall_detected`` lets the overlay
+(``ui.stall_overlay``) show recent counts. Enabled with the
+``general.stall_watchdog`` settings or the ``--stall-watchdog`` argument.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from utils.helpers import get_data_dir
+
+HEARTBEAT_MS = 100
+DEFAULT_THRESHOLD_MS = 500
+MAX_STACK_FRAMES = 15
+RECENT_WINDOW_SECONDS = 300  # cửa sổ "gần đây" hiển thị trên overlay
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _is_app_frame(filename):
+    filename = os.path.abspath(filename)
+    return (filename.startswith(_APP_ROOT + os.sep) and filename != os.path.abspath(__file__)
+            and 'site-packages' not in filename)
+
+
+def _relative(filename):
+    filename = os.path.abspath(filename)
+    if filename.startswith(_APP_ROOT + os.sep):
+        return os.path.relpath(filename, _APP_ROOT)
+    return filename
+
+
+class StallWatchdog(QObject):
+    """Detects event-loop stalls and aggregates them by call site"""
+    stall_detected = pyqtSignal(float, str)  # duration_ms, call site
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = StallWatchdog()
+        return cls._instance
+
+    def __init__(self, threshold_ms: int = DEFAULT_THRESHOLD_MS, report_path: Optional[str] = None):
+        super().__init__()
+        self.threshold_ms = threshold_ms
+        self.report_path = report_path or os.path.join(get_data_dir(), "stall_report.txt")
+        self._lock = threading.Lock()
+        self._sites: Dict[str, dict] = {}  # call site -> {'count', 'total_ms', 'max_ms', 'stack'}
+        self._recent = deque()  # thời điểm các lần treo gần đây
+        self._last_tick = time.monotonic()
+        self._main_ident = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(HEARTBEAT_MS)
+        self._heartbeat.timeout.connect(self._tick)
+
+    # === Public API ===
+
+    def start(self, threshold_ms: Optional[int] = None) -> None:
+        """Start watching (call from the GUI thread)"""
+        if threshold_ms:
+            self.threshold_ms = threshold_ms
+        if self._thread is not None:
+            return
+        self._main_ident = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._heartbeat.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        print(f"Stall watchdog started (threshold {self.threshold_ms} ms, report {self.report_path})")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._heartbeat.stop()
+        self._stop.set()
+        self._thread.join(1)
+        self._thread = None
+        self.write_report()
+
+    def recent_count(self, seconds: float = RECENT_WINDOW_SECONDS) -> int:
+        cutoff = time.monotonic() - seconds
+        with self._lock:
+            return sum(1 for stamp in self._recent if stamp >= cutoff)
+
+    def summary(self) -> List[dict]:
+        """Aggregated stalls, worst total time first"""
+        with self._lock:
+            sites = [dict(site=site, **stats) for site, stats in self._sites.items()]
+        return sorted(sites, key=lambda s: s['total_ms'], reverse=True)
+
+    def write_report(self) -> None:
+        sites = self.summary()
+        if not sites:
+            return
+        total_ms = sum(s['total_ms'] for s in sites)
+        lines = [
+            f"KHyTool stall report - {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Threshold {self.threshold_ms} ms: {sum(s['count'] for s in sites)} stalls, "
+            f"{total_ms / 1000:.1f} s total",
+            "",
+        ]
+        for s in sites:
+            lines.append(f"[{s['count']}x, total {s['total_ms'] / 1000:.1f} s, "
+                         f"max {s['max_ms'] / 1000:.1f} s] {s['site']}")
+            lines.extend(f"    {frame}" for frame in s['stack'])
+            lines.append("")
+        try:
+            tmp_path = self.report_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines))
+            os.replace(tmp_path, self.report_path)
+        except Exception as e:
+            print(f"Error writing stall report: {str(e)}")
+
+    # === Internals ===
+
+    def _tick(self):
+        self._last_tick = time.monotonic()
+
+    def _watch(self):
+        poll = HEARTBEAT_MS / 1000
+        while not self._stop.wait(poll):
+            stalled_since = self._last_tick
+            if (time.monotonic() - stalled_since) * 1000 < self.threshold_ms:
+                continue
+            # Chụp stack ngay khi vượt ngưỡng: đó là đoạn code đang chặn event loop
+            site, stack = self._capture_main_stack()
+            while self._last_tick == stalled_since and not self._stop.wait(poll):
+                pass
+            end = self._last_tick if self._last_tick != stalled_since else time.monotonic()
+            self._record(site, stack, (end - stalled_since) * 1000)
+
+    def _capture_main_stack(self):
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return "<unknown>", []
+        frames = traceback.extract_stack(frame)
+        app_frames = [f for f in frames if _is_app_frame(f.filename)]
+        culprit = app_frames[-1] if app_frames else frames[-1]
+        site = f"{_relative(culprit.filename)}:{culprit.lineno} in {culprit.name}"
+        stack = [f"{_relative(f.filename)}:{f.lineno} in {f.name}: {(f.line or '').strip()}"
+                 for f in frames[-MAX_STACK_FRAMES:]]
+        return site, stack
+
+    def _record(self, site, stack, duration_ms):
+        with self._lock:
+            stats = self._sites.setdefault(site, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': stack})
+            stats['count'] += 1
+            stats['total_ms'] += duration_ms
+            if duration_ms >= stats['max_ms']:
+                stats['max_ms'] = duration_ms
+                stats['stack'] = stack  # giữ stack của lần treo lâu nhất
+            now = time.monotonic()
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - RECENT_WINDOW_SECONDS:
+                self._recent.popleft()
+        print(f"Event loop stalled for {duration_ms:.0f} ms at {site}")
+        self.write_report()
+        self.stall_detected.emit(duration_ms, site)
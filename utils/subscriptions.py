@@ -0,0 +1,366 @@
+"""
+Theo dõi kênh/playlist YouTube và đồng bộ video mới.
+
+Mỗi subscription lưu các ID video đã thấy và ngày đăng mới nhất. Một lần
+đồng bộ liệt kê phẳng (extract_flat + lazy_playlist) tab Videos của kênh,
+vốn sắp xếp mới nhất trước, và dừng ở ID đầu tiên đã thấy, nên thường chỉ
+tốn một vài request thay vì quét lại toàn bộ danh sách. Chỉ các video mới
+được đưa vào DownloadQueue.
+"""
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, QMutex, QMutexLocker
+
+from utils.download_queue import DownloadQueue
+from utils.helpers import get_data_dir
+from utils.ytdlp_pool import YoutubeDLPool
+
+# Số ID gần nhất được giữ cho mỗi kênh (playlist giữ toàn bộ vì thứ tự không phải mới nhất trước)
+MAX_SEEN_IDS = 500
+# Lần đồng bộ đầu tiên chỉ ghi nhận trang đầu của kênh, không tải lại video cũ
+BASELINE_SIZE = 30
+# Giới hạn video mới mỗi lần đồng bộ (phòng khi mọi ID đã thấy bị xóa khỏi kênh)
+MAX_NEW_PER_SYNC = 50
+SCHEDULER_INTERVAL_MS = 60 * 1000
+
+
+def _entry_upload_date(entry):
+    """Ngày đăng dạng YYYYMMDD từ entry phẳng (nếu yt-dlp cung cấp)"""
+    if entry.get('upload_date'):
+        return entry['upload_date']
+    timestamp = entry.get('timestamp') or entry.get('release_timestamp')
+    if timestamp:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y%m%d')
+    return None
+
+
+class Subscription:
+    def __init__(self, url, title="", format_id='best', output_path=""):
+        self.id = str(uuid.uuid4())
+        self.url = url
+        self.title = title or url
+        self.format_id = format_id
+        self.output_path = output_path
+        self.seen_ids = []  # mới nhất trước
+        self.last_upload_date = None  # YYYYMMDD
+        self.last_sync = 0
+        self.last_new_count = 0
+        self.last_error = ""
+        self.enabled = True
+        self.added_time = time.time()
+
+    @property
+    def is_playlist(self):
+        """Playlist thường xếp cũ nhất trước, kênh (tab Videos) xếp mới nhất trước"""
+        return '/playlist' in self.url
+
+    def mark_seen(self, video_ids):
+        """Ghi nhận các ID (mới nhất trước) vào đầu danh sách đã thấy"""
+        known = set(self.seen_ids)
+        new_ids = [video_id for video_id in video_ids if video_id and video_id not in known]
+        self.seen_ids = new_ids + self.seen_ids
+        if not self.is_playlist:
+            del self.seen_ids[MAX_SEEN_IDS:]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'title': self.title,
+            'format_id': self.format_id,
+            'output_path': self.output_path,
+            'seen_ids': self.seen_ids,
+            'last_upload_date': self.last_upload_date,
+            'last_sync': self.last_sync,
+            'last_new_count': self.last_new_count,
+            'last_error': self.last_error,
+            'enabled': self.enabled,
+            'added_time': self.added_time,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        subscription = cls(data['url'], data.get('title', ''), data.get('format_id', 'best'),
+                           data.get('output_path', ''))
+        subscription.id = data['id']
+        subscription.seen_ids = data.get('seen_ids', [])
+        subscription.last_upload_date = data.get('last_upload_date')
+        subscription.last_sync = data.get('last_sync', 0)
+        subscription.last_new_count = data.get('last_new_count', 0)
+        subscription.last_error = data.get('last_error', "")
+        subscription.enabled = data.get('enabled', True)
+        subscription.added_time = data.get('added_time', time.time())
+        return subscription
+
+
+class SubscriptionSyncThread(QThread):
+    """Liệt kê các video mới của một subscription (không tải xuống)"""
+    sync_finished = pyqtSignal(str, list, list, str)  # subscription id, video mới, ID đã liệt kê, tiêu đề
+    error = pyqtSignal(str, str)  # subscription id, thông báo lỗi
+
+    def __init__(self, subscription):
+        super().__init__()
+        self.subscription_id = subscription.id
+        self.url = subscription.url
+        self.is_playlist = subscription.is_playlist
+        self.seen_ids = set(subscription.seen_ids)
+        self.should_stop = False
+
+    def run(self):
+        try:
+            ydl_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'socket_timeout': 15,
+                'extract_flat': 'in_playlist',
+                'lazy_playlist': True,  # Trang tiếp theo chỉ được tải khi duyệt tới
+                'ignoreerrors': True,
+            }
+            baseline = not self.seen_ids
+            new_entries = []
+            listed_ids = []
+            with YoutubeDLPool.get_instance().checkout('youtube:playlist', ydl_opts) as ydl:
+                info = ydl.extract_info(self.url, download=False, process=False)
+                if not info or info.get('_type') not in ('playlist', 'multi_video'):
+                    raise Exception("URL không phải là playlist hoặc kênh")
+                title = info.get('title') or info.get('uploader') or self.url
+
+                for entry in info.get('entries') or []:
+                    if self.should_stop:
+                        break
+                    video_id = entry.get('id') if entry else None
+                    if not video_id:
+                        continue
+                    if video_id in self.seen_ids:
+                        if self.is_playlist:
+                            continue
+                        break  # Kênh: mọi video phía sau đã được xử lý ở lần trước
+                    listed_ids.append(video_id)
+                    if baseline:
+                        if not self.is_playlist and len(listed_ids) >= BASELINE_SIZE:
+                            break
+                        continue
+                    new_entries.append({
+                        'id': video_id,
+                        'url': entry.get('url') or f"https://www.youtube.com/watch?v={video_id}",
+                        'title': entry.get('title') or video_id,
+                        'upload_date': _entry_upload_date(entry),
+                    })
+                    if len(new_entries) >= MAX_NEW_PER_SYNC:
+                        break
+
+            if self.should_stop:
+                raise Exception("Đã hủy đồng bộ")
+            self.sync_finished.emit(self.subscription_id, new_entries, listed_ids, title)
+        except Exception as e:
+            self.error.emit(self.subscription_id, str(e))
+
+    def stop(self):
+        self.should_stop = True
+
+
+class SubscriptionManager(QObject):
+    """Danh sách subscription, đồng bộ song song có giới hạn và lịch đồng bộ tự động"""
+    subscriptions_changed = pyqtSignal()
+    subscription_synced = pyqtSignal(str, int)  # subscription id, số video mới
+    sync_error = pyqtSignal(str, str)  # subscription id, thông báo lỗi
+    sync_all_finished = pyqtSignal(int)  # tổng số video mới
+
+    _instance = None
+    _mutex = QMutex()
+
+    @staticmethod
+    def get_instance():
+        if SubscriptionManager._instance is None:
+            with QMutexLocker(SubscriptionManager._mutex):
+                if SubscriptionManager._instance is None:
+                    SubscriptionManager._instance = SubscriptionManager()
+        return SubscriptionManager._instance
+
+    def __init__(self):
+        super().__init__()
+        from utils.config_manager import ConfigManager
+        self.config = ConfigManager.get_instance()
+
+        self.subscriptions = {}  # id -> Subscription
+        self.last_sync_all = 0
+        self._syncing = set()
+        self._sync_new_total = 0
+
+        # Hàng đợi riêng cho việc đồng bộ, độc lập với hàng đợi tải xuống
+        self.sync_queue = DownloadQueue(max_parallel=self.config.subscriptions_max_parallel)
+        self.sync_queue.queue_empty.connect(self._on_sync_queue_empty)
+
+        self._scheduler = QTimer(self)
+        self._scheduler.timeout.connect(self._check_schedule)
+
+        self.load_subscriptions()
+
+    # === Danh sách ===
+
+    def add_subscription(self, url, title="", format_id='best', output_path=""):
+        """Thêm subscription (hoặc trả về subscription đã có cho cùng URL)"""
+        from ui.youtube_downloader_window import normalize_collection_url
+        url = normalize_collection_url(url.strip())
+        for subscription in self.subscriptions.values():
+            if subscription.url == url:
+                return subscription.id
+
+        subscription = Subscription(url, title, format_id, output_path)
+        self.subscriptions[subscription.id] = subscription
+        self.save_subscriptions()
+        self.subscriptions_changed.emit()
+        return subscription.id
+
+    def remove_subscription(self, subscription_id):
+        if self.subscriptions.pop(subscription_id, None) is not None:
+            self.save_subscriptions()
+            self.subscriptions_changed.emit()
+
+    def get_subscription(self, subscription_id):
+        return self.subscriptions.get(subscription_id)
+
+    def get_all_subscriptions(self):
+        return sorted(self.subscriptions.values(), key=lambda s: s.added_time)
+
+    def is_syncing(self, subscription_id=None):
+        if subscription_id is None:
+            return bool(self._syncing)
+        return subscription_id in self._syncing
+
+    # === Đồng bộ ===
+
+    def sync(self, subscription_ids=None):
+        """Đồng bộ các subscription (mặc định: tất cả đang bật), tối đa max_parallel cùng lúc"""
+        if subscription_ids is None:
+            subscription_ids = [s.id for s in self.get_all_subscriptions() if s.enabled]
+        if not self._syncing:
+            self._sync_new_total = 0
+        self.sync_queue.set_max_parallel(self.config.subscriptions_max_parallel)
+
+        jobs = []
+        for subscription_id in subscription_ids:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is None or subscription_id in self._syncing:
+                continue
+            self._syncing.add(subscription_id)
+            jobs.append((subscription_id, lambda s=subscription: self._create_sync_thread(s)))
+        if jobs:
+            self.sync_queue.enqueue_many(jobs)
+        return len(jobs)
+
+    def sync_all(self):
+        self.last_sync_all = time.time()
+        return self.sync(None)
+
+    def stop_sync(self):
+        self.sync_queue.stop_all()
+
+    def _create_sync_thread(self, subscription):
+        thread = SubscriptionSyncThread(subscription)
+        thread.sync_finished.connect(self._on_synced)
+        thread.error.connect(self._on_sync_error)
+        thread.finished.connect(lambda s=subscription.id: self._syncing.discard(s))
+        return thread
+
+    def _on_synced(self, subscription_id, new_entries, listed_ids, title):
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription is None:
+            return
+
+        if new_entries:
+            self._enqueue_downloads(subscription, new_entries)
+        subscription.mark_seen(listed_ids)
+        dates = [entry['upload_date'] for entry in new_entries if entry.get('upload_date')]
+        if dates:
+            subscription.last_upload_date = max(dates + [subscription.last_upload_date or ''])
+        if title and subscription.title == subscription.url:
+            subscription.title = title
+        subscription.last_sync = time.time()
+        subscription.last_new_count = len(new_entries)
+        subscription.last_error = ""
+        self._sync_new_total += len(new_entries)
+
+        self.save_subscriptions()
+        self.subscription_synced.emit(subscription_id, len(new_entries))
+        self.subscriptions_changed.emit()
+
+    def _on_sync_error(self, subscription_id, error):
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription is not None:
+            subscription.last_error = error
+            self.save_subscriptions()
+            self.subscriptions_changed.emit()
+        print(f"Error syncing subscription {subscription_id}: {error}")
+        self.sync_error.emit(subscription_id, error)
+
+    def _on_sync_queue_empty(self):
+        # Không còn job nào (kể cả job bị bỏ bởi stop_sync)
+        self._syncing.clear()
+        self.sync_all_finished.emit(self._sync_new_total)
+
+    def _enqueue_downloads(self, subscription, entries):
+        """Đưa video mới vào hàng đợi tải xuống, video cũ hơn được tải trước"""
+        from ui.youtube_downloader_window import DownloadThread
+        from utils.config_manager import ConfigManager
+        output_path = subscription.output_path or ConfigManager.get_instance().get_download_dir()
+        ordered = entries if subscription.is_playlist else list(reversed(entries))
+        DownloadQueue.get_instance().enqueue_many(
+            (entry['url'], lambda url=entry['url']: DownloadThread(url, subscription.format_id, output_path))
+            for entry in ordered
+        )
+
+    # === Lịch đồng bộ ===
+
+    def start_scheduler(self):
+        """Kiểm tra lịch mỗi phút; đồng bộ tất cả khi đã quá interval_hours kể từ lần trước"""
+        if not self._scheduler.isActive():
+            self._scheduler.start(SCHEDULER_INTERVAL_MS)
+        self._check_schedule()
+
+    def stop_scheduler(self):
+        self._scheduler.stop()
+
+    def _check_schedule(self):
+        if not self.config.subscriptions_auto_sync or self._syncing or not self.subscriptions:
+            return
+        interval = max(1, self.config.subscriptions_interval_hours) * 3600
+        if time.time() - self.last_sync_all >= interval:
+            print("Running scheduled subscription sync")
+            self.sync_all()
+            self.save_subscriptions()
+
+    # === Lưu trữ ===
+
+    def get_subscriptions_file_path(self):
+        return os.path.join(get_data_dir(), "subscriptions.json")
+
+    def save_subscriptions(self):
+        """Save subscriptions to a JSON file"""
+        try:
+            data = {
+                'last_sync_all': self.last_sync_all,
+                'subscriptions': [s.to_dict() for s in self.get_all_subscriptions()],
+            }
+            with open(self.get_subscriptions_file_path(), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Error saving subscriptions: {str(e)}")
+
+    def load_subscriptions(self):
+        """Load subscriptions from a JSON file"""
+        try:
+            file_path = self.get_subscriptions_file_path()
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.last_sync_all = data.get('last_sync_all', 0)
+                for item in data.get('subscriptions', []):
+                    subscription = Subscription.from_dict(item)
+                    self.subscriptions[subscription.id] = subscription
+        except Exception as e:
+            print(f"Error loading subscriptions: {str(e)}")
@@ -0,0 +1,142 @@
+"""
+Shared bounded pool for short background jobs (video info fetches,
+prefetch thumbnails).
+
+``PooledTask`` keeps the small part of the QThread API the info fetchers
+use (``start``, ``stop``, ``isRunning``, ``setPriority``, ``finished``), but
+``run()`` executes on a worker of one shared QThreadPool instead of a new
+thread per fetch. Superseding a fetch never waits for it: ``stop()`` only
+sets ``should_stop``, and ``LatestOnly`` drops the late results of every
+request but the newest.
+"""
+import threading
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+
+MAX_WORKERS = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Task đang chờ hoặc đang chạy; chỉ bỏ khi finished đã tới GUI thread, nên
+# cửa sổ có thể bỏ tham chiếu tới task cũ bất cứ lúc nào
+_active = set()
+_queue_lock = threading.Lock()  # giữa setPriority() và lúc worker nhận runner
+
+
+def get_task_pool() -> QThreadPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = QThreadPool()
+                _pool.setMaxThreadCount(MAX_WORKERS)
+    return _pool
+
+
+class _Runner(QRunnable):
+    """Auto-deleted by the pool; holds the task until it has run"""
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        self.picked = False
+
+    def run(self):
+        with _queue_lock:
+            self.picked = True
+        try:
+            self.task.run()
+        except Exception as e:
+            print(f"Background task error: {str(e)}")
+        finally:
+            self.task._running = False
+            self.task.finished.emit()
+
+
+class PooledTask(QObject):
+    """Base class of short jobs run on the shared pool; subclasses implement run()"""
+    finished = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.should_stop = False
+        self._running = False
+        self._runner = None
+
+    def run(self):
+        raise NotImplementedError
+
+    def start(self, priority: int = QThread.NormalPriority) -> None:
+        """Queue the task; higher priorities are picked first while workers are busy"""
+        self._running = True
+        _active.add(self)
+        self.finished.connect(self._release)
+        self._runner = _Runner(self)
+        get_task_pool().start(self._runner, int(priority))
+
+    def _release(self):
+        self._runner = None
+        _active.discard(self)
+
+    def stop(self) -> None:
+        self.should_stop = True
+
+    def isRunning(self) -> bool:
+        return self._running
+
+    def setPriority(self, priority: int) -> None:
+        """Move a task that has not started yet to another place in the queue"""
+        with _queue_lock:
+            # Runner đã được nhận thì không còn trong hàng đợi (và có thể đã bị xóa)
+            if self._runner is None or self._runner.picked:
+                return
+            taken = get_task_pool().tryTake(self._runner)
+        if taken:
+            self._runner = _Runner(self)
+            get_task_pool().start(self._runner, int(priority))
+
+
+class _FunctionTask(QRunnable):
+    def __init__(self, fn, args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        try:
+            self.fn(*self.args)
+        except Exception as e:
+            print(f"Background task error: {str(e)}")
+
+
+def run_in_pool(fn: Callable, *args, priority: int = QThread.NormalPriority) -> None:
+    """Run fn(*args) on the shared pool (no result, no cancellation)"""
+    get_task_pool().start(_FunctionTask(fn, args), int(priority))
+
+
+class LatestOnly:
+    """
+    Generation counter for requests that supersede each other: callbacks
+    wrapped with guard() are dropped once a newer request has started (or
+    cancel() was called), so old tasks can finish on their own.
+    """
+
+    def __init__(self):
+        self.generation = 0
+
+    def next(self) -> int:
+        self.generation += 1
+        return self.generation
+
+    def cancel(self) -> None:
+        self.generation += 1
+
+    def guard(self, callback: Callable) -> Callable:
+        generation = self.generation
+
+        def guarded(*args):
+            if generation == self.generation:
+                callback(*args)
+        return guarded
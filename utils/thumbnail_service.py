@@ -0,0 +1,235 @@
+"""
+Asynchronous thumbnail loading for the downloader windows and download lists.
+
+``ThumbnailService.request(source, size, callback, owner)`` takes a URL or a
+local path and calls ``callback(pixmap)`` on the GUI thread with an image
+already scaled to ``size`` (``None`` if it could not be loaded). Downloading,
+decoding and scaling run on a small QThreadPool; scaled pixmaps are kept in
+an in-memory LRU bounded by bytes, and downloaded images in a disk cache
+(``thumbnail_cache/`` in the data directory) so they survive restarts.
+Callbacks of an owner widget that has been deleted are skipped.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from utils.helpers import get_data_dir
+from utils.thumbnail_store import ThumbnailIndex, thumbnail_for_size
+
+MAX_MEMORY_BYTES = 32 * 1024 * 1024  # ảnh đã scale (RGBA)
+MAX_DISK_BYTES = 64 * 1024 * 1024
+MAX_WORKERS = 4
+FETCH_TIMEOUT = 15
+PRUNE_EVERY_WRITES = 25
+
+_disk_lock = threading.Lock()
+_disk_writes = 0
+
+
+def get_cache_dir() -> str:
+    cache_dir = os.path.join(get_data_dir(), "thumbnail_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def fetch_bytes(url: str) -> Optional[bytes]:
+    """Image bytes of url from the disk cache, downloading them on a miss (blocking)"""
+    cache_path = os.path.join(get_cache_dir(), hashlib.sha1(url.encode('utf-8')).hexdigest())
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        os.utime(cache_path)  # LRU theo thời gian dùng gần nhất
+        return data
+    except OSError:
+        pass
+
+    from utils.http_session import get_session
+    response = get_session().get(url, timeout=FETCH_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    data = response.content
+    try:
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+        _after_disk_write()
+    except OSError as e:
+        print(f"Error writing thumbnail cache: {str(e)}")
+    return data
+
+
+def _after_disk_write():
+    global _disk_writes
+    with _disk_lock:
+        _disk_writes += 1
+        if _disk_writes % PRUNE_EVERY_WRITES:
+            return
+        _prune_disk()
+
+
+def _prune_disk():
+    """Remove least recently used cache files above MAX_DISK_BYTES (disk lock held)"""
+    entries = []
+    total = 0
+    for entry in os.scandir(get_cache_dir()):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= MAX_DISK_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _read_source(source, size):
+    if source.startswith(('http://', 'https://')):
+        return fetch_bytes(source)
+    if size:
+        # Dùng bản đã thu nhỏ sẵn khi lưu thumbnail nếu có
+        source = thumbnail_for_size(source, size)
+    with open(source, 'rb') as f:
+        data = f.read()
+    ThumbnailIndex.get_instance().touch(source)
+    return data
+
+
+def _fits(image, size):
+    """Already scaled into the size box (a pre-scaled thumbnail)"""
+    width, height = size
+    return (image.width() <= width and image.height() <= height
+            and (image.width() == width or image.height() == height))
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, service, key, source, size):
+        super().__init__()
+        self.service = service
+        self.key = key
+        self.source = source
+        self.size = size
+
+    def run(self):
+        image = None
+        try:
+            data = _read_source(self.source, self.size)
+            if data:
+                image = QImage()
+                if image.loadFromData(data) and not image.isNull():
+                    if self.size and not _fits(image, self.size):
+                        image = image.scaled(self.size[0], self.size[1], Qt.KeepAspectRatio,
+                                             Qt.SmoothTransformation)
+                else:
+                    image = None
+        except Exception as e:
+            print(f"Error loading thumbnail {self.source}: {str(e)}")
+            image = None
+        self.service._loaded.emit(self.key, image if image is not None else QImage())
+
+
+class ThumbnailService(QObject):
+    _loaded = pyqtSignal(str, QImage)  # phát từ worker, nhận trên GUI thread
+
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if ThumbnailService._instance is None:
+            ThumbnailService._instance = ThumbnailService()
+        return ThumbnailService._instance
+
+    def __init__(self, max_memory_bytes: int = MAX_MEMORY_BYTES):
+        super().__init__()
+        self.max_memory_bytes = max_memory_bytes
+
+        self._memory = OrderedDict()  # key -> QPixmap
+        self._memory_bytes = 0
+        self._waiting = {}  # key -> [(callback, owner)]
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(MAX_WORKERS)
+        self._loaded.connect(self._on_loaded)
+
+    # === Public API ===
+
+    def request(self, source: str, size: Optional[Tuple[int, int]], callback: Callable,
+                owner: Optional[QObject] = None) -> None:
+        """Load source (URL or path) scaled to size and pass the QPixmap to callback"""
+        if not source:
+            callback(None)
+            return
+        key = self._key(source, size)
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            callback(pixmap)
+            return
+
+        waiters = self._waiting.get(key)
+        if waiters is not None:
+            waiters.append((callback, owner))  # đang tải, chờ chung kết quả
+            return
+        self._waiting[key] = [(callback, owner)]
+        self._pool.start(_LoadTask(self, key, source, size))
+
+    def cached(self, source: str, size: Optional[Tuple[int, int]]) -> Optional[QPixmap]:
+        """Scaled pixmap already in memory, or None"""
+        return self._memory.get(self._key(source, size))
+
+    def invalidate(self, source: str) -> None:
+        """Forget every cached size of source (the file or URL changed)"""
+        prefix = f"{source}|"
+        for key in [k for k in self._memory if k.startswith(prefix)]:
+            self._drop(key)
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+        self._memory_bytes = 0
+
+    # === GUI thread ===
+
+    def _on_loaded(self, key, image):
+        pixmap = None
+        if not image.isNull():
+            pixmap = QPixmap.fromImage(image)
+            self._remember(key, pixmap)
+        for callback, owner in self._waiting.pop(key, []):
+            if owner is not None and sip.isdeleted(owner):
+                continue
+            try:
+                callback(pixmap)
+            except Exception as e:
+                print(f"Thumbnail callback error: {str(e)}")
+
+    def _remember(self, key, pixmap):
+        self._drop(key)
+        self._memory[key] = pixmap
+        self._memory_bytes += self._pixmap_bytes(pixmap)
+        while self._memory and self._memory_bytes > self.max_memory_bytes:
+            oldest = next(iter(self._memory))
+            self._drop(oldest)
+
+    def _drop(self, key):
+        pixmap = self._memory.pop(key, None)
+        if pixmap is not None:
+            self._memory_bytes -= self._pixmap_bytes(pixmap)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    @staticmethod
+    def _key(source, size):
+        return f"{source}|{size[0]}x{size[1]}" if size else f"{source}|full"
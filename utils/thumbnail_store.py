@@ -0,0 +1,432 @@
+"""
+Thumbnails of downloaded videos, stored at display resolution and by content.
+
+Source thumbnails are often 1280x720 or larger while the download lists show
+them at 120x68. ``save_thumbnail`` normalizes an image once, when the
+download saves it, into the fixed ``THUMBNAIL_SIZES`` (JPEG, with Pillow).
+Files are named by the SHA-256 of the source image
+(``<sha256>_120x68.jpg``, ``<sha256>_320x180.jpg`` in the ``thumbnails/``
+folder of the application), so the same artwork downloaded again, or shared
+by several sources, is stored once. ``thumbnail_for_size`` gives readers the
+stored variant for the size they display. Files saved before this (one
+image per source, sometimes full size) are still read as they are.
+
+``ThumbnailIndex`` keeps the size and last use of every stored file, and
+which download refers to which image. An image is deleted when its last
+download is removed; unreferenced files are held to a byte budget, evicting
+the least recently used on each write. A full rescan of the folder (files
+added or removed outside the app, downloads that were never saved, age
+limit) only runs in a background thread at startup.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.helpers import get_data_dir
+
+# Kích thước hiển thị: danh sách tải xuống và khung xem trước của các cửa sổ
+THUMBNAIL_SIZES = [(120, 68), (320, 180)]
+JPEG_QUALITY = 85
+
+_VARIANT_RE = re.compile(r'^(?P<base>.+)_(?P<w>\d+)x(?P<h>\d+)\.jpg$')
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+
+def get_thumbnails_dir() -> str:
+    app_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    thumbnails_dir = os.path.join(app_dir, "thumbnails")
+    os.makedirs(thumbnails_dir, exist_ok=True)
+    return thumbnails_dir
+
+
+def variant_path(path: str, size: Tuple[int, int]) -> str:
+    """Path of the size variant of a stored thumbnail"""
+    match = _VARIANT_RE.match(path)
+    base = match.group('base') if match else os.path.splitext(path)[0]
+    return f"{base}_{size[0]}x{size[1]}.jpg"
+
+
+def thumbnail_for_size(path: str, size: Tuple[int, int]) -> str:
+    """Smallest stored variant of path that covers size (path itself for old full-size files)"""
+    if not _VARIANT_RE.match(path):
+        return path
+    for width, height in sorted(THUMBNAIL_SIZES):
+        if width >= size[0] and height >= size[1]:
+            candidate = variant_path(path, (width, height))
+            if os.path.exists(candidate):
+                return candidate
+    return path
+
+
+def _scaled_variants(data: bytes):
+    """JPEG bytes of data fitted into each of THUMBNAIL_SIZES"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        for width, height in THUMBNAIL_SIZES:
+            variant = image.copy()
+            variant.thumbnail((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            variant.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            yield (width, height), out.getvalue()
+
+
+def _has_pillow() -> bool:
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _write_file(path, content):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def save_thumbnail(data: bytes, download_id: Optional[str] = None) -> Optional[str]:
+    """
+    Store image data in every display size and reference it from download_id.
+    Nothing is written when the same image is already stored. Returns the
+    path to keep in DownloadInfo.thumbnail_path (the largest variant), or
+    None if the image could not be stored.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    thumbnails_dir = get_thumbnails_dir()
+    index = ThumbnailIndex.get_instance()
+    pillow = _has_pillow()
+    if pillow:
+        paths = [os.path.join(thumbnails_dir, f"{digest}_{w}x{h}.jpg") for w, h in THUMBNAIL_SIZES]
+    else:
+        # Không có Pillow: lưu ảnh gốc, các danh sách sẽ tự thu nhỏ khi hiển thị
+        paths = [os.path.join(thumbnails_dir, f"{digest}.jpg")]
+
+    # Giữ tham chiếu trước khi kiểm tra file để ảnh không bị xóa giữa chừng
+    if download_id:
+        index.acquire(download_id, digest)
+
+    if not all(os.path.exists(path) for path in paths):
+        try:
+            if pillow:
+                for path, (_, content) in zip(paths, _scaled_variants(data)):
+                    _write_file(path, content)
+            else:
+                _write_file(paths[0], data)
+        except Exception as e:
+            print(f"Error saving thumbnail: {str(e)}")
+            if download_id:
+                index.release(download_id)
+            return None
+    index.record(paths)
+    return paths[-1]
+
+
+def store_remote_thumbnail(url: str, download_id: Optional[str] = None) -> Optional[str]:
+    """Fetch the thumbnail at url (through the thumbnail disk cache) and save it for download_id"""
+    from utils.thumbnail_service import fetch_bytes
+
+    data = fetch_bytes(url)
+    if not data:
+        return None
+    return save_thumbnail(data, download_id)
+
+
+def _thumbnail_base(name: str) -> str:
+    """File name without the size suffix, shared by all variants of a thumbnail"""
+    match = _VARIANT_RE.match(name)
+    return match.group('base') if match else os.path.splitext(name)[0]
+
+
+def _known_downloads() -> Dict[str, Optional[str]]:
+    """download_id -> thumbnail_path of the live download list and the saved downloads.json"""
+    downloads = {}
+    try:
+        with open(os.path.join(get_data_dir(), "downloads.json"), 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                if item.get('id'):
+                    downloads[item['id']] = item.get('thumbnail_path')
+    except (OSError, ValueError):
+        pass
+    from utils.download_manager import DownloadManager
+    manager = DownloadManager._instance
+    if manager is not None:
+        for download_id, info in list(manager.downloads.items()):
+            downloads[download_id] = getattr(info, 'thumbnail_path', None)
+    return downloads
+
+
+class ThumbnailIndex:
+    """Stored thumbnail files and the downloads referring to them"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = ThumbnailIndex()
+        return cls._instance
+
+    def __init__(self, thumbnails_dir: Optional[str] = None, index_path: Optional[str] = None):
+        self.thumbnails_dir = thumbnails_dir or get_thumbnails_dir()
+        self.index_path = index_path or os.path.join(get_data_dir(), "thumbnail_index.json")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = OrderedDict()  # tên file -> {'size', 'last_access'}, cũ nhất trước
+        self._total = 0
+        self._refs: Dict[str, str] = {}  # download_id -> ảnh (tên file bỏ kích thước)
+        self._refcounts = Counter()
+        self._session_refs = set()  # tham chiếu tạo trong phiên này, có thể chưa có trong downloads.json
+        self._dirty = False
+        self._load()
+
+    # === Public API ===
+
+    def record(self, paths) -> None:
+        """Register freshly written files, then evict over the budget"""
+        now = time.time()
+        with self._lock:
+            for path in paths:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                self._put(os.path.basename(path), size, now)
+        self.enforce_budget()
+
+    def acquire(self, download_id: str, base: str) -> None:
+        """Make download_id refer to the image base (a content hash or an old file name)"""
+        with self._lock:
+            self._session_refs.add(download_id)
+            if self._refs.get(download_id) == base:
+                return
+            orphan = self._drop_ref(download_id)
+            self._refs[download_id] = base
+            self._refcounts[base] += 1
+            self._dirty = True
+        self._remove_image(orphan)
+
+    def release(self, download_id: str) -> None:
+        """Drop the reference of a removed download, deleting its image if it was the last one"""
+        self.release_many([download_id])
+
+    def release_many(self, download_ids: Iterable[str]) -> None:
+        """release() for several downloads with a single index write"""
+        orphans = []
+        with self._lock:
+            for download_id in download_ids:
+                orphans.append(self._drop_ref(download_id))
+                self._session_refs.discard(download_id)
+        for orphan in orphans:
+            self._remove_image(orphan)
+        self._save()
+
+    def refcount(self, path_or_base: str) -> int:
+        with self._lock:
+            return self._refcounts.get(_thumbnail_base(os.path.basename(path_or_base)), 0)
+
+    def touch(self, path: str) -> None:
+        """Mark a thumbnail as used (saved with the next write)"""
+        name = os.path.basename(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry['last_access'] = time.time()
+                self._entries.move_to_end(name)
+                self._dirty = True
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    def enforce_budget(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used unreferenced files until under max_bytes; returns bytes freed"""
+        settings = _cleanup_settings()
+        if not settings['enabled']:
+            self._save()
+            return 0
+        if max_bytes is None:
+            max_bytes = settings['max_bytes']
+        with self._lock:
+            over_budget = self._total > max_bytes
+        freed = self._evict(lambda name, entry: True, max_bytes) if over_budget else 0
+        self._save()
+        return freed
+
+    def start_reconcile(self) -> threading.Thread:
+        """Rescan the folder and apply the age limit in the background"""
+        thread = threading.Thread(target=self.reconcile, daemon=True, name="thumbnail-reconcile")
+        thread.start()
+        return thread
+
+    def reconcile(self) -> None:
+        try:
+            found = {}
+            for entry in os.scandir(self.thumbnails_dir):
+                if entry.is_file() and entry.name.lower().endswith(_IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    found[entry.name] = (stat.st_size, stat.st_mtime)
+
+            with self._lock:
+                for name in [n for n in self._entries if n not in found]:
+                    self._total -= self._entries.pop(name)['size']
+                added = False
+                for name, (size, mtime) in found.items():
+                    entry = self._entries.get(name)
+                    if entry is None:
+                        # File có sẵn trên đĩa: coi lần sửa đổi cuối là lần dùng cuối
+                        self._put(name, size, mtime)
+                        added = True
+                    elif entry['size'] != size:
+                        self._total += size - entry['size']
+                        entry['size'] = size
+                if added:
+                    self._entries = OrderedDict(sorted(self._entries.items(),
+                                                       key=lambda item: item[1]['last_access']))
+                self._dirty = True
+
+            # Tham chiếu của các download không còn trong danh sách (bị xóa, chưa từng được lưu)
+            known = _known_downloads()
+            orphans = []
+            with self._lock:
+                for download_id in list(self._refs):
+                    if download_id not in known and download_id not in self._session_refs:
+                        orphans.append(self._drop_ref(download_id))
+                for download_id, path in known.items():
+                    if path and download_id not in self._refs:
+                        base = _thumbnail_base(os.path.basename(path))
+                        self._refs[download_id] = base
+                        self._refcounts[base] += 1
+            for base in orphans:
+                self._remove_image(base)
+
+            settings = _cleanup_settings()
+            if settings['enabled']:
+                cutoff = time.time() - settings['max_age_days'] * 24 * 3600
+                self._evict(lambda name, entry: entry['last_access'] < cutoff, 0)
+            self.enforce_budget()
+        except Exception as e:
+            print(f"Error reconciling thumbnails: {str(e)}")
+
+    # === Internals ===
+
+    def _put(self, name, size, last_access):
+        """Add or refresh an entry (lock held)"""
+        old = self._entries.pop(name, None)
+        if old is not None:
+            self._total -= old['size']
+        self._entries[name] = {'size': size, 'last_access': last_access}
+        self._total += size
+        self._dirty = True
+
+    def _drop_ref(self, download_id):
+        """Remove the reference of download_id; returns the image base if now unreferenced (lock held)"""
+        base = self._refs.pop(download_id, None)
+        if base is None:
+            return None
+        self._dirty = True
+        self._refcounts[base] -= 1
+        if self._refcounts[base] > 0:
+            return None
+        del self._refcounts[base]
+        return base
+
+    def _remove_image(self, base):
+        """Delete every stored file of an unreferenced image"""
+        if not base:
+            return
+        names = [f"{base}_{w}x{h}.jpg" for w, h in THUMBNAIL_SIZES]
+        names += [base + ext for ext in _IMAGE_EXTENSIONS]
+        with self._lock:
+            if self._refcounts.get(base):
+                return  # được tham chiếu lại trong lúc chờ
+            for name in names:
+                entry = self._entries.pop(name, None)
+                if entry is not None:
+                    self._total -= entry['size']
+                    self._dirty = True
+        for name in names:
+            try:
+                os.remove(os.path.join(self.thumbnails_dir, name))
+            except OSError:
+                pass
+
+    def _evict(self, should_evict, max_bytes):
+        """Remove old unreferenced entries matching should_evict while total is over max_bytes"""
+        with self._lock:
+            victims = []
+            total = self._total
+            for name, entry in self._entries.items():
+                if total <= max_bytes:
+                    break
+                if self._refcounts.get(_thumbnail_base(name)) or not should_evict(name, entry):
+                    continue
+                victims.append(name)
+                total -= entry['size']
+            freed = 0
+            for name in victims:
+                entry = self._entries.pop(name)
+                self._total -= entry['size']
+                freed += entry['size']
+            if victims:
+                self._dirty = True
+        for name in victims:
+            try:
+                os.remove(os.path.join(self.thumbnails_dir, name))
+            except OSError:
+                pass
+        return freed
+
+    def _load(self):
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                files = data.get('files', {})
+                for name, entry in sorted(files.items(), key=lambda item: item[1]['last_access']):
+                    self._entries[name] = entry
+                    self._total += entry['size']
+                self._refs = data.get('refs', {})
+                self._refcounts = Counter(self._refs.values())
+        except Exception as e:
+            print(f"Error loading thumbnail index: {str(e)}")
+            self._entries = OrderedDict()
+            self._total = 0
+            self._refs = {}
+            self._refcounts = Counter()
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({'files': self._entries, 'refs': self._refs})
+            self._dirty = False
+        try:
+            with self._save_lock:
+                tmp_path = self.index_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving thumbnail index: {str(e)}")
+
+
+def _cleanup_settings():
+    from utils.config_manager import ConfigManager
+    config = ConfigManager.get_instance()
+    return {
+        'enabled': config.thumbnail_cleanup_enabled,
+        'max_age_days': config.thumbnail_max_age_days,
+        'max_bytes': config.thumbnail_max_size_mb * 1024 * 1024,
+    }
@@ -7,7 +7,6 @@ import subprocess
 import platform
 import time
 import zipfile
-import requests
 from PyQt5.QtCore import QObject, pyqtSignal
 
 class Updater(QObject):
@@ -46,6 +45,7 @@ class Updater(QObject):
             bool: True if update available, False otherwise
         """
         try:
+            import requests
             response = requests.get(self.api_url, timeout=10)
             response.raise_for_status()  # Raise exception for 4XX/5XX status codes
             
@@ -82,6 +82,7 @@ class Updater(QObject):
             
             # Download update file
             self.update_progress.emit(10, "Đang tải bản cập nhật...")
+            import requests
             response = requests.get(self.download_url, stream=True)
             response.raise_for_status()
             
@@ -0,0 +1,152 @@
+"""
+Persistent cache directory for yt-dlp.
+
+yt-dlp caches YouTube signature/nsig functions and player data under
+``cachedir``. By default that is ``~/.cache/yt-dlp``, which is not reliable in
+the packaged build, so every session re-downloads and re-parses the player.
+All YoutubeDL instances get a dedicated directory under the app data
+directory instead; the size is bounded and a warm-up at startup makes the
+first extraction after launch as fast as later ones.
+"""
+import os
+import shutil
+import threading
+import time
+import logging
+from typing import Dict, Any
+
+from utils.helpers import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE_MB = 200
+# Player caches older than this are refreshed by the warm-up
+WARM_MAX_AGE_HOURS = 12
+# Short, stable public video used to prime the YouTube player caches
+WARM_UP_URL = "https://www.youtube.com/watch?v=jNQXAC9IVRM"
+
+_warm_thread = None
+
+
+def get_ytdlp_cache_dir() -> str:
+    """Get (and create) the yt-dlp cache directory"""
+    cache_dir = os.path.join(get_data_dir(), "yt-dlp-cache")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except Exception as e:
+        logger.warning(f"Could not create yt-dlp cache directory: {str(e)}")
+    return cache_dir
+
+
+def with_cache_dir(ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of ydl_opts that uses the persistent cache directory"""
+    opts = dict(ydl_opts)
+    opts.setdefault('cachedir', get_ytdlp_cache_dir())
+    return opts
+
+
+def get_cache_size(cache_dir: str = None) -> int:
+    """Total size in bytes of the cache directory"""
+    cache_dir = cache_dir or get_ytdlp_cache_dir()
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def cleanup_cache(max_size_mb: int = DEFAULT_MAX_SIZE_MB, cache_dir: str = None) -> int:
+    """
+    Delete the least recently modified cache files until the cache fits in max_size_mb.
+    Returns the number of bytes freed.
+    """
+    cache_dir = cache_dir or get_ytdlp_cache_dir()
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    budget = max_size_mb * 1024 * 1024
+    freed = 0
+    if total > budget:
+        entries.sort()  # oldest first
+        for _, size, path in entries:
+            if total - freed <= budget:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        logger.info(f"yt-dlp cache cleanup freed {freed} bytes")
+    return freed
+
+
+def clear_cache(cache_dir: str = None) -> None:
+    """Remove the whole yt-dlp cache (e.g. after a yt-dlp update breaks cached player code)"""
+    cache_dir = cache_dir or get_ytdlp_cache_dir()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.makedirs(cache_dir, exist_ok=True)
+
+
+def _player_cache_is_fresh(cache_dir: str) -> bool:
+    """Check if yt-dlp already has recent YouTube player caches"""
+    newest = 0
+    for section in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+        if not section.startswith('youtube'):
+            continue
+        for root, _, files in os.walk(os.path.join(cache_dir, section)):
+            for name in files:
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+                except OSError:
+                    pass
+    return newest and time.time() - newest < WARM_MAX_AGE_HOURS * 3600
+
+
+def warm_cache(max_size_mb: int = DEFAULT_MAX_SIZE_MB, prime_youtube: bool = True) -> None:
+    """
+    Prepare yt-dlp for the first extraction: import the extractor registry,
+    enforce the size budget and, if the cached player code is missing or
+    stale, run one extraction to download and solve the current player.
+    """
+    start = time.time()
+    try:
+        import yt_dlp
+
+        cache_dir = get_ytdlp_cache_dir()
+        cleanup_cache(max_size_mb, cache_dir)
+
+        if prime_youtube and not _player_cache_is_fresh(cache_dir):
+            ydl_opts = with_cache_dir({
+                'quiet': True,
+                'no_warnings': True,
+                'socket_timeout': 15,
+                'skip_download': True,
+            })
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.extract_info(WARM_UP_URL, download=False)
+        logger.info(f"yt-dlp cache warm-up finished in {time.time() - start:.1f}s")
+    except Exception as e:
+        # Warm-up is best effort, the real extraction will simply do the work itself
+        logger.warning(f"yt-dlp cache warm-up failed: {str(e)}")
+
+
+def start_cache_warmup(max_size_mb: int = DEFAULT_MAX_SIZE_MB, prime_youtube: bool = True) -> threading.Thread:
+    """Run warm_cache in a background daemon thread (once per session)"""
+    global _warm_thread
+    if _warm_thread is None:
+        _warm_thread = threading.Thread(target=warm_cache, args=(max_size_mb, prime_youtube),
+                                        name="ytdlp-cache-warmup", daemon=True)
+        _warm_thread.start()
+    return _warm_thread
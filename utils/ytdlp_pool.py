@@ -0,0 +1,130 @@
+"""
+Pool of warm, reusable YoutubeDL instances for metadata extraction.
+
+Building a ``yt_dlp.YoutubeDL`` costs ~0.1 s (option parsing, extractor
+registry, HTTP handlers, cookie jar) and the first use of each extractor adds
+its own initialization. Info fetches check out a pre-initialized instance per
+profile instead, so that setup, cookies and HTTP sessions stay warm between
+requests. Instances are recycled after ``max_uses`` checkouts.
+
+A YoutubeDL instance is not thread-safe: a checked-out instance belongs to
+exactly one worker thread until it is returned.
+"""
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from utils.ytdlp_cache import with_cache_dir
+
+DEFAULT_MAX_USES = 50
+DEFAULT_MAX_IDLE_PER_PROFILE = 2
+
+
+class _PooledInstance:
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.uses = 0
+
+
+class YoutubeDLPool:
+    """Per-profile pool of YoutubeDL instances, safe to use from worker threads"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = YoutubeDLPool()
+                    atexit.register(cls._instance.close_all)
+        return cls._instance
+
+    def __init__(self, max_uses: int = DEFAULT_MAX_USES, max_idle_per_profile: int = DEFAULT_MAX_IDLE_PER_PROFILE):
+        self.max_uses = max_uses
+        self.max_idle_per_profile = max_idle_per_profile
+        self._lock = threading.Lock()
+        self._idle: Dict[str, list] = {}  # profile -> [_PooledInstance]
+        self._stats = {'created': 0, 'reused': 0, 'recycled': 0}
+
+    @contextmanager
+    def checkout(self, profile: str, options: Dict[str, Any]):
+        """
+        Borrow a YoutubeDL for a profile.
+
+        ``profile`` identifies the option set (e.g. 'youtube:info',
+        'tiktok:chrome'); ``options`` are only used when a new instance has to
+        be created, so callers must use one profile name per option set.
+        """
+        pooled = self._acquire(profile, options)
+        broken = False
+        try:
+            yield pooled.ydl
+        except Exception:
+            # Network/extractor errors are normal, the instance stays usable
+            raise
+        except BaseException:
+            # Interrupted mid-request (thread exit, KeyboardInterrupt): do not reuse
+            broken = True
+            raise
+        finally:
+            self._release(profile, pooled, broken)
+
+    def _acquire(self, profile, options):
+        with self._lock:
+            idle = self._idle.get(profile)
+            if idle:
+                self._stats['reused'] += 1
+                return idle.pop()
+
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(with_cache_dir(options))
+        with self._lock:
+            self._stats['created'] += 1
+        return _PooledInstance(ydl)
+
+    def _release(self, profile, pooled, broken=False):
+        pooled.uses += 1
+        keep = not broken and pooled.uses < self.max_uses
+        if keep:
+            with self._lock:
+                idle = self._idle.setdefault(profile, [])
+                if len(idle) < self.max_idle_per_profile:
+                    idle.append(pooled)
+                    return
+        with self._lock:
+            self._stats['recycled'] += 1
+        self._close(pooled)
+
+    def warm(self, profile: str, options: Dict[str, Any], extractors=()) -> None:
+        """Create an idle instance ahead of time and initialize the given extractors (e.g. 'Youtube')"""
+        pooled = self._acquire(profile, options)
+        try:
+            for name in extractors:
+                pooled.ydl.get_info_extractor(name)
+        finally:
+            pooled.uses -= 1  # warming is not a real use
+            self._release(profile, pooled)
+
+    def close_all(self) -> None:
+        """Close every idle instance (cookies are saved by YoutubeDL.close)"""
+        with self._lock:
+            idle = [pooled for instances in self._idle.values() for pooled in instances]
+            self._idle.clear()
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(instances) for instances in self._idle.values())
+        return stats
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.ydl.close()
+        except Exception as e:
+            print(f"Error closing YoutubeDL instance: {str(e)}")